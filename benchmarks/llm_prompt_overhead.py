@@ -0,0 +1,111 @@
+"""LLMService 每次调用的 Python 开销基准
+
+对比两种方式在调用模型前后的 Python 开销 (不发起网络请求):
+1. 每次调用时构建 ChatPromptTemplate、处理链和时间变量，用正则和 json.loads 解析输出 (旧实现)
+2. 使用 prompts.PROMPTS 预编译的模板/处理链和按分钟缓存的时间变量，
+   按 LLMService 实际的解析路径 (_tag_section + repair_json + schema 校验) 解析输出
+
+用法 (在项目根目录):
+    python -m benchmarks.llm_prompt_overhead [--number 2000]
+"""
+
+import argparse
+import json
+import re
+import timeit
+from datetime import datetime, timedelta
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from langchain_core.prompts import ChatPromptTemplate
+
+from src.services.llm.llm_service import LLMService
+from src.services.llm.prompts import (
+    EXTRACT_TASKS_TEMPLATE,
+    FORMAT_CONTENT_TEMPLATE,
+    PROMPTS,
+    get_time_context,
+)
+from src.services.llm.structured_output import (
+    parse_note,
+    parse_task_items,
+    repair_json,
+)
+
+SAMPLE_OUTPUT = """
+<result>
+<analysis>...</analysis>
+<json>{"content_type": "Note", "title": "周会纪要", "summary": "s", "format_content": "c", "tags": ["会议"]}</json>
+<tasks>[{"title": "写周报", "priority": 3}]</tasks>
+</result>
+"""
+
+
+def legacy_time_context() -> dict:
+    """旧实现: 每次调用重建 7 项星期映射"""
+    current_time = datetime.now()
+    names = ["周一", "周二", "周三", "周四", "周五", "周六", "周日"]
+    weekday_map = {
+        i: {
+            "cn": names[i],
+            "next": current_time + timedelta(days=(7 - current_time.weekday() + i)),
+        }
+        for i in range(7)
+    }
+    return {
+        "datetime": current_time.strftime("%Y-%m-%d %H:%M:%S"),
+        "weekday": weekday_map[current_time.weekday()]["cn"],
+        "tomorrow": (current_time + timedelta(days=1)).strftime("%Y-%m-%d"),
+        "tomorrow_weekday": weekday_map[(current_time.weekday() + 1) % 7]["cn"],
+        "next_monday": weekday_map[0]["next"].strftime("%Y-%m-%d"),
+        "next_friday": weekday_map[4]["next"].strftime("%Y-%m-%d"),
+        "week_dates": "\n".join(
+            f"- {day['cn']}: {day['next'].strftime('%Y-%m-%d')}"
+            for day in weekday_map.values()
+        ),
+    }
+
+
+def legacy_prepare(llm) -> None:
+    """旧实现: 构建模板、处理链、时间变量并用正则解析输出"""
+    for template in (FORMAT_CONTENT_TEMPLATE, EXTRACT_TASKS_TEMPLATE):
+        prompt = ChatPromptTemplate.from_messages([("human", template)])
+        prompt | llm
+    legacy_time_context()
+    note = re.search(r'<json>\s*({[\s\S]*?})\s*</json>', SAMPLE_OUTPUT, re.DOTALL)
+    json.loads(note.group(1))
+    tasks = re.search(r'<tasks>\s*\[([\s\S]*?)\]\s*</tasks>', SAMPLE_OUTPUT, re.DOTALL)
+    json.loads(f"[{tasks.group(1)}]")
+
+
+def registry_prepare(chains: dict) -> None:
+    """新实现: 查找预编译的处理链，复用时间变量，按 LLMService 的解析路径解析输出"""
+    for name in ("format_content", "extract_tasks"):
+        chains[name]
+    get_time_context()
+    parse_note(repair_json(LLMService._tag_section(SAMPLE_OUTPUT, "json")))
+    parse_task_items(repair_json(LLMService._tag_section(SAMPLE_OUTPUT, "tasks")))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--number", type=int, default=2000, help="每轮调用次数")
+    parser.add_argument("--repeat", type=int, default=5, help="重复轮数 (取最小值)")
+    args = parser.parse_args()
+
+    llm = FakeListChatModel(responses=[SAMPLE_OUTPUT])
+    chains = {name: PROMPTS.get(name) | llm for name in PROMPTS.names()}
+
+    results = {}
+    for label, func in (
+        ("每次构建", lambda: legacy_prepare(llm)),
+        ("预编译", lambda: registry_prepare(chains)),
+    ):
+        best = min(timeit.repeat(func, number=args.number, repeat=args.repeat))
+        results[label] = best / args.number * 1e6
+        print(f"{label}: {results[label]:.1f} µs/次")
+
+    saved = results["每次构建"] - results["预编译"]
+    print(f"每次调用节省: {saved:.1f} µs ({saved / results['每次构建']:.0%})")
+
+
+if __name__ == "__main__":
+    main()
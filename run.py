@@ -6,6 +6,10 @@ from src.utils.logger import Logger
 from src.utils.config_manager import ConfigManager
 from src.platforms.telegram.telegram_bot import TelegramBot
 from src.services.dida365.auth.gateway.auth_gateway import DidaAuthGateway
+from src.services.notion.sync_engine import NotionSyncEngine
+from src.services.dida365.auth.token_refresher import TokenRefreshScheduler
+from src.services.dida365.dida_catalog import DidaCatalog
+from src.services.dida365.task_index import TaskIndex
 
 # 配置日志
 logger = Logger(__name__)
@@ -36,8 +40,21 @@ async def start_bot(bot: TelegramBot):
 async def main():
     """主函数"""
     try:
-        # 初始化配置
+        # 初始化配置 (进程内共享实例)，并监听系统配置变更
         config_manager = ConfigManager()
+        config_manager.start_watching()
+
+        # 后台增量同步 Notion 笔记
+        NotionSyncEngine().start()
+
+        # 在过期前提前刷新滴答清单令牌
+        TokenRefreshScheduler().start()
+
+        # 定期刷新滴答清单项目/标签缓存
+        DidaCatalog().start()
+
+        # 定期同步滴答清单未完成任务到本地索引
+        TaskIndex().start()
 
         # 创建服务实例
         bot = TelegramBot()
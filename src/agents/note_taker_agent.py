@@ -1,5 +1,8 @@
 import json
-from typing import Any, Dict, List, Optional, Sequence, TypedDict
+import asyncio
+import hashlib
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence, TypedDict
 from enum import Enum, auto
 from typing_extensions import Annotated
 import operator
@@ -16,7 +19,14 @@ from ..utils.logger import Logger
 from ..utils.config_manager import ConfigManager
 from ..services.notion.daily_notes import DailyNotes
 from ..services.llm.llm_service import LLMService
-from ..core.status import StatusManager, MessageStatus, ProcessStep
+from ..services.dida365.dida_catalog import DidaCatalog
+from ..core.status import (
+    StatusManager,
+    MessageStatus,
+    ProcessStep,
+    PlatformStatusUpdater,
+    StatusMessage,
+)
 
 from ..platforms.telegram.state_manager import TelegramStateManager
 
@@ -33,6 +43,22 @@ class ProcessStep(Enum):
     ERROR = auto()
 
 
+def merge_messages(left: Optional[str], right: Optional[str]) -> Optional[str]:
+    """合并并行分支写入的错误信息 (重复写入相同信息时保持不变)"""
+    if not right or right == left:
+        return left
+    if not left or left in right:
+        return right
+    if right in left:
+        return left
+    return f"{left}; {right}"
+
+
+def keep_last(left: Any, right: Any) -> Any:
+    """保留最后写入的值 (允许并行分支同时写入)"""
+    return right
+
+
 class AgentState(TypedDict):
     """智能体状态
 
@@ -48,6 +74,10 @@ class AgentState(TypedDict):
         content_type: 内容类型
         precheck_result: 预检结果
         tasks: 提取的任务列表
+        notion_page: 保存到 Notion 的页面
+        extract_error: 提取任务失败的原因
+
+    save_notion 和 extract_tasks 并行执行，两个分支都可能写入的字段使用 reducer 合并。
     """
 
     message: Message  # 原始消息
@@ -62,9 +92,11 @@ class AgentState(TypedDict):
     content_type: Optional[str] = None  # 内容类型
     precheck_result: Optional[Dict] = None  # 预检结果
     tasks: Optional[List[Dict]] = None  # 提取的任务列表
-    next: str  # 下一步操作
+    notion_page: Optional[Dict] = None  # 保存到 Notion 的页面
+    extract_error: Optional[str] = None  # 提取任务失败的原因
+    next: Annotated[str, keep_last]  # 下一步操作
     save_success: bool  # 保存是否成功
-    error_message: Optional[str]  # 错误信息
+    error_message: Annotated[Optional[str], merge_messages]  # 错误信息
     thread_id: str  # 线程ID
 
 
@@ -91,8 +123,11 @@ class NoteTakerAgent(BaseAgent):
         )
         self.daily_notes = DailyNotes()
         self.llm_service = LLMService()
+        self.dida_catalog = DidaCatalog()
         self.user_background = ""
         self.telegram_status_updater = telegram_status_updater
+        # 保存失败的状态消息: 并行分支不再写入进度，由 create_tasks 生成最终报告
+        self._halted_status_messages: set = set()
 
         # 配置日志记录器
         self.logger = logging.getLogger(__name__)
@@ -101,12 +136,15 @@ class NoteTakerAgent(BaseAgent):
         try:
             # 创建工作流图
             self.workflow = self._create_workflow()
+            # 合并分析工作流: 一次 LLM 调用完成格式化和任务提取
+            self.fused_workflow = self._create_workflow(fused=True)
 
             # 配置 checkpointer
             memory = MemorySaver()
 
             # 编译工作流 - 修复编译方式
             self.app = self.workflow.compile()  # 移除额外的编译参数
+            self.fused_app = self.fused_workflow.compile()
 
         except Exception as e:
             self.logger.error(f"工作流初始化失败: {e}", exc_info=True)
@@ -129,10 +167,8 @@ class NoteTakerAgent(BaseAgent):
         try:
             # 获取用户配置
             profile = self.config.get_user_value(user_id, "user.profile", default="")
-            dida_projects = self.config.get_user_value(
-                user_id, "dida.projects", default=[]
-            )
-            dida_tags = self.config.get_user_value(user_id, "dida.tags", default=[])
+            dida_projects = self.dida_catalog.get_projects(user_id)
+            dida_tags = self.dida_catalog.get_tags(user_id)
 
             # 构建JSON结构
             background_json = {
@@ -171,8 +207,15 @@ class NoteTakerAgent(BaseAgent):
         # 移除任务检查，始终进入 create_tasks
         return "create_tasks"
 
-    def _create_workflow(self) -> StateGraph:
-        """创建工作流程图"""
+    def _create_workflow(self, fused: bool = False) -> StateGraph:
+        """创建工作流程图
+
+        Args:
+            fused: 是否使用合并分析工作流 (format_content 和 extract_tasks 合并为一次 LLM 调用)
+        """
+        if fused:
+            return self._create_fused_workflow()
+
         workflow = StateGraph(AgentState)
 
         # 1. 定义处理节点
@@ -200,27 +243,74 @@ class NoteTakerAgent(BaseAgent):
         # URL处理到内容格式化
         workflow.add_edge("url_summary", "format_content")
 
-        # 内容格式化到保存Notion
-        workflow.add_edge("format_content", "save_notion")
+        # 内容格式化后并行保存Notion和提取任务 (任务提取不依赖保存结果)，格式化失败时结束
+        workflow.add_conditional_edges(
+            "format_content",
+            self._route_after_format,
+            ["save_notion", "extract_tasks", END],
+        )
+
+        # 两个分支都完成后创建任务并生成报告
+        workflow.add_edge(["save_notion", "extract_tasks"], "create_tasks")
+
+        # 创建任务到结束
+        workflow.add_edge("create_tasks", END)
 
-        # 保存后的任务处理路由
+        return workflow
+
+    def _create_fused_workflow(self) -> StateGraph:
+        """创建合并分析工作流程图
+
+        precheck → (url_summary) → analyze_content → save_notion → create_tasks
+        分析失败时在 analyze_content 之后结束。
+        """
+        workflow = StateGraph(AgentState)
+
+        workflow.add_node("precheck", self._content_precheck)  # 内容预检
+        workflow.add_node("url_summary", self._url_summary)  # URL处理
+        workflow.add_node("analyze_content", self._analyze_content)  # 格式化+提取任务
+        workflow.add_node("save_notion", self._save_to_notion)  # 保存到Notion
+        workflow.add_node("create_tasks", self._create_tasks)  # 创建任务
+
+        workflow.add_edge(START, "precheck")
         workflow.add_conditional_edges(
-            "save_notion",
-            lambda x: self._route_after_save(x),
+            "precheck",
+            lambda x: (
+                "url_summary"
+                if self._route_after_url_check(x) == "url_summary"
+                else "analyze_content"
+            ),
             {
-                "extract_tasks": "extract_tasks",  # 有文本内容，提取任务
-                "create_tasks": "create_tasks",  # 无文本内容，直接到创建任务生成报告
+                "url_summary": "url_summary",
+                "analyze_content": "analyze_content",
             },
         )
+        workflow.add_edge("url_summary", "analyze_content")
 
-        # 任务提取到创建任务（无条件）
-        workflow.add_edge("extract_tasks", "create_tasks")
+        # 分析失败时结束 (已展示失败原因)
+        workflow.add_conditional_edges(
+            "analyze_content",
+            lambda x: END if x.get("error_message") else "save_notion",
+            ["save_notion", END],
+        )
 
-        # 创建任务到结束
+        # 任务已在分析时提取，create_tasks 创建任务 (保存成功时) 并生成报告
+        workflow.add_edge("save_notion", "create_tasks")
         workflow.add_edge("create_tasks", END)
 
         return workflow
 
+    def _route_after_format(self, state: AgentState):
+        """格式化后的路由决策: 失败时结束，否则并行保存和提取任务"""
+        if state.get("error_message"):
+            return END
+        return ["save_notion", "extract_tasks"]
+
+    def _get_app(self):
+        """根据配置 openai.workflow 选择工作流 (classic / fused)"""
+        mode = self.config.get("openai", "workflow", default="classic")
+        return self.fused_app if mode == "fused" else self.app
+
     def _route_after_url_check(self, state: AgentState) -> str:
         """URL检查后的路由决策
 
@@ -237,23 +327,6 @@ class NoteTakerAgent(BaseAgent):
             return "url_summary"
         return "format_content"
 
-    def _route_after_save(self, state: AgentState) -> str:
-        """保存后的路由决策
-
-        Args:
-            state: 当前状态对象
-
-        Returns:
-            str: 下一个节点名称
-        """
-        precheck_result = state.get("precheck_result", {})
-        has_text = precheck_result.get("contains_text", False)
-        save_success = state.get("save_success", False)
-
-        if has_text and save_success:
-            return "extract_tasks"
-        return END
-
     async def _parallel_process(self, state: AgentState) -> Dict:
         """并行处理节点
 
@@ -312,7 +385,7 @@ class NoteTakerAgent(BaseAgent):
                 )
 
             # 分析内容
-            precheck_result = await self.llm_service.url_text_analyzer(text_content)
+            precheck_result = await self.llm_service.precheck(text_content)
             self.logger.debug(f"预检结: {precheck_result}")
 
             # 更新状态：预检完成
@@ -354,12 +427,74 @@ class NoteTakerAgent(BaseAgent):
             result = await self.llm_service.format_content(
                 content=text_content,
                 background=self.user_background,
+                on_progress=self._create_stream_reporter(
+                    state,
+                    step=ProcessStep.CONTENT_ANALYSIS,
+                    progress=0.5,
+                    title="正在分析内容...",
+                    emoji="🧠",
+                ),
             )
 
             return {**state, "format_content_result": result, "next": "save_notion"}
 
         except Exception as e:
             self.logger.error(f"格式化内容失败: {e}", exc_info=True)
+            await self._report_failure(state, ProcessStep.CONTENT_ANALYSIS, e)
+            return {**state, "error_message": str(e), "next": END}
+
+    async def _analyze_content(self, state: AgentState) -> Dict:
+        """合并分析节点: 一次 LLM 调用完成内容格式化和任务提取
+
+        Args:
+            state: 当前状态对象
+
+        Returns:
+            Dict: 更新后的状态对象 (format_content_result 和 tasks)
+        """
+        try:
+            message = state["message"]
+            status_message_id = state.get("status_message_id")
+            precheck_result = state.get("precheck_result") or {}
+
+            if self.telegram_status_updater and status_message_id:
+                await self._update_status(
+                    message=message,
+                    status=MessageStatus.PROCESSING,
+                    step=ProcessStep.CONTENT_ANALYSIS,
+                    progress=0.5,
+                    description="正在分析内容...",
+                    status_message_id=status_message_id,
+                    emoji="🧠",
+                )
+
+            profile, project_names = self._get_task_context()
+            result = await self.llm_service.analyze_content(
+                content=state["text_content"],
+                background=self.user_background,
+                profile=profile,
+                projects=project_names,
+                extract_tasks=precheck_result.get("contains_text", False),
+                on_progress=self._create_stream_reporter(
+                    state,
+                    step=ProcessStep.CONTENT_ANALYSIS,
+                    progress=0.5,
+                    title="正在分析内容...",
+                    emoji="🧠",
+                ),
+            )
+            tasks = result.pop("tasks", [])
+
+            return {
+                **state,
+                "format_content_result": result,
+                "tasks": tasks,
+                "next": "save_notion",
+            }
+
+        except Exception as e:
+            self.logger.error(f"合并分析失败: {e}", exc_info=True)
+            await self._report_failure(state, ProcessStep.CONTENT_ANALYSIS, e)
             return {**state, "error_message": str(e), "next": END}
 
     async def _save_to_notion(self, state: AgentState) -> Dict:
@@ -424,13 +559,8 @@ class NoteTakerAgent(BaseAgent):
                     emoji="✅",
                 )
 
-            # 返回更新后的状态
-            return {
-                **state,
-                "save_success": True,
-                "notion_page": entry,
-                "next": "extract_tasks",  # 继续执行任务提取
-            }
+            # 与 extract_tasks 并行执行，只返回本节点更新的字段
+            return {"save_success": True, "notion_page": entry}
 
         except Exception as e:
             error_msg = str(e)
@@ -439,8 +569,9 @@ class NoteTakerAgent(BaseAgent):
 
             self.logger.error(f"保存到 Notion 失败: {error_msg}", exc_info=True)
 
-            # 更新错误态
+            # 更新错误态，并行的任务提取不再覆盖
             if self.telegram_status_updater and status_message_id:
+                self._halted_status_messages.add(status_message_id)
                 await self._update_status(
                     message=message,
                     status=MessageStatus.FAILED,
@@ -452,19 +583,21 @@ class NoteTakerAgent(BaseAgent):
                 )
 
             # 返回错误状态
-            return {
-                **state,
-                "error_message": error_msg,
-                "save_success": False,
-                "next": END,
-            }
+            return {"error_message": error_msg, "save_success": False}
 
     async def _extract_tasks(self, state: AgentState) -> Dict:
-        """提取任务"""
+        """提取任务
+
+        与 save_notion 并行执行，只返回本节点更新的字段 (tasks / extract_error)。
+        """
         try:
             message = state["message"]
             status_message_id = state.get("status_message_id")
 
+            precheck_result = state.get("precheck_result") or {}
+            if not precheck_result.get("contains_text", False):
+                return {"tasks": []}
+
             if self.telegram_status_updater and status_message_id:
                 await self._update_status(
                     message=message,
@@ -478,53 +611,63 @@ class NoteTakerAgent(BaseAgent):
 
             self.logger.debug(f"提取任务背景: {self.user_background}")
             content = state["text_content"]
-
-            # 解析背景信息JSON
-            try:
-                background_data = json.loads(self.user_background)
-                profile = background_data.get("profile", "")
-                projects_data = background_data.get("dida", {}).get("projects", [])
-                project_names = str([p["name"] for p in projects_data if "name" in p])
-            except json.JSONDecodeError:
-                self.logger.warning("背景信息JSON解析失败，使用空值")
-                profile = ""
-                project_names = []
+            profile, project_names = self._get_task_context()
 
             tasks = await self.llm_service.extract_tasks(
                 content=content,
                 profile=profile,
                 projects=project_names,
+                on_progress=self._create_stream_reporter(
+                    state,
+                    step=ProcessStep.TASK_EXTRACTION,
+                    progress=0.95,
+                    title="正在提取任务...",
+                    emoji="📌",
+                ),
             )
 
-            # 修改这里：无论是否有任务，都进入 create_tasks
-            # 让 create_tasks 负责生成最终报告
-            return {**state, "tasks": tasks, "next": "create_tasks"}
+            # 无论是否有任务，都由 create_tasks 生成最终报告
+            return {"tasks": tasks}
 
         except Exception as e:
+            # 笔记可能已保存成功，失败原因在完成报告中展示
             self.logger.error(f"提取任务: {e}", exc_info=True)
-            if self.telegram_status_updater and status_message_id:
-                await self._update_status(
-                    message=message,
-                    status=MessageStatus.FAILED,
-                    step=ProcessStep.ERROR,
-                    progress=0.0,
-                    description=f"❌ 提取任务失败: {str(e)}",
-                    status_message_id=status_message_id,
-                    show_progress=False,
-                )
-            return {**state, "error_message": f"提取任务失败: {str(e)}", "next": END}
+            return {"tasks": [], "extract_error": str(e)}
+
+    def _get_task_context(self):
+        """从用户背景信息中解析任务提取所需的用户资料和项目名称列表
+
+        Returns:
+            Tuple[str, str]: (用户资料, 项目名称列表)
+        """
+        try:
+            background_data = json.loads(self.user_background)
+            profile = background_data.get("profile", "")
+            projects_data = background_data.get("dida", {}).get("projects", [])
+            project_names = str([p["name"] for p in projects_data if "name" in p])
+        except json.JSONDecodeError:
+            self.logger.warning("背景信息JSON解析失败，使用空值")
+            profile = ""
+            project_names = []
+        return profile, project_names
 
     async def _create_tasks(self, state: AgentState) -> Dict:
         """创建任务"""
         try:
             message = state["message"]
             status_message_id = state.get("status_message_id")
-            tasks = state.get("tasks", [])
+            tasks = state.get("tasks") or []
             user_id = message.metadata.user_id
             format_content_result = state.get("format_content_result", {})
+            results: List[str] = []
+
+            # 保存失败时不创建任务，报告中列出已提取的任务
+            save_failed = not state.get("save_success")
+            if save_failed:
+                results = ["⏸️"] * len(tasks)
 
             # 如果有任务，才进行任务创建
-            if tasks:
+            if tasks and not save_failed:
                 # 更新状态：开始创建任务
                 if self.telegram_status_updater and status_message_id:
                     await self._update_status(
@@ -539,13 +682,6 @@ class NoteTakerAgent(BaseAgent):
                 # 获取滴答清单服务
                 self.logger.info(f"正在获取滴答清单服务: user_id={user_id}")
 
-                # 检查用户配置
-                token_info = self.config.get_user_value(user_id, "dida.token")
-                self.logger.debug(f"用户token配置: {token_info}")
-
-                projects_config = self.config.get_user_value(user_id, "dida.projects")
-                self.logger.debug(f"用户项目配置: {projects_config}")
-
                 dida_service = self.config.get_service("dida365", user_id)
                 if not dida_service:
                     self.logger.error(f"获取滴答清单服务失败: user_id={user_id}")
@@ -555,76 +691,38 @@ class NoteTakerAgent(BaseAgent):
                         "next": END,
                     }
 
-                # 获取用户的项目列表配置
-                projects_config = self.config.get_user_value(
-                    user_id, "dida.projects", default=[]
+                # 并发创建任务 (每个用户的并发数和单个任务超时可配置)
+                concurrency = self.config.get_user_value(
+                    user_id,
+                    "dida.task_concurrency",
+                    default=self.config.get("dida", "task_concurrency", default=3),
+                )
+                timeout = self.config.get("dida", "task_timeout", default=15)
+                semaphore = asyncio.Semaphore(max(1, int(concurrency)))
+
+                # 来源消息标识: 同一对话中相同内容的消息 (重试或重发) 视为同一来源
+                source_message_id = self._get_source_message_id(
+                    message, state.get("text_content", "")
                 )
-                self.logger.debug(f"项目配置: {projects_config}")
-
-                # 创建项目名称到ID的映射
-                project_map = {p["name"]: p["id"] for p in projects_config}
-                self.logger.debug(f"项目映射: {project_map}")
-
-                results = []
-                for task in tasks:
-                    try:
-                        # 从task中提取所需字段
-                        project_name = task.get('projectId')
-                        # 根据项目名称获取项目ID
-                        project_id = project_map.get(project_name)
-                        if not project_id and project_name:
-                            self.logger.warning(f"找不到项目ID: {project_name}")
-                            results.append(f"⚠️ 找不到项目: {project_name}")
-                            continue
-
-                        title = task.get('title')
-                        content = task.get('content')
-                        due_date = (
-                            datetime.fromisoformat(
-                                task['dueDate'].replace('Z', '+00:00')
+
+                async def create_with_limit(task: Dict) -> str:
+                    async with semaphore:
+                        try:
+                            return await asyncio.wait_for(
+                                self._create_single_task(
+                                    dida_service, user_id, task, source_message_id
+                                ),
+                                timeout=timeout,
                             )
-                            if task.get('dueDate')
-                            else None
-                        )
-                        priority = task.get('priority', 0)
-                        is_all_day = task.get('isAllDay', False)
-                        reminders = task.get('reminders', [])
-                        desc = task.get('desc', '')
-
-                        # 创建任务
-                        created_task = await dida_service.add_task(
-                            user_id=user_id,
-                            title=title,
-                            content=content,
-                            project_id=project_id,  # 使用项目ID而不是名称
-                            desc=desc,
-                            due_date=due_date,
-                            priority=priority,
-                            is_all_day=is_all_day,
-                            reminders=reminders,
-                        )
-
-                        if created_task:
-                            # 构建任务描述
-                            task_desc = f"✅ 已创建任务: {title}"
-                            if project_name:
-                                task_desc += f"\n📁 项目: {project_name}"
-                            if due_date:
-                                formatted_date = due_date.strftime("%Y-%m-%d %H:%M")
-                                task_desc += f"\n⏰ 截止时间: {formatted_date}"
-                            if priority > 0:
-                                priority_map = {1: "低", 3: "中", 5: "高"}
-                                task_desc += (
-                                    f"\n🔥 优先级: {priority_map.get(priority, '普通')}"
-                                )
-
-                            results.append(task_desc)
-                            self.logger.info(f"成功创建任务: {title}")
-
-                    except Exception as e:
-                        error_msg = f"❌ 创建任务 '{title}' 失败: {str(e)}"
-                        results.append(error_msg)
-                        self.logger.error(f"创建任务失败: {str(e)}")
+                        except asyncio.TimeoutError:
+                            self.logger.error(f"创建任务超时: {task.get('title')}")
+                            return f"⌛ 创建任务 '{task.get('title')}' 超时"
+
+                # gather 保持结果与任务顺序一致
+                results = await asyncio.gather(
+                    *(create_with_limit(task) for task in tasks)
+                )
+                self.logger.info(f"任务创建完成: {len(results)} 个")
 
             # 无论是否有任务，都生成完成报告
             if self.telegram_status_updater and status_message_id:
@@ -632,11 +730,16 @@ class NoteTakerAgent(BaseAgent):
                 report_lines = []
 
                 # 添加顶部标题
-                report_lines.append("✨ 处理完成")
+                report_lines.append("⚠️ 处理未完成" if save_failed else "✨ 处理完成")
                 report_lines.append("")  # 空行分隔
 
                 # Notion保存信息
-                if state.get("save_success"):
+                if save_failed:
+                    report_lines.append("├─ 📝 笔记信息")
+                    report_lines.append(
+                        f"│  └─ ❌ 保存到 Notion 失败: {state.get('error_message') or '未知错误'}"
+                    )
+                else:
                     content_type = format_content_result.get("content_type", "未分类")
                     tags = format_content_result.get("tags", [])
                     title = format_content_result.get("title", "")
@@ -674,7 +777,11 @@ class NoteTakerAgent(BaseAgent):
                 # 任务信息（即使没有任务也显示）
                 if tasks:
                     report_lines.append("")  # 空行分隔
-                    report_lines.append(f"├─ 📋 任务信息 ({len(tasks)})")
+                    report_lines.append(
+                        f"├─ 📋 任务信息 ({len(tasks)}, 未创建)"
+                        if save_failed
+                        else f"├─ 📋 任务信息 ({len(tasks)})"
+                    )
                     # 添加每个任务的详细信息
                     for i, task in enumerate(tasks, 1):
                         title = task.get('title', '')
@@ -687,8 +794,9 @@ class NoteTakerAgent(BaseAgent):
                         prefix = "└─" if is_last_task else "├─"
                         detail_prefix = "   " if is_last_task else "│  "
 
-                        # 任务标题
-                        report_lines.append(f"│  {prefix} {i}. {title}")
+                        # 任务标题 (带创建结果标记)
+                        result_icon = results[i - 1].split(" ")[0] if results else ""
+                        report_lines.append(f"│  {prefix} {i}. {result_icon} {title}")
 
                         # 任务详细信息
                         details = []
@@ -723,6 +831,11 @@ class NoteTakerAgent(BaseAgent):
 
                         if not is_last_task:
                             report_lines.append("│")
+                elif state.get("extract_error"):
+                    report_lines.append("")  # 空行分隔
+                    report_lines.append(
+                        f"└─ ❌ 提取任务失败: {state['extract_error']}"
+                    )
                 else:
                     # 如果没有任务，也添加任务信息部分
                     report_lines.append("")  # 空行分隔
@@ -735,7 +848,9 @@ class NoteTakerAgent(BaseAgent):
                 # 更新状态消息为完成报告
                 await self._update_status(
                     message=message,
-                    status=MessageStatus.COMPLETED,
+                    status=(
+                        MessageStatus.FAILED if save_failed else MessageStatus.COMPLETED
+                    ),
                     step=ProcessStep.COMPLETED,
                     progress=None,
                     description="\n".join(report_lines).strip(),
@@ -761,6 +876,180 @@ class NoteTakerAgent(BaseAgent):
                     show_progress=False,
                 )
             return {**state, "error_message": str(e), "next": END}
+        finally:
+            self._halted_status_messages.discard(state.get("status_message_id"))
+
+    def _get_source_message_id(self, message: Message, text_content: str) -> str:
+        """计算来源消息标识 (平台 + 对话 + 内容摘要)"""
+        metadata = message.metadata
+        source = text_content or metadata.message_id
+        digest = hashlib.sha1(source.encode("utf-8")).hexdigest()[:16]
+        return f"{metadata.platform}:{metadata.chat_id}:{digest}"
+
+    async def _create_single_task(
+        self,
+        dida_service: Any,
+        user_id: str,
+        task: Dict,
+        source_message_id: Optional[str] = None,
+    ) -> str:
+        """创建单个任务
+
+        Args:
+            dida_service: 滴答清单服务
+            user_id: 用户ID
+            task: LLM 提取的任务
+            source_message_id: 来源消息标识 (用于去重)
+
+        Returns:
+            str: 创建结果描述
+        """
+        title = task.get('title')
+        try:
+            # 从task中提取所需字段
+            project_name = task.get('projectId')
+            # 根据项目名称获取项目ID (未知项目时按需刷新一次项目列表)
+            project_id = await self.dida_catalog.resolve_project(user_id, project_name)
+            if not project_id and project_name:
+                self.logger.warning(f"找不到项目ID: {project_name}")
+                return f"⚠️ 找不到项目: {project_name}"
+
+            content = task.get('content')
+            due_date = (
+                datetime.fromisoformat(task['dueDate'].replace('Z', '+00:00'))
+                if task.get('dueDate')
+                else None
+            )
+            priority = task.get('priority', 0)
+            is_all_day = task.get('isAllDay', False)
+            reminders = task.get('reminders', [])
+            desc = task.get('desc', '')
+
+            # 本地索引中已有同名同日期的未完成任务时不再创建
+            existing = dida_service.find_open_task(user_id, title, due_date)
+            if existing:
+                self.logger.info(f"已存在相同的未完成任务，跳过: {title}")
+                return f"♻️ 任务已存在: {title}"
+
+            # 创建任务
+            created_task = await dida_service.add_task(
+                user_id=user_id,
+                title=title,
+                content=content,
+                project_id=project_id,  # 使用项目ID而不是名称
+                desc=desc,
+                due_date=due_date,
+                priority=priority,
+                is_all_day=is_all_day,
+                reminders=reminders,
+                source_message_id=source_message_id,
+            )
+
+            if not created_task:
+                return f"❌ 创建任务 '{title}' 失败"
+
+            # 构建任务描述
+            if created_task.get("deduplicated"):
+                task_desc = f"♻️ 任务已存在: {title}"
+            else:
+                task_desc = f"✅ 已创建任务: {title}"
+            if project_name:
+                task_desc += f"\n📁 项目: {project_name}"
+            if due_date:
+                formatted_date = due_date.strftime("%Y-%m-%d %H:%M")
+                task_desc += f"\n⏰ 截止时间: {formatted_date}"
+            if priority > 0:
+                priority_map = {1: "低", 3: "中", 5: "高"}
+                task_desc += f"\n🔥 优先级: {priority_map.get(priority, '普通')}"
+
+            self.logger.info(f"成功创建任务: {title}")
+            return task_desc
+
+        except Exception as e:
+            self.logger.error(f"创建任务失败: {str(e)}")
+            return f"❌ 创建任务 '{title}' 失败: {str(e)}"
+
+    def _create_stream_reporter(
+        self,
+        state: AgentState,
+        step: ProcessStep,
+        progress: float,
+        title: str,
+        emoji: str = "",
+    ) -> Optional[Callable]:
+        """创建流式进度回调
+
+        LLM 流式输出时逐步展示已解析出的标题、标签和任务。
+        更新间隔不小于 openai.stream_update_interval 秒 (Telegram 对消息编辑有频率限制)，
+        内容没有变化时不更新。
+
+        Args:
+            state: 当前状态对象
+            step: 处理步骤
+            progress: 进度值(0-1)
+            title: 状态标题
+            emoji: 状态emoji
+
+        Returns:
+            Callable: 进度回调
+            None: 没有状态消息时不需要回调
+        """
+        message = state["message"]
+        status_message_id = state.get("status_message_id")
+        if not (self.telegram_status_updater and status_message_id):
+            return None
+
+        interval = self.config.get("openai", "stream_update_interval", default=1.5)
+        last = {"sent_at": 0.0, "text": None}
+
+        async def report(partial: Dict) -> None:
+            lines = [title]
+            if partial.get("title"):
+                lines.append(f"📌 {partial['title']}")
+            if partial.get("tags"):
+                lines.append("🏷️ " + " ".join(f"#{tag}" for tag in partial["tags"]))
+            if partial.get("tasks"):
+                tasks = partial["tasks"]
+                lines.append(f"📋 任务 ({len(tasks)}): " + "、".join(tasks))
+            text = "\n".join(lines)
+
+            now = time.monotonic()
+            if text == last["text"] or now - last["sent_at"] < interval:
+                return
+            last["sent_at"], last["text"] = now, text
+
+            await self._update_status(
+                message=message,
+                status=MessageStatus.PROCESSING,
+                step=step,
+                progress=progress,
+                description=text,
+                status_message_id=status_message_id,
+                emoji=emoji,
+            )
+
+        return report
+
+    async def _report_failure(
+        self, state: AgentState, step: ProcessStep, error: Exception
+    ) -> None:
+        """在状态消息中展示失败原因 (工作流提前结束时)"""
+        status_message_id = state.get("status_message_id")
+        if not (self.telegram_status_updater and status_message_id):
+            return
+
+        error_msg = str(error)
+        if ": " in error_msg:
+            error_msg = error_msg.split(": ")[-1]  # 简化错误消息
+        await self._update_status(
+            message=state["message"],
+            status=MessageStatus.FAILED,
+            step=step,
+            progress=0.0,
+            description=f"❌ 内容分析失败: {error_msg}",
+            status_message_id=status_message_id,
+            show_progress=False,
+        )
 
     async def _update_status(
         self,
@@ -789,6 +1078,13 @@ class NoteTakerAgent(BaseAgent):
             if not self.telegram_status_updater:
                 return None
 
+            # 保存失败后不再展示进度，避免覆盖错误信息
+            if (
+                status == MessageStatus.PROCESSING
+                and status_message_id in self._halted_status_messages
+            ):
+                return None
+
             # 构建状态文本
             status_text = self.telegram_status_updater.format_status_text(
                 progress=progress if show_progress else None,
@@ -798,9 +1094,21 @@ class NoteTakerAgent(BaseAgent):
             )
 
             if status_message_id:
-                success = await self.telegram_status_updater.update_status_message(
-                    message_id=status_message_id, text=status_text
-                )
+                if isinstance(self.telegram_status_updater, PlatformStatusUpdater):
+                    # 平台状态更新器按 StatusMessage 定位消息
+                    success = await self.telegram_status_updater.update_status_message(
+                        StatusMessage(
+                            message_id=str(status_message_id),
+                            platform=message.metadata.platform,
+                            chat_id=str(message.metadata.chat_id),
+                            text=status_text,
+                        ),
+                        status_text,
+                    )
+                else:
+                    success = await self.telegram_status_updater.update_status_message(
+                        message_id=status_message_id, text=status_text
+                    )
                 if not success:
                     self.logger.warning(f"更新状态消息失败: {status_message_id}")
                 return None
@@ -880,7 +1188,7 @@ class NoteTakerAgent(BaseAgent):
             }
 
             # 执行工作流
-            final_state = await self.app.ainvoke(state, config)
+            final_state = await self._get_app().ainvoke(state, config)
 
             self.logger.info("工作流执行完成")
 
@@ -4,6 +4,7 @@ from telegram.ext import ContextTypes
 from .base_settings import BaseSettingsHandler
 from .....services.dida365.dida_api import DidaAPI
 from .....services.dida365.dida_service import DidaService
+from .....services.dida365.dida_catalog import DidaCatalog
 from .....utils.exceptions import ServiceError
 from .....services.dida365.auth.auth_manager import DidaAuthManager
 import asyncio
@@ -664,6 +665,7 @@ class DidaSettingsHandler(BaseSettingsHandler):
 
             # 保存项目列表
             self.config_manager.set_user_config(user_id, "dida.projects", projects)
+            DidaCatalog().invalidate(user_id)
 
             # 更新最终状态
             await status_message.edit_text(
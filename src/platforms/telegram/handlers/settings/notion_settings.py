@@ -530,6 +530,9 @@ class NotionSettingsHandler(BaseSettingsHandler):
                 "🔄 正在验证数据库...\n\n" "• 验证访问权限..."
             )
 
+            # 重新设置数据库时丢弃缓存的属性结构
+            NotionAPI.invalidate_schema(database_id)
+
             # 验证数据库访问权限
             api = self._temp_apis.get(user_id)
             if not api:
@@ -672,6 +675,7 @@ class NotionSettingsHandler(BaseSettingsHandler):
 
             # 初始化数据库结构
             database_id = database["id"]
+            NotionAPI.invalidate_schema(database_id)
             await temp_api.init_database(database_id)
 
             # 保存数据库ID
@@ -22,6 +22,8 @@ from .state_manager import TelegramStateManager
 from ..telegram.utils.status_updater import TelegramStatusUpdater
 from ...agents.media_processor_agent import MediaProcessorAgent
 from ...agents.note_taker_agent import NoteTakerAgent
+from ...services.notion.notion_api import NotionAPI
+from ...services.dida365.dida_api import DidaAPI
 
 # 设置 httpx 日志级别为 WARNING 避免所有 GET 和 POST 请求被记录
 logging.getLogger("httpx").setLevel(logging.WARNING)
@@ -55,8 +57,14 @@ class TelegramBot:
 
         # 消息队列和工作器
         self.message_queue = asyncio.Queue()
-        self.max_workers = 10  # 最大并发处理数
-        self._workers = []  # 工作任务列表
+        self.max_workers = self.config.get(
+            "telegram", "max_workers", default=10
+        )  # 最大并发处理数
+        self._workers: List[asyncio.Task] = []  # 工作任务列表
+        self._idle_workers = set()  # 正在等待消息的工作任务
+
+        # 工作器数量配置变更时调整
+        self.config.subscribe(self._on_config_changed, sections=["telegram"])
 
         # 初始化处理器
         self.start_handler = TelegramStartHandler()
@@ -173,10 +181,7 @@ class TelegramBot:
             )
 
             # 启动消息处理工作器
-            self._workers = [
-                asyncio.create_task(self._message_worker())
-                for _ in range(self.max_workers)
-            ]
+            self._resize_workers(self.max_workers)
 
             self.logger.info("Telegram Bot 启动成功")
 
@@ -197,19 +202,64 @@ class TelegramBot:
             await self.app.stop()
             await self.app.shutdown()
 
+            # 关闭共享的 HTTP 连接池
+            await NotionAPI.aclose()
+            await DidaAPI.aclose()
+
             self.logger.info("Telegram Bot 已停止")
 
         except Exception as e:
             self.logger.error(f"停止 Telegram Bot 失败: {str(e)}")
             raise PlatformError(f"停止失败: {str(e)}")
 
+    def _resize_workers(self, count: int) -> None:
+        """调整工作器数量
+
+        扩容时创建新的工作器；缩容时优先取消空闲的工作器，
+        其余工作器在处理完当前消息后自行退出。
+        """
+        self._workers = [worker for worker in self._workers if not worker.done()]
+        self.max_workers = count
+
+        while len(self._workers) < count:
+            self._workers.append(asyncio.create_task(self._message_worker()))
+
+        for worker in list(self._idle_workers):
+            if len(self._workers) <= count:
+                break
+            worker.cancel()
+            self._idle_workers.discard(worker)
+            self._workers.remove(worker)
+
+        self.logger.info(f"消息处理工作器数量: {count}")
+
+    def _on_config_changed(self, changed: set, config: Dict) -> None:
+        """系统配置变更回调: 调整工作器数量"""
+        max_workers = config.get("telegram", {}).get("max_workers", 10)
+        if max_workers != self.max_workers and self._workers:
+            self._resize_workers(max_workers)
+
     async def _message_worker(self):
         """消息处理工作器"""
+        worker = asyncio.current_task()
         while True:
+            # 缩容时退出多余的工作器
+            alive = [w for w in self._workers if not w.done()]
+            if len(alive) > self.max_workers and worker in self._workers:
+                self._workers.remove(worker)
+                break
+
             try:
                 # 从队列获取消息
-                update, context = await self.message_queue.get()
+                self._idle_workers.add(worker)
+                try:
+                    update, context = await self.message_queue.get()
+                finally:
+                    self._idle_workers.discard(worker)
+            except asyncio.CancelledError:
+                break
 
+            try:
                 # 处理消息
                 await self._process_message(update, context)
 
@@ -101,12 +101,16 @@ class TelegramStatusUpdater(PlatformStatusUpdater):
             return False
 
     def format_status_text(
-        self, progress: float, step: str, description: str, emoji: str = "💫"
+        self,
+        progress: Optional[float],
+        step: str,
+        description: str,
+        emoji: str = "💫",
     ) -> str:
         """格式化状态文本
 
         Args:
-            progress: 进度(0-1)
+            progress: 进度(0-1)，None 时不显示进度条
             step: 步骤描述
             description: 详细描述
             emoji: 状态emoji
@@ -120,6 +124,11 @@ class TelegramStatusUpdater(PlatformStatusUpdater):
             for char in ('🔄', '🎤', '🔍', '🤖', '✨', '💾', '✅', '❌', '📋', '📌')
         )
 
+        # 如果描述已包含emoji，不添加新的emoji
+        desc = description if has_emoji else f"{emoji} {description}"
+        if progress is None:
+            return desc
+
         # 进度条样式
         bar_length = 20  # 增加进度条长度
         filled_length = int(progress * bar_length)
@@ -132,8 +141,5 @@ class TelegramStatusUpdater(PlatformStatusUpdater):
         # 百分比
         percent = f"{int(progress * 100):3d}%"
 
-        # 如果描述已包含emoji，不添加新的emoji
-        desc = description if has_emoji else f"{emoji} {description}"
-
         # 构建状态文本 (使用等宽字符对齐)
         return f"{desc}\n" f"{bar} {percent}"
@@ -1,6 +1,6 @@
 """滴答清单服务模块"""
 
-from .dida_api import DidaAPI
+from .dida_api import DidaAPI, DidaAPIError
 from .dida_service import DidaService
 
-__all__ = ['DidaAPI', 'DidaService']
+__all__ = ['DidaAPI', 'DidaAPIError', 'DidaService']
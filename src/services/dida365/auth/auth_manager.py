@@ -1,5 +1,5 @@
 from typing import Optional, Dict
-import requests
+import httpx
 from datetime import datetime
 import json
 from pathlib import Path
@@ -16,6 +16,9 @@ class DidaAuthManager:
     AUTH_URL = "https://dida365.com/oauth/authorize"
     TOKEN_URL = "https://dida365.com/oauth/token"
 
+    # OAuth 请求超时: 连接5秒，读取15秒
+    TIMEOUT = httpx.Timeout(15.0, connect=5.0)
+
     def __init__(self):
         """初始化认证管理器"""
         self.logger = Logger("dida.auth")
@@ -116,9 +119,8 @@ class DidaAuthManager:
             self.logger.debug(f"请求头: {headers}")
 
             # 发送请求
-            response = requests.post(
-                self.TOKEN_URL, data=data, headers=headers, verify=True
-            )
+            async with httpx.AsyncClient(timeout=self.TIMEOUT) as client:
+                response = await client.post(self.TOKEN_URL, data=data, headers=headers)
 
             # 记录响应
             self.logger.debug(f"响应状态码: {response.status_code}")
@@ -191,15 +193,24 @@ class DidaAuthManager:
                 "grant_type": "refresh_token",
             }
 
-            response = requests.post(
-                self.TOKEN_URL, data=data, headers={"Accept": "application/json"}
-            )
+            async with httpx.AsyncClient(timeout=self.TIMEOUT) as client:
+                response = await client.post(
+                    self.TOKEN_URL, data=data, headers={"Accept": "application/json"}
+                )
             response.raise_for_status()
 
             token_data = response.json()
+            # 服务端未返回新的刷新令牌时继续使用旧的
+            token_data.setdefault("refresh_token", refresh_token)
             token_info = TokenInfo.from_dict(token_data, user_id)
+
+            # 同时更新用户配置，DidaService 会据此重建客户端
+            self.config_manager.set_user_config(
+                user_id, "dida.token", token_info.to_dict()
+            )
             self._save_token(token_info)
 
+            self.logger.info(f"访问令牌已刷新: user_id={user_id}")
             return token_info
 
         except Exception as e:
@@ -209,6 +220,9 @@ class DidaAuthManager:
     async def get_valid_token(self, user_id: str) -> Optional[TokenInfo]:
         """获取有效的令牌信息
 
+        即将过期的令牌会在后台刷新，本次直接返回当前令牌；
+        只有已经过期时才等待刷新完成 (同一用户的并发刷新会合并)。
+
         Args:
             user_id: 用户ID
 
@@ -221,9 +235,15 @@ class DidaAuthManager:
             if not token_info:
                 return None
 
+            from .token_refresher import TokenRefreshScheduler
+
+            scheduler = TokenRefreshScheduler()
             if token_info.is_expired():
-                # 令牌过期，尝试刷新
-                token_info = await self.refresh_token(user_id, token_info.refresh_token)
+                # 令牌过期，等待刷新
+                token_info = await scheduler.refresh(user_id)
+            elif token_info.expires_within(scheduler.margin):
+                # 即将过期，后台刷新
+                scheduler.refresh_in_background(user_id)
 
             return token_info
 
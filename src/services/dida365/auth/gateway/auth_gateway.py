@@ -14,6 +14,7 @@ from telegram.ext import CallbackContext
 from telegram import Message, Chat
 import time
 from ...dida_api import DidaAPI
+from ...dida_catalog import DidaCatalog
 from ..models import TokenInfo
 
 
@@ -78,6 +79,7 @@ class DidaAuthGateway:
 
             # 保存项目列表
             self.config_manager.set_user_config(user_id, "dida.projects", projects)
+            DidaCatalog().invalidate(user_id)
             self.logger.info(f"已同步 {len(projects)} 个项目")
 
         except Exception as e:
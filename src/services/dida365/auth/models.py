@@ -26,9 +26,18 @@ class TokenInfo:
     user_id: str = ''  # 用户ID
     created_at: datetime = field(default_factory=datetime.now)  # 使用field设置默认值
 
+    @property
+    def expires_at(self) -> datetime:
+        """过期时间"""
+        return self.created_at + timedelta(seconds=self.expires_in)
+
     def is_expired(self) -> bool:
         """检查令牌是否过期"""
-        return datetime.now() > self.created_at + timedelta(seconds=self.expires_in)
+        return datetime.now() > self.expires_at
+
+    def expires_within(self, seconds: float) -> bool:
+        """检查令牌是否将在指定秒数内过期"""
+        return datetime.now() + timedelta(seconds=seconds) > self.expires_at
 
     def get_expires_info(self) -> str:
         """获取过期时间信息"""
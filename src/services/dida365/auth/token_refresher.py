@@ -0,0 +1,175 @@
+from typing import Dict, Optional
+import asyncio
+import time
+from ....utils.logger import Logger
+from ....utils.singleton import Singleton
+from ....utils.config_manager import ConfigManager
+from ....utils.exceptions import ServiceError
+from .auth_manager import DidaAuthManager
+from .models import TokenInfo
+
+
+class TokenRefreshScheduler(Singleton):
+    """滴答清单令牌刷新调度器
+
+    负责:
+    1. 后台定时检查所有用户的令牌，在过期前 margin 秒内提前刷新
+    2. 同一用户的并发刷新请求合并为一次 (single-flight)
+    3. 为消息处理提供非阻塞的后台刷新入口
+
+    进程内单例。
+    """
+
+    # 刷新失败后暂停自动刷新的时间(秒)，避免令牌失效时反复请求
+    FAILURE_COOLDOWN = 600
+
+    def __init__(self):
+        """初始化令牌刷新调度器"""
+        if self._initialized:
+            return
+
+        self.logger = Logger("dida.token_refresher")
+        self.config = ConfigManager()
+        self._auth_manager: Optional[DidaAuthManager] = None
+
+        # 正在进行的刷新: 用户ID -> 刷新任务
+        self._inflight: Dict[str, asyncio.Task] = {}
+        # 上次刷新失败的时间: 用户ID -> monotonic 时间
+        self._failed_at: Dict[str, float] = {}
+        self._task: Optional[asyncio.Task] = None
+
+        self._initialized = True
+
+    @property
+    def margin(self) -> float:
+        """提前刷新的时间窗口(秒)"""
+        return self.config.get("dida", "token_refresh_margin", default=600)
+
+    @property
+    def auth_manager(self) -> DidaAuthManager:
+        """认证管理器 (懒加载)"""
+        if self._auth_manager is None:
+            self._auth_manager = DidaAuthManager()
+        return self._auth_manager
+
+    def _get_token(self, user_id: str) -> Optional[TokenInfo]:
+        """从用户配置读取令牌信息"""
+        token_data = self.config.get_user_value(user_id, "dida.token")
+        if not token_data or not token_data.get("access_token"):
+            return None
+        return TokenInfo.from_dict(token_data, user_id)
+
+    async def _do_refresh(self, user_id: str) -> TokenInfo:
+        """执行刷新"""
+        token_info = self._get_token(user_id)
+        if not token_info or not token_info.refresh_token:
+            raise ServiceError("没有可用的刷新令牌，请重新授权")
+        try:
+            token_info = await self.auth_manager.refresh_token(
+                user_id, token_info.refresh_token
+            )
+        except Exception:
+            self._failed_at[user_id] = time.monotonic()
+            raise
+        self._failed_at.pop(user_id, None)
+        return token_info
+
+    async def refresh(self, user_id: str) -> TokenInfo:
+        """刷新用户令牌，同一用户同时只会发起一次刷新请求
+
+        Args:
+            user_id: 用户ID
+
+        Returns:
+            TokenInfo: 新的令牌信息
+
+        Raises:
+            ServiceError: 刷新失败
+        """
+        user_id = str(user_id)
+        task = self._inflight.get(user_id)
+        if task is None or task.done():
+            task = asyncio.create_task(self._do_refresh(user_id))
+            self._inflight[user_id] = task
+            task.add_done_callback(
+                lambda t: self._inflight.pop(user_id, None)
+                if self._inflight.get(user_id) is t
+                else None
+            )
+        # shield: 某个等待方被取消时不影响其他等待方
+        return await asyncio.shield(task)
+
+    def refresh_in_background(self, user_id: str) -> None:
+        """在后台刷新令牌，不等待结果"""
+
+        async def runner():
+            try:
+                await self.refresh(user_id)
+            except Exception as e:
+                self.logger.error(f"后台刷新令牌失败: user_id={user_id}, {str(e)}")
+
+        user_id = str(user_id)
+        failed_at = self._failed_at.get(user_id)
+        if failed_at is not None and time.monotonic() - failed_at < self.FAILURE_COOLDOWN:
+            return
+        if user_id not in self._inflight:
+            asyncio.create_task(runner())
+
+    async def refresh_due(self) -> int:
+        """刷新所有即将过期的令牌
+
+        Returns:
+            int: 刷新成功的数量
+        """
+        due = []
+        now = time.monotonic()
+        for user_id, user_config in self.config.get_all_user_configs().items():
+            failed_at = self._failed_at.get(user_id)
+            if failed_at is not None and now - failed_at < self.FAILURE_COOLDOWN:
+                continue
+
+            token_data = (user_config.get("dida") or {}).get("token")
+            if not token_data or not token_data.get("refresh_token"):
+                continue
+            try:
+                token_info = TokenInfo.from_dict(dict(token_data), user_id)
+            except Exception:
+                continue
+            if token_info.expires_within(self.margin):
+                due.append(user_id)
+
+        results = await asyncio.gather(
+            *(self.refresh(user_id) for user_id in due), return_exceptions=True
+        )
+        for user_id, result in zip(due, results):
+            if isinstance(result, Exception):
+                self.logger.error(f"刷新令牌失败: user_id={user_id}, {str(result)}")
+        return sum(1 for result in results if not isinstance(result, Exception))
+
+    async def run(self, interval: Optional[float] = None) -> None:
+        """后台定时检查并刷新令牌
+
+        Args:
+            interval: 检查间隔(秒)，默认读取 dida.token_check_interval，未配置时为60秒
+        """
+        interval = interval or self.config.get(
+            "dida", "token_check_interval", default=60
+        )
+        self.logger.info(f"开始后台刷新滴答清单令牌 (间隔 {interval} 秒)")
+        while True:
+            try:
+                await self.refresh_due()
+                await asyncio.sleep(interval)
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                self.logger.error(f"后台刷新令牌出错: {str(e)}")
+                await asyncio.sleep(interval)
+
+    def start(self, interval: Optional[float] = None) -> asyncio.Task:
+        """在当前事件循环中启动后台刷新任务 (重复调用返回同一任务)"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(
+                self.run(interval), name="dida_token_refresher"
+            )
+        return self._task
@@ -1,11 +1,23 @@
 from typing import Dict, List, Optional, Any
 from datetime import datetime
-import requests
+import httpx
 from ...utils.logger import Logger
 from ...utils.exceptions import ServiceError
 from .dida_models import Task, ChecklistItem, TaskPriority, TaskStatus
 
 
+class DidaAPIError(ServiceError):
+    """滴答清单 API 请求错误
+
+    Attributes:
+        status: HTTP 状态码 (网络错误时为 None)
+    """
+
+    def __init__(self, message: str, status: Optional[int] = None):
+        super().__init__(message)
+        self.status = status
+
+
 class DidaAPI:
     """滴答清单 API 接口封装
 
@@ -13,26 +25,104 @@ class DidaAPI:
     1. API 调用的基础封装
     2. 错误处理和转换
     3. 数据格式转换
+
+    所有实例共享一个异步 HTTP 连接池 (httpx.AsyncClient)，
+    请求不会阻塞事件循环，keepalive 连接在不同用户之间复用。
     """
 
-    BASE_URL = "https://api.dida365.com/open/v1"
+    BASE_URL = "https://api.dida365.com/open/v1/"
+
+    # 默认超时: 连接5秒，读取15秒
+    DEFAULT_TIMEOUT = httpx.Timeout(15.0, connect=5.0)
+
+    # 进程级共享连接池
+    _http_client: Optional[httpx.AsyncClient] = None
 
-    def __init__(self, token: str):
+    def __init__(self, token: str, timeout: Optional[httpx.Timeout] = None):
         """初始化滴答清单 API 客户端
 
         Args:
             token: API访问令牌
+            timeout: 请求超时配置，默认使用 DEFAULT_TIMEOUT
         """
         self.logger = Logger("dida.api")
         self.token = token
-        self.session = requests.Session()
-        self.session.headers.update(
-            {
-                "Authorization": f"Bearer {token}",
-                "Content-Type": "application/json",
-                "User-Agent": "Mozilla/5.0",
-            }
-        )
+        self.timeout = timeout or self.DEFAULT_TIMEOUT
+        self._headers = {
+            "Authorization": f"Bearer {token}",
+            "Content-Type": "application/json",
+            "User-Agent": "Mozilla/5.0",
+        }
+
+    @classmethod
+    def _get_http_client(cls) -> httpx.AsyncClient:
+        """获取共享的 HTTP 客户端 (懒加载)"""
+        if cls._http_client is None or cls._http_client.is_closed:
+            cls._http_client = httpx.AsyncClient(
+                base_url=cls.BASE_URL,
+                timeout=cls.DEFAULT_TIMEOUT,
+                limits=httpx.Limits(
+                    max_connections=100,
+                    max_keepalive_connections=20,
+                    keepalive_expiry=60.0,
+                ),
+            )
+        return cls._http_client
+
+    @classmethod
+    async def aclose(cls) -> None:
+        """关闭共享连接池"""
+        if cls._http_client is not None and not cls._http_client.is_closed:
+            await cls._http_client.aclose()
+        cls._http_client = None
+
+    async def _request(
+        self,
+        method: str,
+        path: str,
+        body: Optional[Dict] = None,
+        params: Optional[Dict] = None,
+    ) -> Any:
+        """发送 API 请求
+
+        Args:
+            method: HTTP 方法
+            path: 相对路径，例如 "project"
+            body: JSON 请求体
+            params: 查询参数
+
+        Returns:
+            Any: 响应 JSON (响应体为空时返回空字典)
+
+        Raises:
+            DidaAPIError: 请求失败
+        """
+        client = self._get_http_client()
+        try:
+            response = await client.request(
+                method,
+                path,
+                json=body,
+                params=params,
+                headers=self._headers,
+                timeout=self.timeout,
+            )
+        except httpx.TimeoutException as e:
+            raise DidaAPIError("滴答清单 API 请求超时") from e
+        except httpx.HTTPError as e:
+            raise DidaAPIError(f"滴答清单 API 网络错误: {str(e)}") from e
+
+        self.logger.debug(f"{method} {path} -> {response.status_code}")
+
+        if response.is_error:
+            raise DidaAPIError(
+                f"HTTP {response.status_code}: {response.text[:200]}",
+                status=response.status_code,
+            )
+
+        if not response.content:
+            return {}
+        return response.json()
 
     async def get_projects(self) -> List[Dict]:
         """获取项目列表
@@ -46,9 +136,7 @@ class DidaAPI:
             ServiceError: API调用失败
         """
         try:
-            response = self.session.get(f"{self.BASE_URL}/project")
-            response.raise_for_status()
-            projects = response.json()
+            projects = await self._request("GET", "project")
 
             # 提取需要的字段并按sortOrder排序
             sorted_projects = sorted(projects, key=lambda x: x.get('sortOrder', 0))
@@ -83,9 +171,7 @@ class DidaAPI:
             if color:
                 data["color"] = color
 
-            response = self.session.post(f"{self.BASE_URL}/projects", json=data)
-            response.raise_for_status()
-            return response.json()
+            return await self._request("POST", "projects", body=data)
         except Exception as e:
             self.logger.error(f"创建项目失败: {str(e)}")
             raise ServiceError(f"创建项目失败: {str(e)}")
@@ -116,15 +202,13 @@ class DidaAPI:
             if project_id:
                 params["projectId"] = project_id
             if completed is not None:
-                params["completed"] = completed
+                params["completed"] = str(completed).lower()
             if start_date:
                 params["startDate"] = start_date.isoformat()
             if end_date:
                 params["endDate"] = end_date.isoformat()
 
-            response = self.session.get(f"{self.BASE_URL}/tasks", params=params)
-            response.raise_for_status()
-            return response.json()
+            return await self._request("GET", "tasks", params=params)
         except Exception as e:
             self.logger.error(f"获取任务列表失败: {str(e)}")
             raise ServiceError(f"获取任务列表失败: {str(e)}")
@@ -156,23 +240,16 @@ class DidaAPI:
             self.logger.info(f"开始创建任务: {task_data.get('title', '')}")
             self.logger.debug(f"任务数据: {task_data}")
 
-            # 修正API路径，直接使用/task
-            response = self.session.post(f"{self.BASE_URL}/task", json=task_data)
-
-            self.logger.debug(f"请求URL: {self.BASE_URL}/task")
-            self.logger.debug(f"响应状态码: {response.status_code}")
-            self.logger.debug(f"响应内容: {response.text[:1000]}")  # 只记录前1000个字符
-
-            response.raise_for_status()
-            result = response.json()
+            result = await self._request("POST", "task", body=task_data)
+            self.logger.debug(f"响应内容: {str(result)[:1000]}")  # 只记录前1000个字符
 
             self.logger.info(f"任务创建成功: {result.get('id', '')}")
             return result
 
-        except requests.exceptions.RequestException as e:
+        except DidaAPIError as e:
             error_msg = f"API请求失败: {str(e)}"
             self.logger.error(error_msg, exc_info=True)
-            raise ServiceError(error_msg)
+            raise
         except ValueError as e:
             error_msg = f"解析响应失败: {str(e)}"
             self.logger.error(error_msg, exc_info=True)
@@ -195,11 +272,8 @@ class DidaAPI:
             ServiceError: API调用失败
         """
         try:
-            response = self.session.post(
-                f"{self.BASE_URL}/open/v1/task/{task.id}", json=task.to_dict()
-            )
-            response.raise_for_status()
-            return Task.from_dict(response.json())
+            result = await self._request("POST", f"task/{task.id}", body=task.to_dict())
+            return Task.from_dict(result)
         except Exception as e:
             self.logger.error(f"更新任务失败: {str(e)}")
             raise ServiceError(f"更新任务失败: {str(e)}")
@@ -217,9 +291,7 @@ class DidaAPI:
             ServiceError: API调用失败
         """
         try:
-            response = self.session.post(f"{self.BASE_URL}/tasks/{task_id}/complete")
-            response.raise_for_status()
-            return response.json()
+            return await self._request("POST", f"tasks/{task_id}/complete")
         except Exception as e:
             self.logger.error(f"完成任务失败: {str(e)}")
             raise ServiceError(f"完成任务失败: {str(e)}")
@@ -234,9 +306,7 @@ class DidaAPI:
             ServiceError: API调用失败
         """
         try:
-            response = self.session.get(f"{self.BASE_URL}/tags")
-            response.raise_for_status()
-            return response.json()
+            return await self._request("GET", "tags")
         except Exception as e:
             self.logger.error(f"获取标签列表失败: {str(e)}")
             raise ServiceError(f"获取标签列表失败: {str(e)}")
@@ -255,11 +325,10 @@ class DidaAPI:
             ServiceError: API调用失败
         """
         try:
-            response = self.session.get(
-                f"{self.BASE_URL}/open/v1/project/{project_id}/task/{task_id}"
+            result = await self._request(
+                "GET", f"project/{project_id}/task/{task_id}"
             )
-            response.raise_for_status()
-            return Task.from_dict(response.json())
+            return Task.from_dict(result)
         except Exception as e:
             self.logger.error(f"获取任务详情失败: {str(e)}")
             raise ServiceError(f"获取任务详情失败: {str(e)}")
@@ -0,0 +1,228 @@
+from typing import Dict, List, Optional
+import asyncio
+import time
+from ...utils.logger import Logger
+from ...utils.singleton import Singleton
+from ...utils.config_manager import ConfigManager
+
+
+class DidaCatalog(Singleton):
+    """滴答清单项目/标签目录缓存
+
+    负责:
+    1. 按用户缓存项目和标签列表，并预建项目名称 -> ID 索引
+    2. 缓存过期后在后台异步刷新，读取时不等待网络请求
+    3. 遇到未知项目名称时按需刷新一次再查找
+    4. 刷新结果写回用户配置 (dida.projects / dida.tags)
+
+    进程内单例。首次读取时使用用户配置中保存的列表。
+    """
+
+    # 未知项目触发按需刷新的最小间隔(秒)，避免同一个错误名称反复请求
+    MISS_REFRESH_INTERVAL = 60
+
+    def __init__(self):
+        """初始化目录缓存"""
+        if self._initialized:
+            return
+
+        self.logger = Logger("dida.catalog")
+        self.config = ConfigManager()
+
+        # 用户ID -> {"projects", "tags", "project_index", "fetched_at"}
+        self._entries: Dict[str, Dict] = {}
+        self._refreshing: Dict[str, asyncio.Task] = {}
+        self._task: Optional[asyncio.Task] = None
+
+        self._initialized = True
+
+    @property
+    def ttl(self) -> float:
+        """目录缓存有效期(秒)"""
+        return self.config.get("dida", "catalog_ttl", default=3600)
+
+    @staticmethod
+    def _normalize(name: str) -> str:
+        """项目名称规范化 (忽略首尾空白和大小写)"""
+        return name.strip().casefold()
+
+    def _build_entry(
+        self, projects: List[Dict], tags: List, fetched_at: Optional[float]
+    ) -> Dict:
+        """构建缓存条目"""
+        tag_names = [tag.get("name") if isinstance(tag, dict) else tag for tag in tags]
+        return {
+            "projects": projects,
+            "tags": [tag for tag in tag_names if tag],
+            "project_index": {
+                self._normalize(p["name"]): p["id"]
+                for p in projects
+                if p.get("name") and p.get("id")
+            },
+            "fetched_at": fetched_at,
+        }
+
+    def _get_entry(self, user_id: str) -> Dict:
+        """获取缓存条目，不存在时从用户配置加载；过期时触发后台刷新"""
+        user_id = str(user_id)
+        entry = self._entries.get(user_id)
+        if entry is None:
+            entry = self._build_entry(
+                self.config.get_user_value(user_id, "dida.projects", default=[]) or [],
+                self.config.get_user_value(user_id, "dida.tags", default=[]) or [],
+                fetched_at=None,
+            )
+            self._entries[user_id] = entry
+
+        fetched_at = entry["fetched_at"]
+        if fetched_at is None or time.monotonic() - fetched_at > self.ttl:
+            self.refresh_in_background(user_id)
+        return entry
+
+    def is_fetched(self, user_id: str) -> bool:
+        """项目列表是否已从 API 获取 (而不是只有用户配置中保存的列表)"""
+        entry = self._entries.get(str(user_id))
+        return entry is not None and entry["fetched_at"] is not None
+
+    def get_projects(self, user_id: str) -> List[Dict]:
+        """获取项目列表 (id, name)"""
+        return list(self._get_entry(user_id)["projects"])
+
+    def get_tags(self, user_id: str) -> List[str]:
+        """获取标签名称列表"""
+        return list(self._get_entry(user_id)["tags"])
+
+    async def resolve_project(self, user_id: str, name: str) -> Optional[str]:
+        """根据项目名称查找项目ID
+
+        缓存中找不到时按需刷新一次 (距上次刷新不足 MISS_REFRESH_INTERVAL 秒时不刷新)。
+
+        Args:
+            user_id: 用户ID
+            name: 项目名称
+
+        Returns:
+            str: 项目ID
+            None: 项目不存在
+        """
+        if not name:
+            return None
+
+        key = self._normalize(name)
+        entry = self._get_entry(user_id)
+        project_id = entry["project_index"].get(key)
+        if project_id:
+            return project_id
+
+        fetched_at = entry["fetched_at"]
+        if fetched_at is not None and time.monotonic() - fetched_at < self.MISS_REFRESH_INTERVAL:
+            return None
+
+        self.logger.info(f"未知项目 {name}，刷新项目列表: user_id={user_id}")
+        try:
+            entry = await self.refresh(user_id)
+        except Exception as e:
+            self.logger.error(f"刷新项目列表失败: {str(e)}")
+            return None
+        return entry["project_index"].get(key)
+
+    async def _do_refresh(self, user_id: str) -> Dict:
+        """从滴答清单获取项目和标签列表"""
+        from .dida_service import DidaService
+
+        api = DidaService().get_api(user_id)
+        projects, tags = await asyncio.gather(
+            api.get_projects(), api.get_tags(), return_exceptions=True
+        )
+        if isinstance(projects, Exception):
+            raise projects
+
+        if isinstance(tags, Exception):
+            # 标签获取失败时保留原有标签
+            self.logger.warning(f"获取标签列表失败，保留缓存: {str(tags)}")
+            previous = self._entries.get(user_id)
+            tags = previous["tags"] if previous else []
+
+        entry = self._build_entry(projects, tags, fetched_at=time.monotonic())
+        self._entries[user_id] = entry
+
+        self.config.set_user_config(user_id, "dida.projects", projects)
+        self.config.set_user_config(user_id, "dida.tags", entry["tags"])
+        self.logger.info(
+            f"已刷新项目/标签: user_id={user_id}, "
+            f"{len(projects)} 个项目, {len(entry['tags'])} 个标签"
+        )
+        return entry
+
+    async def refresh(self, user_id: str) -> Dict:
+        """刷新用户的目录缓存 (同一用户的并发刷新合并为一次)
+
+        Returns:
+            Dict: 新的缓存条目
+        """
+        user_id = str(user_id)
+        task = self._refreshing.get(user_id)
+        if task is None or task.done():
+            task = asyncio.create_task(self._do_refresh(user_id))
+            self._refreshing[user_id] = task
+            task.add_done_callback(
+                lambda t: self._refreshing.pop(user_id, None)
+                if self._refreshing.get(user_id) is t
+                else None
+            )
+        return await asyncio.shield(task)
+
+    def refresh_in_background(self, user_id: str) -> None:
+        """在后台刷新目录缓存，不等待结果"""
+        user_id = str(user_id)
+        if user_id in self._refreshing:
+            return
+
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return
+
+        async def runner():
+            try:
+                await self.refresh(user_id)
+            except Exception as e:
+                # 刷新失败时推迟下次尝试，继续使用旧数据
+                entry = self._entries.get(user_id)
+                if entry is not None:
+                    entry["fetched_at"] = time.monotonic()
+                self.logger.error(f"后台刷新项目/标签失败: user_id={user_id}, {str(e)}")
+
+        asyncio.create_task(runner())
+
+    def invalidate(self, user_id: str) -> None:
+        """丢弃用户的目录缓存，下次读取时从用户配置重新加载"""
+        self._entries.pop(str(user_id), None)
+
+    async def run(self, interval: Optional[float] = None) -> None:
+        """后台定时刷新已授权用户的目录缓存
+
+        Args:
+            interval: 检查间隔(秒)，默认读取 dida.catalog_refresh_interval，未配置时为600秒
+        """
+        interval = interval or self.config.get(
+            "dida", "catalog_refresh_interval", default=600
+        )
+        self.logger.info(f"开始后台刷新滴答清单项目/标签 (间隔 {interval} 秒)")
+        while True:
+            try:
+                for user_id, user_config in self.config.get_all_user_configs().items():
+                    if (user_config.get("dida") or {}).get("token"):
+                        self._get_entry(user_id)  # 过期时触发后台刷新
+                await asyncio.sleep(interval)
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                self.logger.error(f"后台刷新项目/标签出错: {str(e)}")
+                await asyncio.sleep(interval)
+
+    def start(self, interval: Optional[float] = None) -> asyncio.Task:
+        """在当前事件循环中启动后台刷新任务 (重复调用返回同一任务)"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self.run(interval), name="dida_catalog")
+        return self._task
@@ -1,9 +1,17 @@
 from typing import Dict, List, Optional, Any
-from datetime import datetime
+from datetime import datetime, timedelta
+import asyncio
 from .dida_api import DidaAPI
 from ...utils.logger import Logger
 from ...utils.config_manager import ConfigManager
 from ...utils.exceptions import ServiceError
+from ...utils.cache import LRUCache
+from .auth.models import TokenInfo
+from .auth.token_refresher import TokenRefreshScheduler
+from .task_ledger import TaskLedger
+from .task_index import TaskIndex
+from .dida_models import Task
+from .dida_catalog import DidaCatalog
 
 
 class DidaService:
@@ -16,14 +24,32 @@ class DidaService:
     4. 错误处理
     """
 
+    # 进程级 API 客户端池: 用户ID -> (access_token, API实例)
+    # 按最近使用淘汰，空闲超过 ttl 秒的客户端会被回收
+    _clients: Optional[LRUCache] = None
+
+    # 正在创建的任务: 去重键 -> 锁 (同一任务的并发请求排队后命中账本)
+    _creating: Dict[str, asyncio.Lock] = {}
+    # 去重键 -> 持有或等待该锁的请求数，归零时才移除锁
+    _creating_refs: Dict[str, int] = {}
+    # 调用方取消后仍在完成的创建任务 (保留引用，避免被回收)
+    _pending_creates: set = set()
+
     def __init__(self):
         """初始化滴答清单服务"""
         self.logger = Logger("dida.service")
         self.config_manager = ConfigManager()
-        self._apis: Dict[str, DidaAPI] = {}  # 用户ID -> API实例的映射
+        self.ledger = TaskLedger()
+        self.task_index = TaskIndex()
 
-    def _get_api(self, user_id: str) -> DidaAPI:
-        """获取用户的 API 实例
+        if DidaService._clients is None:
+            DidaService._clients = LRUCache(
+                maxsize=self.config_manager.get("dida", "client_pool_size", default=256),
+                ttl=self.config_manager.get("dida", "client_idle_ttl", default=1800),
+            )
+
+    def get_api(self, user_id: str) -> DidaAPI:
+        """获取用户的 API 实例 (复用客户端池，目录缓存和任务索引也通过此方法调用 API)
 
         Args:
             user_id: 用户ID
@@ -35,20 +61,35 @@ class DidaService:
             ServiceError: 配置无效
         """
         try:
-            if user_id not in self._apis:
-                token_info = self.config_manager.get_user_value(user_id, "dida.token")
-                if not token_info:
-                    raise ServiceError("未配置滴答清单访问令牌")
+            token_info = self.config_manager.get_user_value(user_id, "dida.token")
+            if not token_info:
+                raise ServiceError("未配置滴答清单访问令牌")
+
+            # 获取access_token
+            access_token = token_info.get('access_token')
+            if not access_token:
+                raise ServiceError("无效的访问令牌")
 
-                # 获取access_token
-                access_token = token_info.get('access_token')
-                if not access_token:
-                    raise ServiceError("无效的访问令牌")
+            # 令牌即将过期时在后台刷新，本次仍使用当前令牌
+            refresher = TokenRefreshScheduler()
+            if token_info.get('refresh_token') and TokenInfo.from_dict(
+                token_info, user_id
+            ).expires_within(refresher.margin):
+                refresher.refresh_in_background(user_id)
 
+            entry = self._clients.get(user_id)
+            if entry is not None and entry[0] == access_token:
+                api = entry[1]
+            else:
+                # 首次使用或令牌已刷新，重新绑定客户端
+                if entry is not None:
+                    self.logger.info(f"访问令牌已更新，重建API实例: user_id={user_id}")
                 self.logger.debug(f"获取到access_token: {access_token[:10]}...")
-                self._apis[user_id] = DidaAPI(access_token)
+                api = DidaAPI(access_token)
 
-            return self._apis[user_id]
+            # 每次使用都重新写入，刷新最近使用时间和空闲计时
+            self._clients.set(user_id, (access_token, api))
+            return api
 
         except Exception as e:
             self.logger.error(f"获取API实例失败: {str(e)}")
@@ -65,9 +106,13 @@ class DidaService:
         priority: Optional[int] = None,
         is_all_day: bool = False,
         reminders: Optional[List[str]] = None,
+        source_message_id: Optional[str] = None,
     ) -> Dict:
         """添加任务
 
+        相同用户、标题、截止日期和来源消息的任务在去重窗口内只创建一次，
+        重复调用直接返回已创建的任务 (带 deduplicated 标记)。
+
         Args:
             user_id: 用户ID
             title: 任务标题
@@ -78,6 +123,7 @@ class DidaService:
             priority: 优先级 (0-5)
             is_all_day: 是否全天任务
             reminders: 提醒规则列表
+            source_message_id: 来源消息标识
 
         Returns:
             Dict: 创建的任务信息
@@ -85,8 +131,113 @@ class DidaService:
         Raises:
             ServiceError: 添加失败
         """
+        dedupe_key = TaskLedger.make_key(user_id, title, due_date, source_message_id)
+        # 调用方超时取消时 API 请求可能已经成功: 创建和记账在独立任务中完成，
+        # 不随调用方取消，之后的重试可从账本命中已创建的任务
+        task = asyncio.ensure_future(
+            self._add_task_once(
+                dedupe_key,
+                user_id=user_id,
+                title=title,
+                content=content,
+                project_id=project_id,
+                desc=desc,
+                due_date=due_date,
+                priority=priority,
+                is_all_day=is_all_day,
+                reminders=reminders,
+                source_message_id=source_message_id,
+            )
+        )
+        self._pending_creates.add(task)
+        task.add_done_callback(self._on_create_done)
+        return await asyncio.shield(task)
+
+    def _on_create_done(self, task: "asyncio.Future") -> None:
+        """后台创建任务结束: 释放引用，调用方已取消时记录结果"""
+        self._pending_creates.discard(task)
+        if task.cancelled():
+            return
+        error = task.exception()
+        if error:
+            # 调用方未取消时异常已由其处理，这里只是取出异常避免 asyncio 告警
+            self.logger.debug(f"后台创建任务失败: {str(error)}")
+
+    async def _add_task_once(
+        self,
+        dedupe_key: str,
+        user_id: str,
+        title: str,
+        content: Optional[str] = None,
+        project_id: Optional[str] = None,
+        desc: Optional[str] = None,
+        due_date: Optional[datetime] = None,
+        priority: Optional[int] = None,
+        is_all_day: bool = False,
+        reminders: Optional[List[str]] = None,
+        source_message_id: Optional[str] = None,
+    ) -> Dict:
+        """按去重键加锁，查询账本后创建任务并记账 (参数同 add_task)"""
+        lock = self._creating.setdefault(dedupe_key, asyncio.Lock())
+        self._creating_refs[dedupe_key] = self._creating_refs.get(dedupe_key, 0) + 1
+        try:
+            async with lock:
+                # 已创建过的任务直接返回，不再调用API
+                existing = self.ledger.lookup(dedupe_key)
+                if existing:
+                    self.logger.info(f"任务已创建过，跳过: {title}")
+                    return {
+                        "id": existing["task_id"],
+                        "projectId": existing["project_id"],
+                        "title": existing["title"],
+                        "deduplicated": True,
+                    }
+
+                created_task = await self._create_task(
+                    user_id=user_id,
+                    title=title,
+                    content=content,
+                    project_id=project_id,
+                    desc=desc,
+                    due_date=due_date,
+                    priority=priority,
+                    is_all_day=is_all_day,
+                    reminders=reminders,
+                )
+
+                if created_task.get("id"):
+                    self.ledger.record(
+                        dedupe_key,
+                        user_id=user_id,
+                        title=title,
+                        task_id=created_task["id"],
+                        project_id=created_task.get("projectId") or project_id,
+                        due_date=due_date,
+                        source_message_id=source_message_id,
+                    )
+                return created_task
+        finally:
+            # 仍有请求在排队时保留锁，避免后续请求拿到新锁与其并发创建
+            self._creating_refs[dedupe_key] -= 1
+            if self._creating_refs[dedupe_key] == 0:
+                del self._creating_refs[dedupe_key]
+                self._creating.pop(dedupe_key, None)
+
+    async def _create_task(
+        self,
+        user_id: str,
+        title: str,
+        content: Optional[str] = None,
+        project_id: Optional[str] = None,
+        desc: Optional[str] = None,
+        due_date: Optional[datetime] = None,
+        priority: Optional[int] = None,
+        is_all_day: bool = False,
+        reminders: Optional[List[str]] = None,
+    ) -> Dict:
+        """调用API创建任务 (参数同 add_task)"""
         try:
-            api = self._get_api(user_id)
+            api = self.get_api(user_id)
 
             # 获取默认标签
             default_tag = self.config_manager.get_user_value(
@@ -119,6 +270,7 @@ class DidaService:
             # 创建任务
             self.logger.debug(f"创建任务: {task_data}")
             created_task = await api.create_task(task_data)
+            self.task_index.upsert_task(user_id, created_task)
 
             self.logger.info(f"添加任务成功: {title}")
             return created_task
@@ -127,6 +279,78 @@ class DidaService:
             self.logger.error(f"添加任务失败: {str(e)}")
             raise ServiceError(f"添加任务失败: {str(e)}")
 
+    async def update_task(self, user_id: str, task: Task) -> Task:
+        """更新任务
+
+        Args:
+            user_id: 用户ID
+            task: 要更新的任务对象
+
+        Returns:
+            Task: 更新后的任务
+
+        Raises:
+            ServiceError: 更新失败
+        """
+        try:
+            updated = await self.get_api(user_id).update_task(task)
+            self.task_index.upsert_task(user_id, updated.to_dict())
+            return updated
+        except Exception as e:
+            self.logger.error(f"更新任务失败: {str(e)}")
+            raise ServiceError(f"更新任务失败: {str(e)}")
+
+    async def complete_task(self, user_id: str, task_id: str) -> Dict:
+        """完成任务
+
+        Args:
+            user_id: 用户ID
+            task_id: 任务ID
+
+        Returns:
+            Dict: API 返回结果
+
+        Raises:
+            ServiceError: 操作失败
+        """
+        try:
+            result = await self.get_api(user_id).complete_task(task_id)
+            if result.get("id"):
+                self.task_index.upsert_task(user_id, result)
+            else:
+                self.task_index.mark_completed(user_id, task_id)
+            return result
+        except Exception as e:
+            self.logger.error(f"完成任务失败: {str(e)}")
+            raise ServiceError(f"完成任务失败: {str(e)}")
+
+    def find_open_task(
+        self, user_id: str, title: str, due_date: Optional[datetime] = None
+    ) -> Optional[Dict]:
+        """在本地索引中查找同名且截止日期相同的未完成任务 (用于重复检查)"""
+        return self.task_index.find_open_task(user_id, title, due_date)
+
+    def get_due_tasks(
+        self, user_id: str, day: Optional[datetime] = None
+    ) -> List[Dict]:
+        """从本地索引获取某天到期的未完成任务
+
+        Args:
+            user_id: 用户ID
+            day: 日期 (带时区)，默认今天
+
+        Returns:
+            List[Dict]: 任务列表
+        """
+        day = day or datetime.now().astimezone()
+        start = day.replace(hour=0, minute=0, second=0, microsecond=0)
+        return self.task_index.query(
+            user_id,
+            completed=False,
+            start_date=start,
+            end_date=start + timedelta(days=1) - timedelta(seconds=1),
+        )
+
     async def get_tasks(
         self,
         user_id: str,
@@ -134,15 +358,19 @@ class DidaService:
         completed: Optional[bool] = None,
         start_date: Optional[datetime] = None,
         end_date: Optional[datetime] = None,
+        refresh: bool = False,
     ) -> List[Dict]:
         """获取任务列表
 
+        已完成过同步的用户直接查询本地索引；否则请求 API 并写入索引。
+
         Args:
             user_id: 用户ID
             project_name: 项目名称
             completed: 是否已完成
             start_date: 开始日期
             end_date: 结束日期
+            refresh: 是否忽略本地索引，直接请求 API
 
         Returns:
             List[Dict]: 任务列表
@@ -151,18 +379,27 @@ class DidaService:
             ServiceError: 获取失败
         """
         try:
-            api = self._get_api(user_id)
-
             # 获取项目ID
             project_id = None
             if project_name:
-                projects = await api.get_projects()
-                project = next((p for p in projects if p["name"] == project_name), None)
-                if project:
-                    project_id = project["id"]
-                else:
+                project_id = await DidaCatalog().resolve_project(user_id, project_name)
+                if not project_id:
                     raise ServiceError(f"项目不存在: {project_name}")
 
+            # 本地索引只同步未完成任务
+            if not refresh and completed is False and self.task_index.get_synced_at(
+                user_id
+            ):
+                return self.task_index.query(
+                    user_id,
+                    project_id=project_id,
+                    completed=False,
+                    start_date=start_date,
+                    end_date=end_date,
+                )
+
+            api = self.get_api(user_id)
+
             # 获取任务列表
             tasks = await api.get_tasks(
                 project_id=project_id,
@@ -170,6 +407,7 @@ class DidaService:
                 start_date=start_date,
                 end_date=end_date,
             )
+            self.task_index.upsert_tasks(user_id, tasks)
 
             return tasks
 
@@ -0,0 +1,400 @@
+from typing import Dict, Iterable, List, Optional
+from datetime import datetime, timezone
+from pathlib import Path
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+from ...utils.logger import Logger
+from ...utils.singleton import Singleton
+from ...utils.config_manager import ConfigManager
+from .dida_models import TaskStatus
+from .task_ledger import TaskLedger
+
+
+class TaskIndex(Singleton):
+    """滴答清单任务本地索引
+
+    负责:
+    1. 保存创建/更新/完成任务时 API 返回的任务数据
+    2. 按项目、状态、截止日期提供本地查询 (例如今天到期的任务、重复任务检查)
+    3. 定期与滴答清单同步未完成任务，修正本地数据
+
+    进程内单例，数据保存在 SQLite 中。
+    """
+
+    # 收集箱不在项目列表中，按此ID请求；返回的任务 projectId 为 "inbox<数字>"
+    INBOX_PROJECT_ID = "inbox"
+
+    def __init__(self):
+        """初始化任务索引"""
+        if self._initialized:
+            return
+
+        self.logger = Logger("dida.task_index")
+        self.config = ConfigManager()
+        self.db_path = Path(
+            self.config.get("dida", "task_index_path", default="data/dida/tasks.db")
+        )
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+
+        self._conn = sqlite3.connect(
+            str(self.db_path), check_same_thread=False, isolation_level=None
+        )
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS tasks (
+                task_id TEXT PRIMARY KEY,
+                user_id TEXT NOT NULL,
+                project_id TEXT,
+                title TEXT NOT NULL DEFAULT '',
+                normalized_title TEXT NOT NULL DEFAULT '',
+                status INTEGER NOT NULL DEFAULT 0,
+                due_date TEXT,
+                priority INTEGER NOT NULL DEFAULT 0,
+                data TEXT NOT NULL,
+                updated_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_tasks_user_status_due
+                ON tasks (user_id, status, due_date);
+            CREATE INDEX IF NOT EXISTS idx_tasks_user_project
+                ON tasks (user_id, project_id, status);
+            CREATE INDEX IF NOT EXISTS idx_tasks_user_title
+                ON tasks (user_id, normalized_title);
+
+            CREATE TABLE IF NOT EXISTS sync_state (
+                user_id TEXT PRIMARY KEY,
+                synced_at REAL NOT NULL
+            );
+            """
+        )
+
+        self._task: Optional[asyncio.Task] = None
+        self._initialized = True
+
+    @staticmethod
+    def _to_utc(value: Optional[str]) -> Optional[str]:
+        """将 API 返回的时间转换为 UTC ISO 字符串 (便于按字符串比较)"""
+        if not value:
+            return None
+        try:
+            parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except ValueError:
+            return None
+        if parsed.tzinfo is None:
+            parsed = parsed.replace(tzinfo=timezone.utc)
+        return parsed.astimezone(timezone.utc).isoformat(timespec="seconds")
+
+    def _write_task(self, user_id: str, task: Dict) -> None:
+        """写入单个任务 (调用方负责加锁)"""
+        self._conn.execute(
+            """
+            INSERT INTO tasks (
+                task_id, user_id, project_id, title, normalized_title,
+                status, due_date, priority, data, updated_at
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (task_id) DO UPDATE SET
+                project_id = excluded.project_id,
+                title = excluded.title,
+                normalized_title = excluded.normalized_title,
+                status = excluded.status,
+                due_date = excluded.due_date,
+                priority = excluded.priority,
+                data = excluded.data,
+                updated_at = excluded.updated_at
+            """,
+            (
+                task["id"],
+                str(user_id),
+                task.get("projectId"),
+                task.get("title", ""),
+                TaskLedger.normalize_title(task.get("title", "")),
+                int(task.get("status", TaskStatus.NORMAL)),
+                self._to_utc(task.get("dueDate")),
+                int(task.get("priority", 0) or 0),
+                json.dumps(task, ensure_ascii=False),
+                time.time(),
+            ),
+        )
+
+    def upsert_tasks(self, user_id: str, tasks: Iterable[Dict]) -> int:
+        """写入任务 (API 返回的任务字典)
+
+        Returns:
+            int: 写入的任务数量
+        """
+        count = 0
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                for task in tasks:
+                    if task.get("id"):
+                        self._write_task(user_id, task)
+                        count += 1
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return count
+
+    def upsert_task(self, user_id: str, task: Dict) -> None:
+        """写入单个任务"""
+        self.upsert_tasks(user_id, [task])
+
+    def mark_completed(self, user_id: str, task_id: str) -> None:
+        """将任务标记为已完成"""
+        with self._lock:
+            self._conn.execute(
+                """
+                UPDATE tasks SET
+                    status = ?,
+                    data = json_set(data, '$.status', ?),
+                    updated_at = ?
+                WHERE user_id = ? AND task_id = ?
+                """,
+                (
+                    int(TaskStatus.COMPLETED),
+                    int(TaskStatus.COMPLETED),
+                    time.time(),
+                    str(user_id),
+                    task_id,
+                ),
+            )
+
+    def replace_open_tasks(
+        self, user_id: str, project_id: Optional[str], tasks: List[Dict]
+    ) -> int:
+        """用同步结果替换某项目下的未完成任务
+
+        本地有而远端没有的未完成任务 (已在其他客户端删除或完成) 会被移除。
+
+        Args:
+            user_id: 用户ID
+            project_id: 项目ID，为 None 时表示用户的全部项目，
+                为 INBOX_PROJECT_ID 时表示收集箱
+            tasks: 远端的未完成任务
+
+        Returns:
+            int: 移除的本地任务数量
+        """
+        remote_ids = [task["id"] for task in tasks if task.get("id")]
+        conditions = "user_id = ? AND status = ?"
+        params: List = [str(user_id), int(TaskStatus.NORMAL)]
+        if project_id == self.INBOX_PROJECT_ID:
+            conditions += " AND project_id LIKE ?"
+            params.append(f"{self.INBOX_PROJECT_ID}%")
+        elif project_id:
+            conditions += " AND project_id = ?"
+            params.append(project_id)
+        if remote_ids:
+            conditions += f" AND task_id NOT IN ({', '.join('?' for _ in remote_ids)})"
+            params.extend(remote_ids)
+
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                removed = self._conn.execute(
+                    f"DELETE FROM tasks WHERE {conditions}", params
+                ).rowcount
+                for task in tasks:
+                    if task.get("id"):
+                        self._write_task(user_id, task)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return removed
+
+    def query(
+        self,
+        user_id: str,
+        project_id: Optional[str] = None,
+        completed: Optional[bool] = None,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        limit: Optional[int] = None,
+    ) -> List[Dict]:
+        """查询本地任务
+
+        Args:
+            user_id: 用户ID
+            project_id: 项目ID
+            completed: 是否已完成
+            start_date: 截止日期下限
+            end_date: 截止日期上限
+            limit: 返回数量限制
+
+        Returns:
+            List[Dict]: 任务列表 (API 返回的原始格式)，按截止日期排序
+        """
+        conditions = ["user_id = ?"]
+        params: List = [str(user_id)]
+
+        if project_id:
+            conditions.append("project_id = ?")
+            params.append(project_id)
+        if completed is not None:
+            conditions.append("status = ?")
+            params.append(
+                int(TaskStatus.COMPLETED if completed else TaskStatus.NORMAL)
+            )
+        if start_date:
+            conditions.append("due_date >= ?")
+            params.append(self._to_utc(start_date.isoformat()))
+        if end_date:
+            conditions.append("due_date <= ?")
+            params.append(self._to_utc(end_date.isoformat()))
+
+        sql = f"""
+            SELECT data FROM tasks WHERE {" AND ".join(conditions)}
+            ORDER BY due_date IS NULL, due_date, priority DESC
+        """
+        if limit:
+            sql += " LIMIT ?"
+            params.append(limit)
+
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [json.loads(row["data"]) for row in rows]
+
+    def find_open_task(
+        self, user_id: str, title: str, due_date: Optional[datetime] = None
+    ) -> Optional[Dict]:
+        """查找标题 (规范化后) 和截止日期相同的未完成任务
+
+        Returns:
+            Dict: 任务数据
+            None: 不存在
+        """
+        conditions = "user_id = ? AND normalized_title = ? AND status = ?"
+        params: List = [
+            str(user_id),
+            TaskLedger.normalize_title(title),
+            int(TaskStatus.NORMAL),
+        ]
+        if due_date:
+            conditions += " AND substr(due_date, 1, 10) = ?"
+            params.append(self._to_utc(due_date.isoformat())[:10])
+        else:
+            conditions += " AND due_date IS NULL"
+
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT data FROM tasks WHERE {conditions} LIMIT 1", params
+            ).fetchone()
+        return json.loads(row["data"]) if row else None
+
+    def get_synced_at(self, user_id: str) -> Optional[float]:
+        """获取用户上次完整同步的时间 (time.time())"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT synced_at FROM sync_state WHERE user_id = ?", (str(user_id),)
+            ).fetchone()
+        return row[0] if row else None
+
+    def _set_synced_at(self, user_id: str, synced_at: Optional[float]) -> None:
+        """记录 (或清除) 用户的完整同步时间"""
+        with self._lock:
+            if synced_at is None:
+                self._conn.execute(
+                    "DELETE FROM sync_state WHERE user_id = ?", (str(user_id),)
+                )
+                return
+            self._conn.execute(
+                """
+                INSERT INTO sync_state (user_id, synced_at) VALUES (?, ?)
+                ON CONFLICT (user_id) DO UPDATE SET synced_at = excluded.synced_at
+                """,
+                (str(user_id), synced_at),
+            )
+
+    async def sync_user(self, user_id: str) -> int:
+        """同步用户所有项目 (含收集箱) 的未完成任务
+
+        项目列表使用已从 API 获取的目录缓存 (尚未获取时先刷新)。
+        只有全部项目都同步成功时才记录同步时间；否则清除同步时间，
+        DidaService.get_tasks 在索引完整之前继续请求 API。
+
+        Returns:
+            int: 同步的任务数量
+        """
+        from .dida_service import DidaService
+        from .dida_catalog import DidaCatalog
+
+        catalog = DidaCatalog()
+        if not catalog.is_fetched(user_id):
+            await catalog.refresh(user_id)
+
+        api = DidaService().get_api(user_id)
+        projects = [
+            {"id": self.INBOX_PROJECT_ID, "name": "收集箱"},
+            *catalog.get_projects(user_id),
+        ]
+
+        results = await asyncio.gather(
+            *(
+                api.get_tasks(project_id=project["id"], completed=False)
+                for project in projects
+            ),
+            return_exceptions=True,
+        )
+
+        count = 0
+        failed = 0
+        for project, tasks in zip(projects, results):
+            if isinstance(tasks, Exception):
+                failed += 1
+                self.logger.warning(
+                    f"同步项目任务失败: {project.get('name')}: {str(tasks)}"
+                )
+                continue
+            self.replace_open_tasks(user_id, project["id"], tasks)
+            count += len(tasks)
+
+        if failed:
+            self._set_synced_at(user_id, None)
+            self.logger.warning(
+                f"任务索引不完整: user_id={user_id}, {failed}/{len(projects)} 个项目同步失败"
+            )
+            return count
+
+        self._set_synced_at(user_id, time.time())
+        self.logger.info(f"已同步任务索引: user_id={user_id}, {count} 个未完成任务")
+        return count
+
+    async def run(self, interval: Optional[float] = None) -> None:
+        """后台定时同步已授权用户的任务
+
+        Args:
+            interval: 同步间隔(秒)，默认读取 dida.task_sync_interval，未配置时为900秒
+        """
+        interval = interval or self.config.get(
+            "dida", "task_sync_interval", default=900
+        )
+        self.logger.info(f"开始后台同步滴答清单任务 (间隔 {interval} 秒)")
+        while True:
+            try:
+                for user_id, user_config in self.config.get_all_user_configs().items():
+                    if not (user_config.get("dida") or {}).get("token"):
+                        continue
+                    try:
+                        await self.sync_user(user_id)
+                    except Exception as e:
+                        self.logger.error(f"同步用户 {user_id} 的任务失败: {str(e)}")
+                await asyncio.sleep(interval)
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                self.logger.error(f"后台同步任务出错: {str(e)}")
+                await asyncio.sleep(interval)
+
+    def start(self, interval: Optional[float] = None) -> asyncio.Task:
+        """在当前事件循环中启动后台同步任务 (重复调用返回同一任务)"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self.run(interval), name="dida_task_sync")
+        return self._task
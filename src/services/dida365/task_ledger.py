@@ -0,0 +1,150 @@
+from typing import Dict, Optional
+from datetime import datetime
+from pathlib import Path
+import hashlib
+import sqlite3
+import threading
+import time
+import unicodedata
+from ...utils.logger import Logger
+from ...utils.singleton import Singleton
+from ...utils.config_manager import ConfigManager
+
+
+class TaskLedger(Singleton):
+    """任务创建记录 (去重账本)
+
+    记录每个已创建任务的去重键和任务ID。去重键由用户、规范化后的标题、
+    截止日期和来源消息标识计算得到，同一条消息重试或重发时不会重复创建任务。
+
+    进程内单例，数据保存在 SQLite 中。
+    """
+
+    def __init__(self):
+        """初始化任务账本"""
+        if self._initialized:
+            return
+
+        self.logger = Logger("dida.ledger")
+        self.config = ConfigManager()
+        self.db_path = Path(
+            self.config.get("dida", "ledger_path", default="data/dida/task_ledger.db")
+        )
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+
+        self._conn = sqlite3.connect(
+            str(self.db_path), check_same_thread=False, isolation_level=None
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS task_ledger (
+                dedupe_key TEXT PRIMARY KEY,
+                user_id TEXT NOT NULL,
+                title TEXT NOT NULL,
+                due_date TEXT NOT NULL DEFAULT '',
+                source_message_id TEXT NOT NULL DEFAULT '',
+                task_id TEXT NOT NULL,
+                project_id TEXT,
+                created_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_task_ledger_user
+                ON task_ledger (user_id, created_at);
+            """
+        )
+        self.prune()
+
+        self._initialized = True
+
+    @property
+    def window(self) -> float:
+        """去重时间窗口(秒)，超过窗口的记录不再参与去重"""
+        return self.config.get("dida", "dedupe_window", default=86400)
+
+    @staticmethod
+    def normalize_title(title: str) -> str:
+        """规范化标题: 统一全角/半角，合并空白，忽略大小写"""
+        title = unicodedata.normalize("NFKC", title or "")
+        return " ".join(title.split()).casefold()
+
+    @classmethod
+    def make_key(
+        cls,
+        user_id: str,
+        title: str,
+        due_date: Optional[datetime] = None,
+        source_message_id: Optional[str] = None,
+    ) -> str:
+        """计算去重键"""
+        parts = [
+            str(user_id),
+            cls.normalize_title(title),
+            due_date.isoformat() if due_date else "",
+            source_message_id or "",
+        ]
+        return hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+    def lookup(self, dedupe_key: str) -> Optional[Dict]:
+        """查找窗口内的创建记录
+
+        Returns:
+            Dict: 包含 task_id、project_id、title
+            None: 没有记录
+        """
+        with self._lock:
+            row = self._conn.execute(
+                """
+                SELECT task_id, project_id, title FROM task_ledger
+                WHERE dedupe_key = ? AND created_at >= ?
+                """,
+                (dedupe_key, time.time() - self.window),
+            ).fetchone()
+        if not row:
+            return None
+        return {"task_id": row[0], "project_id": row[1], "title": row[2]}
+
+    def record(
+        self,
+        dedupe_key: str,
+        user_id: str,
+        title: str,
+        task_id: str,
+        project_id: Optional[str] = None,
+        due_date: Optional[datetime] = None,
+        source_message_id: Optional[str] = None,
+    ) -> None:
+        """记录已创建的任务"""
+        with self._lock:
+            self._conn.execute(
+                """
+                INSERT OR REPLACE INTO task_ledger (
+                    dedupe_key, user_id, title, due_date, source_message_id,
+                    task_id, project_id, created_at
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                (
+                    dedupe_key,
+                    str(user_id),
+                    title,
+                    due_date.isoformat() if due_date else "",
+                    source_message_id or "",
+                    task_id,
+                    project_id,
+                    time.time(),
+                ),
+            )
+
+    def prune(self) -> int:
+        """删除超出去重窗口的记录
+
+        Returns:
+            int: 删除的记录数量
+        """
+        with self._lock:
+            cursor = self._conn.execute(
+                "DELETE FROM task_ledger WHERE created_at < ?",
+                (time.time() - self.window,),
+            )
+        return cursor.rowcount
@@ -0,0 +1,326 @@
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Tuple
+from collections import deque
+from dataclasses import dataclass, field
+import asyncio
+import random
+import time
+from ...utils.logger import Logger
+from ...utils.config_manager import ConfigManager
+
+
+@dataclass
+class LLMEndpoint:
+    """LLM 端点
+
+    Attributes:
+        name: 端点名称
+        llm: 模型实例
+        model: 该端点使用的模型名称
+        chains: 提示词名称 -> 处理链
+        weight: 负载均衡权重
+        ewma_latency: 指数加权平均耗时(秒)
+        failures: 连续失败次数
+        unhealthy_until: 熔断结束时间 (monotonic)，之前不再分配请求
+        in_flight: 正在进行的请求数
+    """
+
+    EWMA_ALPHA = 0.2
+    LATENCY_WINDOW = 100
+
+    name: str
+    llm: Any
+    chains: Dict[str, Any]
+    model: str = ""
+    weight: float = 1.0
+    ewma_latency: Optional[float] = None
+    failures: int = 0
+    unhealthy_until: float = 0.0
+    in_flight: int = 0
+    requests: int = 0
+    errors: int = 0
+    # 方法 -> 最近的耗时样本
+    latencies: Dict[str, deque] = field(default_factory=dict)
+
+    @property
+    def healthy(self) -> bool:
+        return time.monotonic() >= self.unhealthy_until
+
+    def record_latency(self, method: str, latency: float) -> None:
+        """记录一次成功请求的耗时"""
+        self.latencies.setdefault(method, deque(maxlen=self.LATENCY_WINDOW)).append(
+            latency
+        )
+        self.ewma_latency = (
+            latency
+            if self.ewma_latency is None
+            else self.EWMA_ALPHA * latency + (1 - self.EWMA_ALPHA) * self.ewma_latency
+        )
+
+    def p95(self, method: str, min_samples: int = 20) -> Optional[float]:
+        """方法的 p95 耗时，样本不足时返回 None"""
+        samples = self.latencies.get(method)
+        if not samples or len(samples) < min_samples:
+            return None
+        ordered = sorted(samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+
+
+class LLMEndpointPool:
+    """LLM 多端点池
+
+    负责:
+    1. 按权重在健康的端点之间分配请求
+    2. 记录每个端点的耗时 (EWMA、按方法的 p95) 和连续失败次数，
+       连续失败达到阈值后熔断一段时间
+    3. 请求失败时换一个健康的端点重试一次
+    4. 对冲请求: 超过 p95 耗时仍未返回时向另一个健康端点再发一次，取先完成的结果
+
+    配置 (openai 段):
+        endpoint_failure_threshold: 连续失败多少次后熔断，默认 3
+        endpoint_cooldown: 熔断时长(秒)，默认 30
+        hedge_delay: 耗时样本不足时的对冲等待时间(秒)，默认 10
+    """
+
+    def __init__(self, endpoints: List[LLMEndpoint]):
+        """初始化端点池
+
+        Args:
+            endpoints: 端点列表 (至少一个)
+        """
+        if not endpoints:
+            raise ValueError("至少需要一个 LLM 端点")
+        self.logger = Logger("llm.endpoints")
+        self.config = ConfigManager()
+        self.endpoints = endpoints
+
+    @property
+    def primary(self) -> LLMEndpoint:
+        """第一个端点"""
+        return self.endpoints[0]
+
+    def carry_over(self, previous: "LLMEndpointPool") -> None:
+        """从旧的端点池继承同名端点的统计和熔断状态 (配置热加载时使用)"""
+        old = {endpoint.name: endpoint for endpoint in previous.endpoints}
+        for endpoint in self.endpoints:
+            if endpoint.name in old:
+                source = old[endpoint.name]
+                endpoint.failures = source.failures
+                endpoint.unhealthy_until = source.unhealthy_until
+                endpoint.ewma_latency = source.ewma_latency
+                endpoint.latencies = source.latencies
+                endpoint.requests = source.requests
+                endpoint.errors = source.errors
+
+    def select(
+        self, exclude: Iterable[str] = (), healthy_only: bool = False
+    ) -> Optional[LLMEndpoint]:
+        """按权重选择一个健康的端点
+
+        没有健康端点时选择熔断最早结束的端点 (healthy_only 时返回 None)。
+
+        Args:
+            exclude: 排除的端点名称
+            healthy_only: 只选择健康的端点，用于对冲和失败重试，
+                避免把请求发给刚熔断的端点
+
+        Returns:
+            LLMEndpoint: 选中的端点
+            None: 排除后没有可用端点
+        """
+        exclude = set(exclude)
+        candidates = [e for e in self.endpoints if e.name not in exclude]
+        if not candidates:
+            return None
+
+        healthy = [e for e in candidates if e.healthy and e.weight > 0]
+        if not healthy:
+            if healthy_only:
+                return None
+            return min(candidates, key=lambda e: e.unhealthy_until)
+        return random.choices(healthy, weights=[e.weight for e in healthy])[0]
+
+    def _record_failure(self, endpoint: LLMEndpoint, error: Exception) -> None:
+        """记录失败，连续失败达到阈值时熔断"""
+        endpoint.failures += 1
+        endpoint.errors += 1
+        threshold = self.config.get("openai", "endpoint_failure_threshold", default=3)
+        if endpoint.failures >= threshold:
+            cooldown = self.config.get("openai", "endpoint_cooldown", default=30)
+            endpoint.unhealthy_until = time.monotonic() + cooldown
+            self.logger.warning(
+                f"端点 {endpoint.name} 连续失败 {endpoint.failures} 次，"
+                f"暂停 {cooldown} 秒: {error}"
+            )
+
+    async def _call(
+        self, endpoint: LLMEndpoint, name: str, variables: Dict
+    ) -> Any:
+        """在指定端点上调用处理链并记录耗时/失败"""
+        endpoint.in_flight += 1
+        endpoint.requests += 1
+        start = time.monotonic()
+        try:
+            result = await endpoint.chains[name].ainvoke(variables)
+        except asyncio.CancelledError:
+            # 对冲请求中落后的一方被取消，不计为失败
+            raise
+        except Exception as e:
+            self._record_failure(endpoint, e)
+            raise
+        finally:
+            endpoint.in_flight -= 1
+
+        endpoint.failures = 0
+        endpoint.record_latency(name, time.monotonic() - start)
+        return result
+
+    def hedge_delay(self, endpoint: LLMEndpoint, name: str) -> float:
+        """对冲等待时间: 该端点该方法的 p95 耗时，样本不足时使用 openai.hedge_delay"""
+        p95 = endpoint.p95(name)
+        if p95 is not None:
+            return p95
+        return self.config.get("openai", "hedge_delay", default=10)
+
+    async def invoke(
+        self, name: str, variables: Dict, hedge: bool = False
+    ) -> Tuple[Any, LLMEndpoint]:
+        """调用处理链
+
+        Args:
+            name: 提示词名称
+            variables: 输入变量
+            hedge: 是否启用对冲请求 (至少两个端点时生效)
+
+        Returns:
+            Tuple[Any, LLMEndpoint]: (处理链的输出, 实际返回结果的端点)
+        """
+        primary = self.select()
+        if not hedge or len(self.endpoints) < 2:
+            return await self._invoke_with_failover(primary, name, variables)
+
+        first = asyncio.create_task(self._call(primary, name, variables))
+        tasks = {first: primary}
+        try:
+            done, _ = await asyncio.wait(
+                tasks, timeout=self.hedge_delay(primary, name)
+            )
+            if done:
+                if first.exception() is None:
+                    return first.result(), primary
+                return await self._failover(primary, name, variables, first.exception())
+
+            backup = self.select(exclude={primary.name}, healthy_only=True)
+            if backup is None:
+                return await first, primary
+
+            self.logger.info(
+                f"{name} 在 {primary.name} 上超过对冲等待时间，向 {backup.name} 发送对冲请求"
+            )
+            tasks[asyncio.create_task(self._call(backup, name, variables))] = backup
+
+            error: Optional[BaseException] = None
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    if task.exception() is None:
+                        return task.result(), tasks[task]
+                    error = task.exception()
+            raise error
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    async def _invoke_with_failover(
+        self, endpoint: LLMEndpoint, name: str, variables: Dict
+    ) -> Tuple[Any, LLMEndpoint]:
+        """调用处理链，失败时换一个端点重试一次"""
+        try:
+            return await self._call(endpoint, name, variables), endpoint
+        except Exception as e:
+            return await self._failover(endpoint, name, variables, e)
+
+    async def _failover(
+        self, failed: LLMEndpoint, name: str, variables: Dict, error: BaseException
+    ) -> Tuple[Any, LLMEndpoint]:
+        """换一个健康的端点重试，没有其他健康端点时抛出原错误"""
+        backup = self.select(exclude={failed.name}, healthy_only=True)
+        if backup is None:
+            raise error
+        self.logger.warning(f"端点 {failed.name} 调用 {name} 失败，切换到 {backup.name}: {error}")
+        return await self._call(backup, name, variables), backup
+
+    async def stream(
+        self, name: str, variables: Dict
+    ) -> AsyncIterator[Tuple[Any, LLMEndpoint]]:
+        """流式调用处理链
+
+        收到第一段输出之前失败时换一个端点重试一次；流式调用不使用对冲请求。
+
+        Args:
+            name: 提示词名称
+            variables: 输入变量
+
+        Yields:
+            Tuple[Any, LLMEndpoint]: (处理链的输出片段, 输出该片段的端点)
+        """
+        endpoint = self.select()
+        tried = set()
+        while True:
+            current = endpoint
+            tried.add(current.name)
+            current.in_flight += 1
+            current.requests += 1
+            start = time.monotonic()
+            started = False
+            try:
+                async for chunk in current.chains[name].astream(variables):
+                    started = True
+                    yield chunk, current
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self._record_failure(current, e)
+                endpoint = (
+                    None if started else self.select(exclude=tried, healthy_only=True)
+                )
+                if endpoint is None:
+                    raise
+                self.logger.warning(
+                    f"端点 {current.name} 流式调用 {name} 失败，切换到 {endpoint.name}: {e}"
+                )
+                continue
+            finally:
+                current.in_flight -= 1
+
+            current.failures = 0
+            current.record_latency(name, time.monotonic() - start)
+            return
+
+    def get_stats(self) -> List[Dict]:
+        """获取各端点的状态
+
+        Returns:
+            List[Dict]: name、model、weight、healthy、in_flight、requests、errors、
+                ewma_latency、p95 (按方法)
+        """
+        return [
+            {
+                "name": endpoint.name,
+                "model": endpoint.model,
+                "weight": endpoint.weight,
+                "healthy": endpoint.healthy,
+                "in_flight": endpoint.in_flight,
+                "requests": endpoint.requests,
+                "errors": endpoint.errors,
+                "ewma_latency": endpoint.ewma_latency,
+                "p95": {
+                    method: endpoint.p95(method, min_samples=1)
+                    for method in endpoint.latencies
+                },
+            }
+            for endpoint in self.endpoints
+        ]
@@ -0,0 +1,198 @@
+from typing import Any, Dict, Optional
+from pathlib import Path
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from ...utils.logger import Logger
+from ...utils.singleton import Singleton
+from ...utils.config_manager import ConfigManager
+from ...utils.cache import LRUCache
+
+
+class LLMCache(Singleton):
+    """LLM 响应缓存
+
+    两级缓存: 进程内 LRU + 磁盘 SQLite。缓存键由模型、方法、提示词模板和
+    输入变量计算得到，转发、重发或重试相同内容时直接返回上次的解析结果。
+    每个方法可单独配置有效期 (openai.cache_ttl)，并统计命中率。
+
+    进程内单例。缓存值必须可以 JSON 序列化，读取时返回副本。
+    """
+
+    # 各方法默认有效期(秒)
+    DEFAULT_TTLS = {
+        "format_content": 7 * 86400,
+        "extract_tasks": 3600,
+        "analyze_content": 3600,
+        "proofread_text": 30 * 86400,
+    }
+    DEFAULT_TTL = 86400
+
+    def __init__(self):
+        """初始化 LLM 缓存"""
+        if self._initialized:
+            return
+
+        self.logger = Logger("llm.cache")
+        self.config = ConfigManager()
+        self.db_path = Path(
+            self.config.get("openai", "cache_path", default="data/llm/cache.db")
+        )
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+
+        # 缓存键 -> (过期时间, JSON 字符串)
+        self._memory = LRUCache(
+            maxsize=self.config.get("openai", "cache_size", default=512)
+        )
+        # 方法 -> {"memory_hits", "disk_hits", "misses"}
+        self._stats: Dict[str, Dict[str, int]] = {}
+
+        self._conn = sqlite3.connect(
+            str(self.db_path), check_same_thread=False, isolation_level=None
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS llm_cache (
+                cache_key TEXT PRIMARY KEY,
+                method TEXT NOT NULL,
+                value TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                expires_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_llm_cache_expires
+                ON llm_cache (expires_at);
+            """
+        )
+        self.prune()
+
+        self._initialized = True
+
+    @property
+    def enabled(self) -> bool:
+        """是否启用缓存 (openai.cache_enabled)"""
+        return bool(self.config.get("openai", "cache_enabled", default=True))
+
+    def get_ttl(self, method: str) -> float:
+        """获取方法的缓存有效期(秒)，配置 openai.cache_ttl.<method> 优先"""
+        ttls = self.config.get("openai", "cache_ttl", default={})
+        return ttls.get(method, self.DEFAULT_TTLS.get(method, self.DEFAULT_TTL))
+
+    @staticmethod
+    def make_key(model: str, method: str, template: str, variables: Dict) -> str:
+        """计算缓存键
+
+        Args:
+            model: 模型名称
+            method: 方法名称
+            template: 提示词模板文本
+            variables: 输入变量 (时间相关变量应先按需截断精度)
+
+        Returns:
+            str: sha256 十六进制字符串
+        """
+        payload = json.dumps(
+            [model, method, template, variables],
+            ensure_ascii=False,
+            sort_keys=True,
+            default=str,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _count(self, method: str, field: str) -> None:
+        """更新命中统计"""
+        with self._lock:
+            stats = self._stats.setdefault(
+                method, {"memory_hits": 0, "disk_hits": 0, "misses": 0}
+            )
+            stats[field] += 1
+
+    def get(self, method: str, key: str) -> Optional[Any]:
+        """读取缓存
+
+        Returns:
+            Any: 缓存值的副本
+            None: 未命中或已过期
+        """
+        if not self.enabled:
+            return None
+
+        now = time.time()
+        item = self._memory.get(key)
+        if item is not None:
+            expires_at, value = item
+            if expires_at > now:
+                self._count(method, "memory_hits")
+                return json.loads(value)
+            self._memory.pop(key)
+
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM llm_cache "
+                "WHERE cache_key = ? AND expires_at > ?",
+                (key, now),
+            ).fetchone()
+        if row is None:
+            self._count(method, "misses")
+            return None
+
+        self._memory.set(key, (row[1], row[0]))
+        self._count(method, "disk_hits")
+        return json.loads(row[0])
+
+    def set(self, method: str, key: str, value: Any) -> None:
+        """写入缓存"""
+        if not self.enabled:
+            return
+
+        now = time.time()
+        expires_at = now + self.get_ttl(method)
+        data = json.dumps(value, ensure_ascii=False)
+        self._memory.set(key, (expires_at, data))
+        with self._lock:
+            self._conn.execute(
+                """
+                INSERT OR REPLACE INTO llm_cache (
+                    cache_key, method, value, created_at, expires_at
+                ) VALUES (?, ?, ?, ?, ?)
+                """,
+                (key, method, data, now, expires_at),
+            )
+
+    def prune(self) -> int:
+        """删除已过期的磁盘缓存
+
+        Returns:
+            int: 删除的条目数量
+        """
+        with self._lock:
+            cursor = self._conn.execute(
+                "DELETE FROM llm_cache WHERE expires_at <= ?", (time.time(),)
+            )
+        return cursor.rowcount
+
+    def clear(self) -> None:
+        """清空缓存和统计"""
+        self._memory.clear()
+        with self._lock:
+            self._conn.execute("DELETE FROM llm_cache")
+            self._stats.clear()
+
+    def get_stats(self) -> Dict[str, Dict]:
+        """获取各方法的命中统计
+
+        Returns:
+            Dict[str, Dict]: 方法 -> memory_hits、disk_hits、misses、hit_rate
+        """
+        with self._lock:
+            stats = {method: dict(item) for method, item in self._stats.items()}
+        for item in stats.values():
+            total = item["memory_hits"] + item["disk_hits"] + item["misses"]
+            item["hit_rate"] = (item["memory_hits"] + item["disk_hits"]) / max(
+                total, 1
+            )
+        return stats
@@ -1,14 +1,33 @@
-import re
-from typing import Dict, List, Optional, Any
+from typing import Callable, Dict, List, Optional, Any, Tuple
+import hashlib
+import inspect
 import json
-from datetime import datetime, timedelta
+import time
+from datetime import datetime
 from langchain_core.messages import HumanMessage, SystemMessage
 from langchain_core.output_parsers import JsonOutputParser
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
+from langchain_core.utils.function_calling import convert_to_openai_tool
 from langchain_openai import ChatOpenAI
 from langchain.output_parsers import XMLOutputParser
 from ...utils.logger import Logger
 from ...utils.config_manager import ConfigManager
+from .precheck import ContentPrecheck
+from .llm_cache import LLMCache
+from .stream_parser import StreamingResultParser, StreamingToolCallParser
+from .endpoint_pool import LLMEndpoint, LLMEndpointPool
+from .model_router import ModelRouter
+from .prompts import PROMPTS, get_time_context
+from .schemas import STRUCTURED_SCHEMAS
+from .structured_output import (
+    STRUCTURED_OUTPUT_INSTRUCTION,
+    STRUCTURED_SUFFIX,
+    chunk_text,
+    message_text,
+    parse_note,
+    parse_task_items,
+    repair_json,
+)
 
 
 class LLMService:
@@ -26,25 +45,281 @@ class LLMService:
         self.logger = Logger("services.llm")
         self.config = ConfigManager()
 
-        # 获取配置
-        openai_config = {
-            'api_key': self.config.get('openai', 'api_key'),
-            'base_url': self.config.get('openai', 'base_url'),
-            'model': self.config.get('openai', 'model', default='gpt-4o'),
-        }
-
-        self.logger.info(f"使用模型: {openai_config['model']}")
+        # 初始化 JSON 解析器
+        self.json_parser = JsonOutputParser()
 
-        # 初始化 LLM
-        self.llm = ChatOpenAI(
-            model=openai_config['model'],
-            api_key=openai_config['api_key'],
-            base_url=openai_config['base_url'],
+        # 模型分级路由
+        self.router = ModelRouter()
+
+        # 每个模型级别一个 LLM 端点池 (每个端点一套预编译的处理链)
+        self.pools = self._create_pools()
+        self.pool = self.pools[ModelRouter.LARGE]
+        self.llm = self.pool.primary.llm
+
+        # 本地内容预检
+        self.prechecker = ContentPrecheck()
+
+        # 响应缓存
+        self.cache = LLMCache()
+        # 处理链名称 -> 指纹 (结构化输出处理链包含追加的说明和工具 schema)
+        self._chain_fingerprints: Dict[str, str] = {}
+
+        # 模型配置变更时重建 LLM
+        self.config.subscribe(self._on_config_changed, sections=["openai"])
+
+    def _create_llm(
+        self, model: str, api_key: Optional[str], base_url: Optional[str]
+    ) -> ChatOpenAI:
+        """创建 LLM 实例"""
+        return ChatOpenAI(
+            model=model,
+            api_key=api_key,
+            base_url=base_url,
             temperature=0,
+            # 流式输出时在最后一段返回 token 用量
+            stream_usage=self.config.get('openai', 'stream_usage', default=True),
         )
 
-        # 初始化 JSON 解析器
-        self.json_parser = JsonOutputParser()
+    def _create_pools(self) -> Dict[str, LLMEndpointPool]:
+        """根据系统配置为每个模型级别创建端点池
+
+        大模型为 openai.models.large (默认 openai.model)；配置了 openai.models.small
+        且与大模型不同时另建小模型端点池，否则全部请求使用大模型。
+        """
+        models = self.config.get('openai', 'models', default={})
+        self.model_name = models.get('large') or self.config.get(
+            'openai', 'model', default='gpt-4o'
+        )
+        self.models = {ModelRouter.LARGE: self.model_name}
+        pools = {ModelRouter.LARGE: self._create_pool(ModelRouter.LARGE, self.model_name)}
+
+        small_model = models.get('small')
+        if small_model and small_model != self.model_name:
+            self.models[ModelRouter.SMALL] = small_model
+            pools[ModelRouter.SMALL] = self._create_pool(ModelRouter.SMALL, small_model)
+        return pools
+
+    def _create_pool(self, tier: str, model: str) -> LLMEndpointPool:
+        """创建一个模型级别的端点池
+
+        配置了 openai.endpoints 时每项为一个端点 (name、base_url、api_key、weight、
+        model、small_model)，未配置的字段使用 openai 段的默认值；
+        否则只使用 openai.base_url / api_key 一个端点。
+
+        Args:
+            tier: 模型级别 (small/large)
+            model: 该级别的默认模型
+        """
+        default_api_key = self.config.get('openai', 'api_key')
+        default_base_url = self.config.get('openai', 'base_url')
+
+        endpoint_configs = self.config.get('openai', 'endpoints', default=[]) or [
+            {"name": "default"}
+        ]
+
+        endpoints = []
+        for i, item in enumerate(endpoint_configs):
+            endpoint_model = (
+                item.get('small_model' if tier == ModelRouter.SMALL else 'model')
+                or model
+            )
+            llm = self._create_llm(
+                model=endpoint_model,
+                api_key=item.get('api_key') or default_api_key,
+                base_url=item.get('base_url') or default_base_url,
+            )
+            endpoints.append(
+                LLMEndpoint(
+                    name=item.get('name') or f"endpoint-{i + 1}",
+                    llm=llm,
+                    chains=self._build_chains(llm),
+                    model=endpoint_model,
+                    weight=float(item.get('weight', 1)),
+                )
+            )
+
+        self.logger.info(
+            f"{tier} 模型: {model}, "
+            f"端点: {', '.join(endpoint.name for endpoint in endpoints)}"
+        )
+        return LLMEndpointPool(endpoints)
+
+    def _should_hedge(self, method: str) -> bool:
+        """方法是否启用对冲请求 (openai.hedge_enabled + openai.hedge_methods)"""
+        if not self.config.get('openai', 'hedge_enabled', default=False):
+            return False
+        methods = self.config.get(
+            'openai',
+            'hedge_methods',
+            default=["format_content", "extract_tasks", "analyze_content"],
+        )
+        return method in methods
+
+    def _on_config_changed(self, changed: set, config: Dict) -> None:
+        """系统配置变更回调: 重建 LLM 实例"""
+        try:
+            pools = self._create_pools()
+            for tier, pool in pools.items():
+                if tier in self.pools:
+                    pool.carry_over(self.pools[tier])
+            self.pools, self.pool = pools, pools[ModelRouter.LARGE]
+            self.llm = self.pool.primary.llm
+        except Exception as e:
+            self.logger.error(f"重建 LLM 失败，继续使用旧配置: {e}")
+
+    def _build_chains(self, llm: ChatOpenAI) -> Dict[str, Any]:
+        """为注册表中的每个提示词构建处理链 (只在创建 LLM 时构建一次)
+
+        处理链输出模型消息，JSON 结果由调用方解析，以便读取 token 用量。
+        STRUCTURED_SCHEMAS 中的提示词另建 "<名称>.structured" 处理链，
+        强制模型通过工具调用按 schema 输出结果。
+        """
+        chains = {name: PROMPTS.get(name) | llm for name in PROMPTS.names()}
+        for name, schema in STRUCTURED_SCHEMAS.items():
+            tool = schema.__name__
+            prompt = PROMPTS.get(name) + STRUCTURED_OUTPUT_INSTRUCTION.format(tool=tool)
+            chains[name + STRUCTURED_SUFFIX] = prompt | llm.bind_tools(
+                [schema], tool_choice=tool
+            )
+        return chains
+
+    def _chain_name(self, prompt_name: str) -> str:
+        """启用结构化输出 (openai.structured_output) 时使用工具调用处理链"""
+        if prompt_name in STRUCTURED_SCHEMAS and self.config.get(
+            'openai', 'structured_output', default=True
+        ):
+            return prompt_name + STRUCTURED_SUFFIX
+        return prompt_name
+
+    def _route(self, method: str, text: str) -> Tuple[str, str]:
+        """选择模型级别
+
+        Returns:
+            Tuple[str, str]: (级别, 原因)，未配置小模型时始终为大模型
+        """
+        tier, reason = self.router.choose(method, text)
+        if tier not in self.pools:
+            return ModelRouter.LARGE, "未配置小模型"
+        return tier, reason
+
+    def _chain_fingerprint(self, chain_name: str) -> str:
+        """处理链指纹
+
+        普通处理链为提示词模板指纹；结构化输出处理链 (<名称>.structured)
+        另外包含追加的说明和工具 schema，两种输出方式的缓存互不混用。
+        """
+        fingerprint = self._chain_fingerprints.get(chain_name)
+        if fingerprint is None:
+            prompt_name = chain_name.split(".")[0]
+            fingerprint = PROMPTS.fingerprint(prompt_name)
+            if chain_name.endswith(STRUCTURED_SUFFIX):
+                schema = STRUCTURED_SCHEMAS[prompt_name]
+                structured = STRUCTURED_OUTPUT_INSTRUCTION.format(
+                    tool=schema.__name__
+                ) + json.dumps(
+                    convert_to_openai_tool(schema), ensure_ascii=False, sort_keys=True
+                )
+                fingerprint = hashlib.sha256(
+                    (fingerprint + STRUCTURED_SUFFIX + structured).encode("utf-8")
+                ).hexdigest()
+            self._chain_fingerprints[chain_name] = fingerprint
+        return fingerprint
+
+    def _cache_key(
+        self, method: str, chain_name: str, variables: Dict, tier: str
+    ) -> str:
+        """计算缓存键 (模型 + 方法 + 处理链指纹 + 输入变量)
+
+        模型取该级别主端点的模型: 各端点可配置不同的模型 (endpoints[].model)。
+
+        Args:
+            method: 方法名称
+            chain_name: 实际调用的处理链名称 (_chain_name 的结果)
+            variables: 输入变量
+            tier: 模型级别
+        """
+        pool = self.pools.get(tier) or self.pools[ModelRouter.LARGE]
+        return self.cache.make_key(
+            pool.primary.model,
+            method,
+            self._chain_fingerprint(chain_name),
+            variables,
+        )
+
+    async def _invoke(
+        self,
+        name: str,
+        variables: Dict,
+        route: Tuple[str, str],
+        on_progress: Optional[Callable] = None,
+    ) -> str:
+        """在路由选定的端点池上调用链并返回模型输出文本
+
+        结构化输出处理链返回工具调用参数 (JSON 文本)。
+        提供 on_progress 且启用流式输出 (openai.streaming) 时使用 astream，
+        边接收边解析，已完整的字段有变化时回调 on_progress(partial)；
+        流式调用不支持对冲，方法启用对冲请求 (_should_hedge) 时改用非流式调用，
+        不展示中间进度。
+        调用完成后记录路由、耗时和 token 用量。
+
+        Args:
+            name: 处理链名称 (提示词名称，或 _chain_name 的结果)
+            variables: 输入变量
+            route: _route 的结果 (级别, 原因)
+            on_progress: 进度回调 (同步或异步)，参数为 StreamingResultParser 的快照
+
+        Returns:
+            str: 模型输出的完整文本
+        """
+        structured = name.endswith(STRUCTURED_SUFFIX)
+        method = name.split(".")[0]
+        if method.startswith("analyze_content"):
+            method = "analyze_content"
+        tier, reason = route
+        if tier not in self.pools:
+            # 路由之后配置热加载移除了小模型
+            tier = ModelRouter.LARGE
+        pool = self.pools[tier]
+        start = time.monotonic()
+        hedge = self._should_hedge(method)
+
+        if (
+            on_progress is None
+            or hedge
+            or not self.config.get('openai', 'streaming', default=True)
+        ):
+            result, endpoint = await pool.invoke(name, variables, hedge=hedge)
+            self.router.record(
+                method,
+                tier,
+                endpoint.model,
+                reason,
+                time.monotonic() - start,
+                getattr(result, 'usage_metadata', None),
+            )
+            return message_text(result)
+
+        parser = StreamingToolCallParser() if structured else StreamingResultParser()
+        usage = None
+        endpoint = pool.primary
+        async for chunk, endpoint in pool.stream(name, variables):
+            if getattr(chunk, 'usage_metadata', None):
+                usage = chunk.usage_metadata
+            partial = parser.feed(chunk_text(chunk))
+            if partial is None:
+                continue
+            try:
+                result = on_progress(partial)
+                if inspect.isawaitable(result):
+                    await result
+            except Exception as e:
+                # 进度展示失败不影响结果
+                self.logger.warning(f"流式进度回调失败: {e}")
+
+        self.router.record(
+            method, tier, endpoint.model, reason, time.monotonic() - start, usage
+        )
+        return parser.text
 
     def replace_json_booleans_to_python(func):
         """装饰器: 替换JSON字符串中的布尔值表示
@@ -102,50 +377,53 @@ class LLMService:
                 }
         """
         try:
-            prompt = ChatPromptTemplate.from_messages(
-                [
-                    (
-                        "human",
-                        """
-                        You are a text analysis AI tasked with examining a given text to determine if it contains URLs and/or readable content. Additionally, you will extract any URLs present in the text. Here's the text you need to analyze:
-                        <user_text>
-                        {user_text}
-                        </user_text>
-                        Please follow these steps to analyze the text:
-                        1. Examine the text for the presence of URLs and readable content.
-                        2. If URLs are present, extract them.
-                        3. Determine the boolean values for "contains_url" and "contains_text".
-                        4. Format the results as a JSON string.
-                        After your examination, provide the final output as a JSON string. The JSON should have the following structure: 
-                        {{
-                        "contains_url": boolean,
-                        "contains_text": boolean,
-                        "urls": [array of strings, only present if contains_url is true]
-                        }}
-                        Where:
-                        - "contains_url" is true if the text contains at least one URL, and false otherwise.
-                        - "contains_text" is true if the text contains any normal, readable content (excluding URLs), and false otherwise.
-                        - "urls" is an array of strings containing all URLs found in the text, only present if contains_url is true.
-                        Remember to base your analysis solely on the provided user_text and do not make any assumptions about content that isn't present in the input.
-                        """,
-                    ),
-                ]
+            output = await self._invoke(
+                "url_text_analyzer",
+                {"user_text": user_text},
+                self._route("url_text_analyzer", user_text),
             )
+            return self.json_parser.parse(output)
+        except Exception as e:
+            self.logger.error(f"文本预检失败: {e}", exc_info=True)
+            raise
+
+    async def precheck(self, user_text: str) -> Dict:
+        """内容预检: 判断是否包含 URL 和可读文本
 
-            chain = prompt | self.llm | self.json_parser
+        优先使用本地规则判断，只有无法确定时才调用 url_text_analyzer
+        (可通过 openai.precheck_llm_fallback 关闭)。LLM 调用失败时使用本地结果。
+
+        Args:
+            user_text: 用户输入的文本
 
-            result = await chain.ainvoke({"user_text": user_text})
+        Returns:
+            Dict: 格式同 url_text_analyzer
+        """
+        result, ambiguous = self.prechecker.analyze(user_text)
+        if not ambiguous or not self.config.get(
+            'openai', 'precheck_llm_fallback', default=True
+        ):
             return result
+
+        self.prechecker.record_fallback()
+        try:
+            return await self.url_text_analyzer(user_text)
         except Exception as e:
-            self.logger.error(f"文本预检失败: {e}", exc_info=True)
-            raise
+            self.logger.warning(f"LLM 预检失败，使用本地结果: {e}")
+            return result
 
-    async def format_content(self, content: str, background: str = "") -> Dict:
+    async def format_content(
+        self,
+        content: str,
+        background: str = "",
+        on_progress: Optional[Callable] = None,
+    ) -> Dict:
         """格式化内容
 
         Args:
             content: 要分析的内容
             background: 用户背景信息
+            on_progress: 流式进度回调，参数为已解析出的部分结果 (title、tags 等)
 
         Returns:
             Dict: {
@@ -159,149 +437,34 @@ class LLMService:
         """
         try:
             current_time = datetime.now()
+            route = self._route("format_content", content)
 
-            prompt = ChatPromptTemplate.from_messages(
-                [
-                    (
-                        "human",
-                        """
-                    你是一个内容分析助手，专门用于分析用户生成的内容并提供结构化的JSON输出。请仔细阅读以下信息和指令：
-                    当前时间：
-                    <current_time>
-                    {current_time}
-                    </current_time>
-                    用户背景：
-                    <background>
-                    {background}
-                    </background>
-
-                    需要分析的内容：
-                    <user_content>
-                    {content}
-                    </user_content>
-
-                    你的任务是分析上述内容，并生成一个包含以下字段的JSON输出：
-
-                    1. content_type: 根据以下类别确定内容类型：
-                    - "Diary"：记录今天的事件
-                    - "Thought"：突发的想法或反思
-                    - "Note"：一般性笔记
-                    - "Favorite"：需要收藏的内容（通常包含URL）
-
-                    2. title: 生成一个反映内容的简短标题：
-                    - 最多20个字符
-                    - 突出关键信息
-                    - 易于理解和记忆
-                    - 保持客观，避免推测
-
-                    3. summary: 提供内容的简明摘要：
-                    - 不超过100个字符
-                    - 包括主要观点和关键信息
-                    - 清晰简洁
-                    - 保持客观，避免推测
-
-                    4. format_content: 格式化原始内容：
-                    - 保持原意
-                    - 优化布局和结构
-                    - 添加适当的段落和标点
-                    - 修正明显错误
-
-                    5. tags: 创建一个标签数组：
-                    - 3-5个关键词标签
-                    - 反映内容主题和类型
-                    - 便于分类和检索
-
-                    格式要求：
-                    - 对所有字符串使用双引号
-                    - 对布尔值使用true/false
-                    - 确保输出是有效的JSON格式
-
-                    在提供最终JSON输出之前，请在<analysis>标签内进行详细分析。在你的分析中，请按照以下步骤进行：
-
-                    1. 内容类型分析：
-                    - 列出支持每种可能内容类型的关键词或特征
-                    - 确定最可能的内容类型
-                    - 如果可能是"收藏"类型，检查是否包含URL
-
-                    2. 标题创建：
-                    - 列出3-5个可能的标题选项
-                    - 解释每个选项如何反映内容
-                    - 选择最佳标题并说明原因
-
-                    3. 摘要生成：
-                    - 列出内容中的主要观点和关键信息
-                    - 将这些信息压缩成不超过100个字符的摘要
-                    - 确保摘要客观且不包含推测
-
-                    4. 内容格式化：
-                    - 指出需要优化的部分
-                    - 说明如何改进布局和结构
-                    - 列出任何需要修正的明显错误
-                    - 按照user_content原语种，保持原意不变
-
-                    5. 标签生成：
-                    - 列出6-8个可能的标签
-                    - 解释每个标签如何反映内容的主题或类型
-                    - 选择最合适的3-5个标签
-
-                    请提供你的分析和最终输出。使用<json>和</json>标签包围最终的JSON输出。
-
-                    以下是预期输出的结构示例（请注意，这只是一个通用的结构示例，你的实际输出应该基于给定的内容）：
-                    <result>
-                        <analysis>
-                        </analysis>
-                        <json>
-                        {{
-                        "content_type": "类型",
-                        "title": "标题",
-                        "summary": "摘要",
-                        "format_content": "格式化后的内容",
-                        "tags": ["标签1", "标签2", "标签3"]
-                        }}
-                        </json>
-                    </result>
-                    现在，请开始你的分析和输出。
-                    """,
-                    ),
-                ]
-            )
-
-            # 创建一个LangChain链,将prompt和llm模型串联起来
-            # prompt: 包含系统提示和用户输入的提示模板
-            # self.llm: LLM模型实例
-            # | 操作符用于将prompt和llm连接成一个处理链
-            chain = prompt | self.llm
+            variables = {
+                "current_time": current_time,
+                "background": background,
+                "content": content,
+            }
 
-            # 1. 获取原始结果
-            raw_result = await chain.ainvoke(
-                {
-                    "current_time": current_time,
-                    "background": background,
-                    "content": content,
-                }
+            # 相同内容在同一天内的分析结果可以复用
+            chain_name = self._chain_name("format_content")
+            cache_key = self._cache_key(
+                "format_content",
+                chain_name,
+                {**variables, "current_time": current_time.strftime("%Y-%m-%d")},
+                route[0],
             )
+            cached = self.cache.get("format_content", cache_key)
+            if cached is not None:
+                self.logger.info("格式化内容命中缓存")
+                return cached
 
-            try:
-                # 获取原始内容
-                xml_content = (
-                    raw_result.content
-                    if hasattr(raw_result, 'content')
-                    else str(raw_result)
-                )
-
-                # 使用正则表达式提取 json 标签中的内容
-                json_pattern = r'<json>\s*({[\s\S]*?})\s*</json>'
-                json_match = re.search(json_pattern, xml_content, re.DOTALL)
+            # 1. 获取原始结果 (工具调用参数或 XML 文本)
+            output = await self._invoke(chain_name, variables, route, on_progress)
 
-                if json_match:
-                    json_str = json_match.group(1).strip()
-                    # 解析 JSON 字符串
-                    result = json.loads(json_str)
-
-                    return result
-                else:
-                    self.logger.error("无法找到json标签内容")
-                    raise ValueError("无法找到json标签内容")
+            try:
+                result = self._parse_note(output)
+                self.cache.set("format_content", cache_key, result)
+                return result
 
             except Exception as e:
                 self.logger.error(f"解析结果失败: {e}", exc_info=True)
@@ -321,34 +484,78 @@ class LLMService:
             str: 优化后的文本
         """
         try:
-            prompt = ChatPromptTemplate.from_messages(
-                [
-                    (
-                        "system",
-                        """你是一个文本校对助手。
-                        请对输入的文本进行校对和优化:
-                        1. 修正错别字和语法错误
-                        2. 优化语言表达
-                        3. 保持原意不变
-                        4. 确保文本通顺易读
-
-                        直接返回优化后的文本，不需要解释修改内容。""",
-                    ),
-                    ("human", "{text}"),
-                ]
+            route = self._route("proofread_text", text)
+            cache_key = self._cache_key(
+                "proofread_text", "proofread_text", {"text": text}, route[0]
             )
+            cached = self.cache.get("proofread_text", cache_key)
+            if cached is not None:
+                return cached
 
-            chain = prompt | self.llm
-
-            result = await chain.ainvoke({"text": text})
-            return result.content.strip()
+            result = await self._invoke("proofread_text", {"text": text}, route)
+            result = result.strip()
+            self.cache.set("proofread_text", cache_key, result)
+            return result
 
         except Exception as e:
             self.logger.error(f"文本校对失败: {e}", exc_info=True)
             raise
 
+    @staticmethod
+    def _tag_section(output: str, tag: str) -> Optional[str]:
+        """取出 <tag> 标签内的文本，缺少结束标签 (输出被截断) 时取到末尾"""
+        start = output.rfind(f"<{tag}>")
+        if start == -1:
+            return None
+        start += len(tag) + 2
+        end = output.find(f"</{tag}>", start)
+        return output[start : end if end != -1 else None]
+
+    def _parse_note(self, output: str) -> Dict:
+        """从模型输出中解析笔记字段
+
+        结构化输出时 output 为工具调用参数，否则从 <json> 标签中解析；
+        JSON 不完整或不规范时先用 repair_json 修复。
+
+        Raises:
+            ValueError: 无法解析或缺少标题
+        """
+        section = self._tag_section(output, "json")
+        data = repair_json(section if section is not None else output)
+        if not isinstance(data, dict):
+            self.logger.error("无法找到json标签内容")
+            raise ValueError("无法找到json标签内容")
+        return parse_note(data)
+
+    def _parse_tasks(self, output: str) -> Optional[List[Dict]]:
+        """从模型输出中解析任务列表
+
+        结构化输出时从工具调用参数的 tasks 字段解析，否则从 <tasks> 标签中解析。
+        格式不正确的单个任务会被跳过。
+
+        Returns:
+            List[Dict]: 任务列表
+            None: 找不到任务列表或解析失败
+        """
+        section = self._tag_section(output, "tasks")
+        data = repair_json(section if section is not None else output)
+        if isinstance(data, dict):
+            data = data.get("tasks")
+        if not isinstance(data, list):
+            self.logger.error("无法解析任务列表")
+            return None
+
+        tasks, skipped = parse_task_items(data)
+        if skipped:
+            self.logger.warning(f"跳过 {skipped} 个格式不正确的任务")
+        return tasks
+
     async def extract_tasks(
-        self, content: str, profile: str, projects: str
+        self,
+        content: str,
+        profile: str,
+        projects: str,
+        on_progress: Optional[Callable] = None,
     ) -> List[Dict]:
         """提取任务
 
@@ -356,6 +563,7 @@ class LLMService:
             content: 文本内容
             profile: 用户介绍，默认为空字符串
             projecs: 项目列表的JSON字符串，默认为空数组字符串
+            on_progress: 流式进度回调，参数中的 tasks 为已完整输出的任务标题
 
         Returns:
             List[Dict]: 任务列表，每个任务包含:
@@ -365,292 +573,112 @@ class LLMService:
                 - priority: 优先级(0-3)
         """
         try:
-            current_time = datetime.now()
-
-            # 构建详细的时间映射
-            weekday_map = {
-                0: {
-                    "cn": "周一",
-                    "next": current_time + timedelta(days=(7 - current_time.weekday())),
-                },
-                1: {
-                    "cn": "周二",
-                    "next": current_time
-                    + timedelta(days=(7 - current_time.weekday() + 1)),
-                },
-                2: {
-                    "cn": "周三",
-                    "next": current_time
-                    + timedelta(days=(7 - current_time.weekday() + 2)),
-                },
-                3: {
-                    "cn": "周四",
-                    "next": current_time
-                    + timedelta(days=(7 - current_time.weekday() + 3)),
-                },
-                4: {
-                    "cn": "周五",
-                    "next": current_time
-                    + timedelta(days=(7 - current_time.weekday() + 4)),
-                },
-                5: {
-                    "cn": "周六",
-                    "next": current_time
-                    + timedelta(days=(7 - current_time.weekday() + 5)),
-                },
-                6: {
-                    "cn": "周日",
-                    "next": current_time
-                    + timedelta(days=(7 - current_time.weekday() + 6)),
-                },
-            }
-
-            # 构建时间信息字典
-            time_info = {
-                "current": {
-                    "datetime": current_time.strftime("%Y-%m-%d %H:%M:%S"),
-                    "date": current_time.strftime("%Y-%m-%d"),
-                    "time": current_time.strftime("%H:%M:%S"),
-                    "hour": current_time.hour,
-                    "weekday": weekday_map[current_time.weekday()]["cn"],
-                },
-                "tomorrow": {
-                    "date": (current_time + timedelta(days=1)).strftime("%Y-%m-%d"),
-                    "weekday": weekday_map[(current_time.weekday() + 1) % 7]["cn"],
-                },
-                "next_week": {
-                    "monday": (
-                        current_time + timedelta(days=(7 - current_time.weekday()))
-                    ).strftime("%Y-%m-%d"),
-                    "dates": {
-                        day["cn"]: day["next"].strftime("%Y-%m-%d")
-                        for _, day in weekday_map.items()
-                    },
-                },
+            time_context = get_time_context()
+            route = self._route("extract_tasks", content)
+
+            variables = {
+                **time_context,
+                "profile": profile,
+                "text": content,
+                "projects": projects,
             }
 
-            # 1. 首先构建所有需要的时间相关变量
-            current_datetime = current_time.strftime("%Y-%m-%d %H:%M:%S")
-            current_weekday = weekday_map[current_time.weekday()]["cn"]
-            tomorrow_date = (current_time + timedelta(days=1)).strftime("%Y-%m-%d")
-            tomorrow_weekday = weekday_map[(current_time.weekday() + 1) % 7]["cn"]
-            next_week_monday = (
-                current_time + timedelta(days=(7 - current_time.weekday()))
-            ).strftime("%Y-%m-%d")
-            next_week_friday = weekday_map[4]["next"].strftime("%Y-%m-%d")
-
-            # 构建时间映射响应
-            next_week_dates = []
-            for i in range(7):
-                date_str = weekday_map[i]["next"].strftime("%Y-%m-%d")
-                next_week_dates.append(f"- {weekday_map[i]['cn']}: {date_str}")
-
-            response = "\n".join(next_week_dates)
-
-            # 2. 构建下周日期字符串
-            next_week_dates = response
-
-            # 3. 使用更简单的变量名在提示词模板中
-            prompt = ChatPromptTemplate.from_messages(
-                [
-                    (
-                        "human",
-                        """
-                        你是一名任务分析助手。你的工作是仔细阅读给定的文本，并提取其中提到或隐含的所有可能的任务，这将有助于用户从各类文档中明确行动事项和责任。
-                        以下是时间和星期信息:
-                        <time>
-                        - 现在是: {datetime} {weekday}
-                        - 明天是: {tomorrow} {tomorrow_weekday}
-                        - 下周一: {next_monday}
-                        - 下周五: {next_friday}
-                        - 下周日期对应:
-                        {week_dates}
-                        </time>
-                        用户资料：
-                        <user_profile>
-                        {profile}
-                        </user_profile>
-                        重要说明：
-                        1. 不要基于背景信息添加额外的任务
-                        2. 背景信息仅用于更好地理解上下文
-                        以下是需要分析的文本：
-                        <text>
-                        {text}
-                        </text>
-                        文本中提到的任何明确或隐含的任务、行动、想法,都需要仔细分析是否包含以下任务：
-                        A. 显式任务：
-                            - 明确的时间安排（如：明天下午3点开会）
-                            - 明确的待办事项（如：需要修复bug）
-                            - 明确的截止时间（如：本周五前完成）
-                        B. 隐式任务：
-                            - 记录中提到的后续工作和前置任务（如：之后要跟进这个问题）
-                            - 计划和打算（如：打算研究一下个技术）
-                            - 需要关注的事项（如：这个方案值得研究）
-                            - 需要收集的信息（如：收集一些资料）
-                            - 想要做的事情（如：想要研究一下新技术）
-                        C. 学习任务：
-                            - 技术学习（如：要学习Redis）
-                            - 研究计划（如：研究性能优化方案）
-                            - 知识积累（如：了解新特性）
-                        D. 复习任务：
-                            - 需要回顾的内容
-                            - 需要整理的笔记
-                            - 需要复习的知识点
-
-                        对于每一个识别出的任务，你必须仔细分析提取原因、任务类型、时间安排，并在1到10的范围内给定一个置信分数。只有置信分数大于6的任务才应包含在最终输出结果中。
-
-                        以下是项目列表，请从中选择一个项目，完整引用：
-                        <projec_list>
-                        {projects}
-                        </projec_list>
-
-                        对于每个符合置信度阈值的任务，创建一个具有以下结构的JSON对象：
-                        {{
-                        "projectId": "字符串",
-                        "title": "字符串",
-                        "isAllDay": 布尔值,
-                        "content": "字符串",
-                        "dueDate": "字符串（日期时间格式）",
-                        "priority": 整数,
-                        "reminders": []
-                        }}
-                        在构建JSON时，请遵循以下准则：
-                        1. 对于日期时间字段，使用格式“yyyy-MM-dd'T'HH:mm:ssZ”（例如，“2023-06-15T14:30:00+0800”）。
-                            时间理解规则：
-                            1. 基础时间段默认值：
-                            - 早上/上午: 09:00:00
-                            - 中午: 12:00:00
-                            - 下午: 14:00:00
-                            - 晚上: 19:00:00
-
-                            2. 周期性时间计算规则：
-                            A. "下周X"的计算：
-                                - 必须从下一个完整自然周的周一开始计算
-                                - 示例（今天是）：{datetime} {weekday}
-                                    * "下周一" = {next_monday}
-                                    * "下周五" = {next_friday}
-                                - 特殊情况：即使当前是周日，"下周X"仍从下一个完整周计算
-
-                            B. "本周X"的计算：
-                                - 默认指代本周对应日期
-                                - 如果指定日期已过，自动顺延到下周对应日期
-                                - 示例（假设今天是周三）：
-                                    * "本周二" = 已过，顺延到下周二
-                                    * "本周五" = 本周五
-                                - 特殊情况：周日被视为一周的最后一天
-
-                            3. 相对时间计算：
-                            A. "明天/后天"规则：
-                                - <b>凌晨时段(0:00-5:00)提到"!明天!、明早"：保持当天日期，也就是{datetime},不要增加自然日</b>
-                                - 其他时段：自然日+1
-                                - 示例：
-                                    * 凌晨2点说"明天上午"：当天上午
-                                    * 下午说"明天上午"：次日上午
-
-                            B. "X天后"规则：
-                                - 精确按自然日计算
-                                - 示例：
-                                    * "3天后" = 当前日期+3天
-
-                            4. 模糊时间处理：
-                            - 只有日期没有具体时间：设置为全天事件(isAllDay=true)
-                            - "月底"：当月最后一天23:59:59
-                            - "月初"：次月1日09:00:00
-                            - "晚些时候"：当天19:00:00
-                            - "过几天"：3天后09:00:00
-                        2. 对于优先级，使用以下取值：无：0，低：1，中：3，高：5。
-                        3. projectId只能有一个,从projec_list中选取，完整引用。
-                        4. reminders 是提醒规则。Example : [ "TRIGGER:P0DT1H0M0S", "TRIGGER:PT0S" ]。解释：在事件开始前1小时，和事件发生时提醒。由你来灵活分析提醒时间，需要合理规划，给出理由。
-                        5. 未明确说明时间的，去除dueDate，reminders，isAllDay字段。
-
-                        以下是表示一个任务的示例：
-                        {{
-                        "projectId": "购物",
-                        "title": "购买食品杂货",
-                        "isAllDay": false,
-                        "content": "购买牛奶、鸡蛋和面包",
-                        "dueDate": "2023-06-16T18:00:00+0800",
-                        "reminders": ["TRIGGER:PT0S"]
-                        "priority": 3,
-                        }}
-                        在创建最终的JSON对象之前，将你的任务提取过程用<task_extraction_process>标签包裹起来。
-                        分析完文本后，请按以下格式输出结果：
-                        <result>
-                        <task_extraction_process>
-                        [对每个任务的详细分析，包括时间计算和推理过程，特别注意周几，下周几的推算规则，下周X一律按下一个完整周计算,凌晨时段的收到的明早，明天，一律保持当天日期，不要增加自然日]
-                        </task_extraction_process>
-                        <tasks>
-                        [
-                        {{任务1的JSON对象}},
-                        {{任务2的JSON对象}},
-                        ...
-                        ]
-                        </tasks>
-
-                        如果文本中未发现任务，则输出一个空数组：
-                        <tasks>
-                        []
-                        </tasks>
-                        </result>
-                        """,
-                    ),
-                ]
+            # 相对时间 (明天、下周X、凌晨规则) 依赖当前日期和小时，缓存键精确到小时
+            chain_name = self._chain_name("extract_tasks")
+            cache_key = self._cache_key(
+                "extract_tasks",
+                chain_name,
+                {**variables, "datetime": time_context["datetime"][:13]},
+                route[0],
             )
+            cached = self.cache.get("extract_tasks", cache_key)
+            if cached is not None:
+                self.logger.info(f"提取任务命中缓存: {len(cached)} 个任务")
+                return cached
+
+            # 获取原始内容 (工具调用参数或 XML 文本)
+            output = await self._invoke(chain_name, variables, route, on_progress)
+            result = self._parse_tasks(output)
+            if result is None:
+                result = []
+            else:
+                self.cache.set("extract_tasks", cache_key, result)
 
-            chain = prompt | self.llm
-            # 在调用 chain.ainvoke() 之前，我们可以先获取并打印提示词
-            formatted_prompt = await prompt.ainvoke(
-                {
-                    "datetime": current_datetime,
-                    "weekday": current_weekday,
-                    "tomorrow": tomorrow_date,
-                    "tomorrow_weekday": tomorrow_weekday,
-                    "next_monday": next_week_monday,
-                    "next_friday": next_week_friday,
-                    "week_dates": next_week_dates,
-                    "profile": profile,
-                    "text": content,
-                    "projects": projects,
-                }
-            )
+            self.logger.info(f"提取到 {len(result)} 个任务 \n {result}")
+            return result
 
-            result = await chain.ainvoke(
-                {
-                    "datetime": current_datetime,
-                    "weekday": current_weekday,
-                    "tomorrow": tomorrow_date,
-                    "tomorrow_weekday": tomorrow_weekday,
-                    "next_monday": next_week_monday,
-                    "next_friday": next_week_friday,
-                    "week_dates": next_week_dates,
-                    "profile": profile,
-                    "text": content,
-                    "projects": projects,
-                }
+        except Exception as e:
+            self.logger.error(f"提取任务失败: {e}", exc_info=True)
+            raise
+
+    async def analyze_content(
+        self,
+        content: str,
+        background: str = "",
+        profile: str = "",
+        projects: str = "",
+        extract_tasks: bool = True,
+        on_progress: Optional[Callable] = None,
+    ) -> Dict:
+        """一次调用完成内容格式化和任务提取
+
+        合并 format_content 和 extract_tasks 的提示词，内容和用户背景只发送一次。
+
+        Args:
+            content: 要分析的内容
+            background: 用户背景信息
+            profile: 用户介绍
+            projects: 项目名称列表
+            extract_tasks: 是否提取任务，为 False 时 tasks 为空列表
+            on_progress: 流式进度回调，依次得到 title、tags、tasks 等部分结果
+
+        Returns:
+            Dict: format_content 的结果字段，另加:
+                - tasks (List[Dict]): 任务列表，格式同 extract_tasks
+        """
+        try:
+            time_context = get_time_context()
+            route = self._route("analyze_content", content)
+
+            prompt_name = (
+                "analyze_content" if extract_tasks else "analyze_content_no_tasks"
             )
+            variables = {
+                **time_context,
+                "background": background,
+                "profile": profile,
+                "content": content,
+                "projects": projects,
+            }
 
-            # 获取原始内容
-            xml_content = result.content if hasattr(result, 'content') else str(result)
+            # 与 extract_tasks 相同，缓存键中的时间精确到小时
+            chain_name = self._chain_name(prompt_name)
+            cache_key = self._cache_key(
+                "analyze_content",
+                chain_name,
+                {**variables, "datetime": time_context["datetime"][:13]},
+                route[0],
+            )
+            cached = self.cache.get("analyze_content", cache_key)
+            if cached is not None:
+                self.logger.info("合并分析命中缓存")
+                return cached
 
-            # 使用正则表达式提取 tasks 标签中的内容
-            json_pattern = r'<tasks>\s*\[([\s\S]*?)\]\s*</tasks>'
-            json_match = re.search(json_pattern, xml_content, re.DOTALL)
+            output = await self._invoke(chain_name, variables, route, on_progress)
 
-            result = []
-            if json_match:
-                json_str = f"[{json_match.group(1).strip()}]"
-                # 解析 JSON 字符串为任务列表
-                try:
-                    result = json.loads(json_str)
-                except json.JSONDecodeError as e:
-                    self.logger.error(f"JSON解析失败: {e}")
-                    result = []
+            result = self._parse_note(output)
+            tasks = self._parse_tasks(output) if extract_tasks else []
+            result["tasks"] = tasks or []
+            if tasks is not None:
+                self.cache.set("analyze_content", cache_key, result)
 
-            self.logger.info(f"提取到 {len(result)} 个任务 \n {result}")
+            self.logger.info(
+                f"合并分析完成: {result.get('title')}, 提取到 {len(result['tasks'])} 个任务"
+            )
             return result
 
         except Exception as e:
-            self.logger.error(f"提取任务失败: {e}", exc_info=True)
+            self.logger.error(f"合并分析失败: {e}", exc_info=True)
             raise
 
     async def analyze_text_with_media(self, text: str, media_files: List[Dict]) -> Dict:
@@ -676,35 +704,12 @@ class LLMService:
                 ]
             )
 
-            prompt = ChatPromptTemplate.from_messages(
-                [
-                    (
-                        "system",
-                        """你是一个多模态内容分析助手。
-
-需要分析的内容:
-1. 文本内容
-2. 媒体文件:
-{media_desc}
-
-请提供JSON格式的分析结果，包含:
-1. text: 分析后的文本
-2. summary: 100字以内的内容总结
-3. media_analysis: 媒体分析结果数组，每项包含:
-   - type: 文件类型
-   - description: 分析描述
-
-格式要求:
-- 所有字符串使用双引号
-- 确保输出是有效的JSON格式""",
-                    ),
-                    ("human", "{text}"),
-                ]
+            output = await self._invoke(
+                "analyze_text_with_media",
+                {"media_desc": media_desc, "text": text},
+                self._route("analyze_text_with_media", text),
             )
-
-            chain = prompt | self.llm | self.json_parser
-
-            result = await chain.ainvoke({"media_desc": media_desc, "text": text})
+            result = self.json_parser.parse(output)
 
             self.logger.info("多模态内容分析完成")
             return result
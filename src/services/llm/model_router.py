@@ -0,0 +1,169 @@
+import re
+import threading
+from typing import Dict, Optional, Tuple
+from ...utils.logger import Logger
+from ...utils.config_manager import ConfigManager
+
+
+class ModelRouter:
+    """模型分级路由
+
+    按方法和输入内容在小模型 (small) 和大模型 (large) 之间选择:
+    - small: 始终使用小模型
+    - large: 始终使用大模型
+    - auto: 输入较短且结构简单时使用小模型，较长或较复杂时使用大模型
+
+    并按方法、级别记录调用次数、耗时、token 用量和估算费用。
+
+    配置 (openai 段):
+        models: {small: 小模型, large: 大模型}，未配置 small 时全部使用大模型
+        routing: 方法 -> small/large/auto，覆盖 DEFAULT_POLICIES
+        routing_max_chars: auto 时小模型可处理的最大字符数，默认 500
+        routing_max_lines: auto 时小模型可处理的最大行数，默认 15
+        model_prices: 模型 -> {input, output}，每百万 token 的价格
+    """
+
+    SMALL = "small"
+    LARGE = "large"
+
+    DEFAULT_POLICIES = {
+        "url_text_analyzer": "small",
+        "proofread_text": "auto",
+        "format_content": "auto",
+        "extract_tasks": "auto",
+        "analyze_content": "large",
+        "analyze_text_with_media": "large",
+    }
+
+    # 代码块、表格等需要保留结构的内容
+    STRUCTURED_PATTERN = re.compile(r"```|^\s*\|.*\|\s*$", re.MULTILINE)
+
+    # 时间表达，数量较多时任务拆分和日期推算容易出错
+    TIME_EXPRESSION_PATTERN = re.compile(
+        r"今天|明天|后天|今晚|明晚|下周|下个?月|周[一二三四五六日天]|星期[一二三四五六日天]"
+        r"|上午|下午|晚上|凌晨|\d{1,2}月\d{1,2}[日号]|\d{1,2}[:：点]\d{0,2}"
+    )
+    MAX_TIME_EXPRESSIONS = 6
+
+    def __init__(self):
+        """初始化模型路由"""
+        self.logger = Logger("llm.router")
+        self.config = ConfigManager()
+        self._lock = threading.Lock()
+        # (方法, 级别) -> 统计
+        self._stats: Dict[Tuple[str, str], Dict] = {}
+
+    def get_policy(self, method: str) -> str:
+        """获取方法的路由策略，配置 openai.routing.<method> 优先"""
+        policies = self.config.get("openai", "routing", default={})
+        return policies.get(method, self.DEFAULT_POLICIES.get(method, "large"))
+
+    def choose(self, method: str, text: str) -> Tuple[str, str]:
+        """选择模型级别
+
+        Args:
+            method: 方法名称
+            text: 决定路由的输入文本 (用户内容，不含提示词)
+
+        Returns:
+            Tuple[str, str]: (级别 small/large, 原因)
+        """
+        policy = self.get_policy(method)
+        if policy in (self.SMALL, self.LARGE):
+            return policy, "固定"
+
+        text = text or ""
+        max_chars = self.config.get("openai", "routing_max_chars", default=500)
+        if len(text) > max_chars:
+            return self.LARGE, f"长度 {len(text)} > {max_chars}"
+
+        max_lines = self.config.get("openai", "routing_max_lines", default=15)
+        lines = text.count("\n") + 1
+        if lines > max_lines:
+            return self.LARGE, f"行数 {lines} > {max_lines}"
+
+        if self.STRUCTURED_PATTERN.search(text):
+            return self.LARGE, "包含代码块或表格"
+
+        if method in ("extract_tasks", "analyze_content"):
+            count = len(self.TIME_EXPRESSION_PATTERN.findall(text))
+            if count > self.MAX_TIME_EXPRESSIONS:
+                return self.LARGE, f"时间表达 {count} 处"
+
+        return self.SMALL, "短文本"
+
+    def _estimate_cost(
+        self, model: str, input_tokens: int, output_tokens: int
+    ) -> Optional[float]:
+        """按 openai.model_prices 估算费用，未配置价格时返回 None"""
+        prices = self.config.get("openai", "model_prices", default={}).get(model)
+        if not prices:
+            return None
+        return (
+            input_tokens * prices.get("input", 0)
+            + output_tokens * prices.get("output", 0)
+        ) / 1_000_000
+
+    def record(
+        self,
+        method: str,
+        tier: str,
+        model: str,
+        reason: str,
+        latency: float,
+        usage: Optional[Dict] = None,
+    ) -> None:
+        """记录一次路由调用
+
+        Args:
+            method: 方法名称
+            tier: 模型级别
+            model: 实际使用的模型
+            reason: 路由原因
+            latency: 耗时(秒)
+            usage: token 用量 {input_tokens, output_tokens}，模型未返回时为 None
+        """
+        input_tokens = (usage or {}).get("input_tokens", 0)
+        output_tokens = (usage or {}).get("output_tokens", 0)
+        cost = self._estimate_cost(model, input_tokens, output_tokens)
+
+        with self._lock:
+            stats = self._stats.setdefault(
+                (method, tier),
+                {
+                    "model": model,
+                    "calls": 0,
+                    "total_latency": 0.0,
+                    "input_tokens": 0,
+                    "output_tokens": 0,
+                    "cost": 0.0,
+                },
+            )
+            stats["model"] = model
+            stats["calls"] += 1
+            stats["total_latency"] += latency
+            stats["input_tokens"] += input_tokens
+            stats["output_tokens"] += output_tokens
+            stats["cost"] += cost or 0.0
+
+        self.logger.info(
+            f"{method} -> {tier} ({model}, {reason}): 耗时 {latency:.2f}s, "
+            f"tokens {input_tokens}/{output_tokens}"
+            + (f", 费用 {cost:.6f}" if cost is not None else "")
+        )
+
+    def get_stats(self) -> Dict[str, Dict[str, Dict]]:
+        """获取路由统计
+
+        Returns:
+            Dict: 方法 -> 级别 -> model、calls、avg_latency、input_tokens、
+                output_tokens、cost
+        """
+        with self._lock:
+            items = [(key, dict(value)) for key, value in self._stats.items()]
+
+        result: Dict[str, Dict[str, Dict]] = {}
+        for (method, tier), stats in items:
+            stats["avg_latency"] = stats.pop("total_latency") / max(stats["calls"], 1)
+            result.setdefault(method, {})[tier] = stats
+        return result
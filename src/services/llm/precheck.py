@@ -0,0 +1,155 @@
+import re
+import threading
+from typing import Dict, List, Tuple
+from ...utils.logger import Logger
+
+
+class ContentPrecheck:
+    """本地内容预检
+
+    用预编译的正则判断文本是否包含 URL 和可读文本，输出格式与
+    LLMService.url_text_analyzer 相同:
+        {"contains_url": bool, "contains_text": bool, "urls": [...]}
+
+    带协议头 (http/https) 或 www. 开头的链接可以确定识别，路径中可以包含中文；
+    不带协议头的域名 (如 example.com/path) 按顶级域名判断，
+    无法确定是链接还是文件名等内容时标记为不确定，由调用方决定是否交给 LLM 判断。
+    """
+
+    # 链接中允许出现的字符 (RFC 3986，中文等非 ASCII 字符视为链接结束)
+    URL_CHARS = r"[A-Za-z0-9\-._~:/?#\[\]@!$&()*+,;=%]"
+
+    # 带协议头链接的主机部分 (ASCII，到路径、查询或片段开始为止)
+    URL_HOST_CHARS = r"[A-Za-z0-9\-._~:@!$&()*+,;=%\[\]]"
+
+    # 带协议头链接的路径、查询和片段: 允许中文等非 ASCII 字符 (如维基百科链接)，
+    # 遇到空白或中文标点时结束
+    URL_TAIL_CHARS = r"[^\s，。！？；：、（）【】《》「」“”‘’<>\"]"
+
+    # 带协议头或 www. 开头的链接
+    STRONG_URL_PATTERN = re.compile(
+        rf"(?:https?://|www\.){URL_HOST_CHARS}+(?:[/?#]{URL_TAIL_CHARS}*)?",
+        re.IGNORECASE,
+    )
+
+    # 不带协议头的域名 (可带端口和路径)
+    BARE_DOMAIN_PATTERN = re.compile(
+        r"(?<![A-Za-z0-9_@./-])"
+        r"((?:[a-z0-9](?:[a-z0-9-]{0,61}[a-z0-9])?\.)+([a-z]{2,24}))"
+        r"(?![A-Za-z0-9_-])"
+        r"(?::\d{2,5})?"
+        rf"(?:/{URL_CHARS}*)?",
+        re.IGNORECASE,
+    )
+
+    # 链接末尾常见的标点，不属于链接本身
+    TRAILING_PUNCTUATION = ".,;:!?)]}>'\""
+
+    # 可读文本: 字母、数字或中日韩文字
+    TEXT_PATTERN = re.compile(r"[^\W_]", re.UNICODE)
+
+    # 常见顶级域名，不带协议头时也视为链接
+    COMMON_TLDS = frozenset(
+        {
+            "com", "net", "org", "edu", "gov", "io", "ai", "co", "cn", "dev",
+            "app", "me", "info", "xyz", "top", "tv", "cc", "jp", "uk", "de",
+            "fr", "us", "hk", "tw", "sg", "kr", "ru", "so", "gg", "fm", "site",
+            "tech", "blog", "wiki", "news", "link", "page", "cloud",
+        }
+    )
+
+    # 常见文件扩展名，不视为链接
+    FILE_EXTENSIONS = frozenset(
+        {
+            "py", "js", "ts", "md", "txt", "json", "yml", "yaml", "toml", "ini",
+            "cfg", "log", "csv", "xls", "xlsx", "doc", "docx", "ppt", "pptx",
+            "pdf", "png", "jpg", "jpeg", "gif", "webp", "svg", "mp3", "mp4",
+            "mov", "wav", "zip", "tar", "gz", "rar", "exe", "dmg", "apk",
+            "html", "htm", "css", "sh", "bat", "sql", "db", "java", "go", "rs",
+            "cpp", "h", "c", "rb", "php", "vue", "jsx", "tsx", "lock",
+        }
+    )
+
+    def __init__(self):
+        """初始化预检器"""
+        self.logger = Logger("llm.precheck")
+        self._lock = threading.Lock()
+        self._stats = {"total": 0, "local": 0, "ambiguous": 0, "fallback": 0}
+
+    def _clean_url(self, url: str) -> str:
+        """去除链接末尾的标点"""
+        return url.rstrip(self.TRAILING_PUNCTUATION)
+
+    def analyze(self, text: str) -> Tuple[Dict, bool]:
+        """分析文本
+
+        Args:
+            text: 用户输入的文本
+
+        Returns:
+            Tuple[Dict, bool]: (预检结果, 是否不确定)
+                不确定时结果中把可疑的域名也算作链接
+        """
+        text = text or ""
+        urls: List[str] = []
+        ambiguous = False
+
+        remainder = text
+        for match in self.STRONG_URL_PATTERN.finditer(text):
+            urls.append(self._clean_url(match.group(0)))
+        remainder = self.STRONG_URL_PATTERN.sub(" ", remainder)
+
+        for match in self.BARE_DOMAIN_PATTERN.finditer(remainder):
+            tld = match.group(2).lower()
+            if tld in self.FILE_EXTENSIONS:
+                continue
+            if tld not in self.COMMON_TLDS:
+                ambiguous = True
+            urls.append(self._clean_url(match.group(0)))
+        remainder = self.BARE_DOMAIN_PATTERN.sub(
+            lambda m: m.group(0)
+            if m.group(2).lower() in self.FILE_EXTENSIONS
+            else " ",
+            remainder,
+        )
+
+        # 去重并保持顺序
+        urls = list(dict.fromkeys(url for url in urls if url))
+
+        result = {
+            "contains_url": bool(urls),
+            "contains_text": bool(self.TEXT_PATTERN.search(remainder)),
+        }
+        if urls:
+            result["urls"] = urls
+
+        with self._lock:
+            self._stats["total"] += 1
+            if ambiguous:
+                self._stats["ambiguous"] += 1
+            else:
+                self._stats["local"] += 1
+
+        return result, ambiguous
+
+    def record_fallback(self) -> None:
+        """记录一次 LLM 回退"""
+        with self._lock:
+            self._stats["fallback"] += 1
+            stats = dict(self._stats)
+        self.logger.info(
+            f"预检回退到 LLM: {stats['fallback']}/{stats['total']} "
+            f"({stats['fallback'] / max(stats['total'], 1):.1%})"
+        )
+
+    def get_stats(self) -> Dict:
+        """获取预检统计
+
+        Returns:
+            Dict: total (总次数)、local (本地确定)、ambiguous (不确定)、
+                fallback (回退到 LLM)、fallback_rate (回退比例)
+        """
+        with self._lock:
+            stats = dict(self._stats)
+        stats["fallback_rate"] = stats["fallback"] / max(stats["total"], 1)
+        return stats
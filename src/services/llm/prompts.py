@@ -0,0 +1,522 @@
+import hashlib
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import Dict, List, Optional
+from langchain_core.prompts import ChatPromptTemplate
+
+WEEKDAY_NAMES = ("周一", "周二", "周三", "周四", "周五", "周六", "周日")
+
+# 内容预检 (LLM 回退)
+URL_TEXT_ANALYZER_TEMPLATE = """
+                        You are a text analysis AI tasked with examining a given text to determine if it contains URLs and/or readable content. Additionally, you will extract any URLs present in the text. Here's the text you need to analyze:
+                        <user_text>
+                        {user_text}
+                        </user_text>
+                        Please follow these steps to analyze the text:
+                        1. Examine the text for the presence of URLs and readable content.
+                        2. If URLs are present, extract them.
+                        3. Determine the boolean values for "contains_url" and "contains_text".
+                        4. Format the results as a JSON string.
+                        After your examination, provide the final output as a JSON string. The JSON should have the following structure: 
+                        {{
+                        "contains_url": boolean,
+                        "contains_text": boolean,
+                        "urls": [array of strings, only present if contains_url is true]
+                        }}
+                        Where:
+                        - "contains_url" is true if the text contains at least one URL, and false otherwise.
+                        - "contains_text" is true if the text contains any normal, readable content (excluding URLs), and false otherwise.
+                        - "urls" is an array of strings containing all URLs found in the text, only present if contains_url is true.
+                        Remember to base your analysis solely on the provided user_text and do not make any assumptions about content that isn't present in the input.
+                        """
+
+# 内容格式化
+FORMAT_CONTENT_TEMPLATE = """
+                    你是一个内容分析助手，专门用于分析用户生成的内容并提供结构化的JSON输出。请仔细阅读以下信息和指令：
+                    当前时间：
+                    <current_time>
+                    {current_time}
+                    </current_time>
+                    用户背景：
+                    <background>
+                    {background}
+                    </background>
+
+                    需要分析的内容：
+                    <user_content>
+                    {content}
+                    </user_content>
+
+                    你的任务是分析上述内容，并生成一个包含以下字段的JSON输出：
+
+                    1. content_type: 根据以下类别确定内容类型：
+                    - "Diary"：记录今天的事件
+                    - "Thought"：突发的想法或反思
+                    - "Note"：一般性笔记
+                    - "Favorite"：需要收藏的内容（通常包含URL）
+
+                    2. title: 生成一个反映内容的简短标题：
+                    - 最多20个字符
+                    - 突出关键信息
+                    - 易于理解和记忆
+                    - 保持客观，避免推测
+
+                    3. summary: 提供内容的简明摘要：
+                    - 不超过100个字符
+                    - 包括主要观点和关键信息
+                    - 清晰简洁
+                    - 保持客观，避免推测
+
+                    4. format_content: 格式化原始内容：
+                    - 保持原意
+                    - 优化布局和结构
+                    - 添加适当的段落和标点
+                    - 修正明显错误
+
+                    5. tags: 创建一个标签数组：
+                    - 3-5个关键词标签
+                    - 反映内容主题和类型
+                    - 便于分类和检索
+
+                    格式要求：
+                    - 对所有字符串使用双引号
+                    - 对布尔值使用true/false
+                    - 确保输出是有效的JSON格式
+
+                    在提供最终JSON输出之前，请在<analysis>标签内进行详细分析。在你的分析中，请按照以下步骤进行：
+
+                    1. 内容类型分析：
+                    - 列出支持每种可能内容类型的关键词或特征
+                    - 确定最可能的内容类型
+                    - 如果可能是"收藏"类型，检查是否包含URL
+
+                    2. 标题创建：
+                    - 列出3-5个可能的标题选项
+                    - 解释每个选项如何反映内容
+                    - 选择最佳标题并说明原因
+
+                    3. 摘要生成：
+                    - 列出内容中的主要观点和关键信息
+                    - 将这些信息压缩成不超过100个字符的摘要
+                    - 确保摘要客观且不包含推测
+
+                    4. 内容格式化：
+                    - 指出需要优化的部分
+                    - 说明如何改进布局和结构
+                    - 列出任何需要修正的明显错误
+                    - 按照user_content原语种，保持原意不变
+
+                    5. 标签生成：
+                    - 列出6-8个可能的标签
+                    - 解释每个标签如何反映内容的主题或类型
+                    - 选择最合适的3-5个标签
+
+                    请提供你的分析和最终输出。使用<json>和</json>标签包围最终的JSON输出。
+
+                    以下是预期输出的结构示例（请注意，这只是一个通用的结构示例，你的实际输出应该基于给定的内容）：
+                    <result>
+                        <analysis>
+                        </analysis>
+                        <json>
+                        {{
+                        "content_type": "类型",
+                        "title": "标题",
+                        "summary": "摘要",
+                        "format_content": "格式化后的内容",
+                        "tags": ["标签1", "标签2", "标签3"]
+                        }}
+                        </json>
+                    </result>
+                    现在，请开始你的分析和输出。
+                    """
+
+# 文本校对
+PROOFREAD_SYSTEM_TEMPLATE = """你是一个文本校对助手。
+                        请对输入的文本进行校对和优化:
+                        1. 修正错别字和语法错误
+                        2. 优化语言表达
+                        3. 保持原意不变
+                        4. 确保文本通顺易读
+
+                        直接返回优化后的文本，不需要解释修改内容。"""
+
+# 任务提取
+EXTRACT_TASKS_TEMPLATE = """
+                        你是一名任务分析助手。你的工作是仔细阅读给定的文本，并提取其中提到或隐含的所有可能的任务，这将有助于用户从各类文档中明确行动事项和责任。
+                        以下是时间和星期信息:
+                        <time>
+                        - 现在是: {datetime} {weekday}
+                        - 明天是: {tomorrow} {tomorrow_weekday}
+                        - 下周一: {next_monday}
+                        - 下周五: {next_friday}
+                        - 下周日期对应:
+                        {week_dates}
+                        </time>
+                        用户资料：
+                        <user_profile>
+                        {profile}
+                        </user_profile>
+                        重要说明：
+                        1. 不要基于背景信息添加额外的任务
+                        2. 背景信息仅用于更好地理解上下文
+                        以下是需要分析的文本：
+                        <text>
+                        {text}
+                        </text>
+                        文本中提到的任何明确或隐含的任务、行动、想法,都需要仔细分析是否包含以下任务：
+                        A. 显式任务：
+                            - 明确的时间安排（如：明天下午3点开会）
+                            - 明确的待办事项（如：需要修复bug）
+                            - 明确的截止时间（如：本周五前完成）
+                        B. 隐式任务：
+                            - 记录中提到的后续工作和前置任务（如：之后要跟进这个问题）
+                            - 计划和打算（如：打算研究一下个技术）
+                            - 需要关注的事项（如：这个方案值得研究）
+                            - 需要收集的信息（如：收集一些资料）
+                            - 想要做的事情（如：想要研究一下新技术）
+                        C. 学习任务：
+                            - 技术学习（如：要学习Redis）
+                            - 研究计划（如：研究性能优化方案）
+                            - 知识积累（如：了解新特性）
+                        D. 复习任务：
+                            - 需要回顾的内容
+                            - 需要整理的笔记
+                            - 需要复习的知识点
+
+                        对于每一个识别出的任务，你必须仔细分析提取原因、任务类型、时间安排，并在1到10的范围内给定一个置信分数。只有置信分数大于6的任务才应包含在最终输出结果中。
+
+                        以下是项目列表，请从中选择一个项目，完整引用：
+                        <projec_list>
+                        {projects}
+                        </projec_list>
+
+                        对于每个符合置信度阈值的任务，创建一个具有以下结构的JSON对象：
+                        {{
+                        "projectId": "字符串",
+                        "title": "字符串",
+                        "isAllDay": 布尔值,
+                        "content": "字符串",
+                        "dueDate": "字符串（日期时间格式）",
+                        "priority": 整数,
+                        "reminders": []
+                        }}
+                        在构建JSON时，请遵循以下准则：
+                        1. 对于日期时间字段，使用格式“yyyy-MM-dd'T'HH:mm:ssZ”（例如，“2023-06-15T14:30:00+0800”）。
+                            时间理解规则：
+                            1. 基础时间段默认值：
+                            - 早上/上午: 09:00:00
+                            - 中午: 12:00:00
+                            - 下午: 14:00:00
+                            - 晚上: 19:00:00
+
+                            2. 周期性时间计算规则：
+                            A. "下周X"的计算：
+                                - 必须从下一个完整自然周的周一开始计算
+                                - 示例（今天是）：{datetime} {weekday}
+                                    * "下周一" = {next_monday}
+                                    * "下周五" = {next_friday}
+                                - 特殊情况：即使当前是周日，"下周X"仍从下一个完整周计算
+
+                            B. "本周X"的计算：
+                                - 默认指代本周对应日期
+                                - 如果指定日期已过，自动顺延到下周对应日期
+                                - 示例（假设今天是周三）：
+                                    * "本周二" = 已过，顺延到下周二
+                                    * "本周五" = 本周五
+                                - 特殊情况：周日被视为一周的最后一天
+
+                            3. 相对时间计算：
+                            A. "明天/后天"规则：
+                                - <b>凌晨时段(0:00-5:00)提到"!明天!、明早"：保持当天日期，也就是{datetime},不要增加自然日</b>
+                                - 其他时段：自然日+1
+                                - 示例：
+                                    * 凌晨2点说"明天上午"：当天上午
+                                    * 下午说"明天上午"：次日上午
+
+                            B. "X天后"规则：
+                                - 精确按自然日计算
+                                - 示例：
+                                    * "3天后" = 当前日期+3天
+
+                            4. 模糊时间处理：
+                            - 只有日期没有具体时间：设置为全天事件(isAllDay=true)
+                            - "月底"：当月最后一天23:59:59
+                            - "月初"：次月1日09:00:00
+                            - "晚些时候"：当天19:00:00
+                            - "过几天"：3天后09:00:00
+                        2. 对于优先级，使用以下取值：无：0，低：1，中：3，高：5。
+                        3. projectId只能有一个,从projec_list中选取，完整引用。
+                        4. reminders 是提醒规则。Example : [ "TRIGGER:P0DT1H0M0S", "TRIGGER:PT0S" ]。解释：在事件开始前1小时，和事件发生时提醒。由你来灵活分析提醒时间，需要合理规划，给出理由。
+                        5. 未明确说明时间的，去除dueDate，reminders，isAllDay字段。
+
+                        以下是表示一个任务的示例：
+                        {{
+                        "projectId": "购物",
+                        "title": "购买食品杂货",
+                        "isAllDay": false,
+                        "content": "购买牛奶、鸡蛋和面包",
+                        "dueDate": "2023-06-16T18:00:00+0800",
+                        "reminders": ["TRIGGER:PT0S"]
+                        "priority": 3,
+                        }}
+                        在创建最终的JSON对象之前，将你的任务提取过程用<task_extraction_process>标签包裹起来。
+                        分析完文本后，请按以下格式输出结果：
+                        <result>
+                        <task_extraction_process>
+                        [对每个任务的详细分析，包括时间计算和推理过程，特别注意周几，下周几的推算规则，下周X一律按下一个完整周计算,凌晨时段的收到的明早，明天，一律保持当天日期，不要增加自然日]
+                        </task_extraction_process>
+                        <tasks>
+                        [
+                        {{任务1的JSON对象}},
+                        {{任务2的JSON对象}},
+                        ...
+                        ]
+                        </tasks>
+
+                        如果文本中未发现任务，则输出一个空数组：
+                        <tasks>
+                        []
+                        </tasks>
+                        </result>
+                        """
+
+# 合并分析: 内容整理 + 任务提取 (按是否提取任务拼接第二部分)
+ANALYZE_CONTENT_HEAD = """
+                    你是一个内容分析和任务提取助手。请阅读以下信息，一次完成笔记整理和任务提取。
+                    时间信息：
+                    <time>
+                    - 现在是: {datetime} {weekday}
+                    - 明天是: {tomorrow} {tomorrow_weekday}
+                    - 下周日期对应:
+                    {week_dates}
+                    </time>
+                    用户背景 (仅用于理解上下文)：
+                    <background>
+                    {background}
+                    </background>
+                    用户资料：
+                    <user_profile>
+                    {profile}
+                    </user_profile>
+
+                    需要分析的内容：
+                    <user_content>
+                    {content}
+                    </user_content>
+
+                    第一部分：内容整理
+                    1. content_type: "Diary"(记录今天的事件) / "Thought"(想法或反思) / "Note"(一般性笔记) / "Favorite"(需要收藏的内容，通常包含URL)
+                    2. title: 最多20个字符，突出关键信息，保持客观
+                    3. summary: 不超过100个字符，包括主要观点，保持客观
+                    4. format_content: 按原语种格式化原始内容，保持原意，优化段落和标点，修正明显错误
+                    5. tags: 3-5个反映主题和类型的关键词标签
+                    """
+
+ANALYZE_CONTENT_TASKS_SECTION = """
+                    第二部分：任务提取
+                    提取文本中明确或隐含的任务 (时间安排、待办事项、截止时间、后续工作、
+                    计划打算、学习和复习安排)。不要基于背景信息添加额外的任务。
+                    对每个任务在1到10的范围内给出置信分数，只输出置信分数大于6的任务。
+
+                    项目列表 (projectId 只能从中选择一个，完整引用)：
+                    <projec_list>
+                    {projects}
+                    </projec_list>
+
+                    每个任务的JSON结构：
+                    {{
+                    "projectId": "字符串",
+                    "title": "字符串",
+                    "isAllDay": 布尔值,
+                    "content": "字符串",
+                    "dueDate": "yyyy-MM-dd'T'HH:mm:ssZ (例如 2023-06-15T14:30:00+0800)",
+                    "priority": 整数,
+                    "reminders": ["TRIGGER:P0DT1H0M0S", "TRIGGER:PT0S"]
+                    }}
+                    时间规则：
+                    - 早上/上午 09:00，中午 12:00，下午 14:00，晚上 19:00
+                    - "下周X" 一律按下一个完整自然周计算 (下周一 = {next_monday}，下周五 = {next_friday})
+                    - "本周X" 已过时顺延到下周对应日期，周日是一周的最后一天
+                    - 凌晨时段(0:00-5:00)说的"明天、明早"保持当天日期，其他时段自然日+1
+                    - "X天后" 按自然日计算；"过几天" = 3天后 09:00；"晚些时候" = 当天 19:00
+                    - "月底" = 当月最后一天 23:59:59；"月初" = 次月1日 09:00
+                    - 只有日期没有具体时间时 isAllDay=true；未说明时间的去除 dueDate、reminders、isAllDay
+                    优先级取值：无 0，低 1，中 3，高 5。
+                """
+
+ANALYZE_CONTENT_NO_TASKS_SECTION = """
+                    第二部分：任务提取
+                    本次不需要提取任务，tasks 输出空数组。
+                """
+
+ANALYZE_CONTENT_TAIL = """
+                    请先在<analysis>标签内简要分析，然后按以下格式输出 (所有字符串使用双引号，布尔值使用true/false)：
+                    <result>
+                    <analysis>
+                    </analysis>
+                    <json>
+                    {{
+                    "content_type": "类型",
+                    "title": "标题",
+                    "summary": "摘要",
+                    "format_content": "格式化后的内容",
+                    "tags": ["标签1", "标签2", "标签3"]
+                    }}
+                    </json>
+                    <tasks>
+                    [
+                    {{任务1的JSON对象}},
+                    ...
+                    ]
+                    </tasks>
+                    </result>
+                    如果没有任务，输出 <tasks>[]</tasks>。
+                    """
+
+# 多模态内容分析
+MEDIA_ANALYSIS_SYSTEM_TEMPLATE = """你是一个多模态内容分析助手。
+
+需要分析的内容:
+1. 文本内容
+2. 媒体文件:
+{media_desc}
+
+请提供JSON格式的分析结果，包含:
+1. text: 分析后的文本
+2. summary: 100字以内的内容总结
+3. media_analysis: 媒体分析结果数组，每项包含:
+   - type: 文件类型
+   - description: 分析描述
+
+格式要求:
+- 所有字符串使用双引号
+- 确保输出是有效的JSON格式"""
+
+
+class PromptRegistry:
+    """提示词注册表
+
+    负责:
+    1. 提示词模板在导入时编译一次，按名称复用
+    2. 预先计算模板指纹 (sha256)，用于 LLM 响应缓存键
+    """
+
+    def __init__(self, templates: Dict[str, ChatPromptTemplate]):
+        """初始化注册表
+
+        Args:
+            templates: 名称 -> 提示词模板
+        """
+        self._templates = dict(templates)
+        self._fingerprints = {
+            name: self._fingerprint(prompt) for name, prompt in self._templates.items()
+        }
+
+    @staticmethod
+    def _fingerprint(prompt: ChatPromptTemplate) -> str:
+        """计算模板指纹"""
+        template = "\n".join(
+            getattr(getattr(message, "prompt", None), "template", None) or repr(message)
+            for message in prompt.messages
+        )
+        return hashlib.sha256(template.encode("utf-8")).hexdigest()
+
+    def get(self, name: str) -> ChatPromptTemplate:
+        """获取提示词模板"""
+        return self._templates[name]
+
+    def fingerprint(self, name: str) -> str:
+        """获取模板指纹"""
+        return self._fingerprints[name]
+
+    def names(self) -> List[str]:
+        """所有模板名称"""
+        return list(self._templates)
+
+
+PROMPTS = PromptRegistry(
+    {
+        "url_text_analyzer": ChatPromptTemplate.from_messages(
+            [("human", URL_TEXT_ANALYZER_TEMPLATE)]
+        ),
+        "format_content": ChatPromptTemplate.from_messages(
+            [("human", FORMAT_CONTENT_TEMPLATE)]
+        ),
+        "proofread_text": ChatPromptTemplate.from_messages(
+            [("system", PROOFREAD_SYSTEM_TEMPLATE), ("human", "{text}")]
+        ),
+        "extract_tasks": ChatPromptTemplate.from_messages(
+            [("human", EXTRACT_TASKS_TEMPLATE)]
+        ),
+        "analyze_content": ChatPromptTemplate.from_messages(
+            [
+                (
+                    "human",
+                    ANALYZE_CONTENT_HEAD
+                    + ANALYZE_CONTENT_TASKS_SECTION
+                    + ANALYZE_CONTENT_TAIL,
+                )
+            ]
+        ),
+        "analyze_content_no_tasks": ChatPromptTemplate.from_messages(
+            [
+                (
+                    "human",
+                    ANALYZE_CONTENT_HEAD
+                    + ANALYZE_CONTENT_NO_TASKS_SECTION
+                    + ANALYZE_CONTENT_TAIL,
+                )
+            ]
+        ),
+        "analyze_text_with_media": ChatPromptTemplate.from_messages(
+            [("system", MEDIA_ANALYSIS_SYSTEM_TEMPLATE), ("human", "{text}")]
+        ),
+    }
+)
+
+
+def build_time_context(current_time: datetime) -> Dict:
+    """构建任务提取提示词中的时间变量
+
+    Args:
+        current_time: 当前时间
+
+    Returns:
+        Dict: datetime、weekday、tomorrow、tomorrow_weekday、
+            next_monday、next_friday、week_dates
+    """
+    # 下一个完整自然周的每一天
+    next_monday = current_time + timedelta(days=(7 - current_time.weekday()))
+    next_week = [next_monday + timedelta(days=i) for i in range(7)]
+
+    return {
+        "datetime": current_time.strftime("%Y-%m-%d %H:%M:%S"),
+        "weekday": WEEKDAY_NAMES[current_time.weekday()],
+        "tomorrow": (current_time + timedelta(days=1)).strftime("%Y-%m-%d"),
+        "tomorrow_weekday": WEEKDAY_NAMES[(current_time.weekday() + 1) % 7],
+        "next_monday": next_week[0].strftime("%Y-%m-%d"),
+        "next_friday": next_week[4].strftime("%Y-%m-%d"),
+        "week_dates": "\n".join(
+            f"- {WEEKDAY_NAMES[i]}: {day.strftime('%Y-%m-%d')}"
+            for i, day in enumerate(next_week)
+        ),
+    }
+
+
+@lru_cache(maxsize=4)
+def _time_context_for_minute(minute: str) -> Dict:
+    """按分钟缓存的时间变量"""
+    return build_time_context(datetime.strptime(minute, "%Y-%m-%d %H:%M"))
+
+
+def get_time_context(current_time: Optional[datetime] = None) -> Dict:
+    """获取时间变量 (精确到分钟，同一分钟内只计算一次)
+
+    Args:
+        current_time: 当前时间，默认为 datetime.now()
+
+    Returns:
+        Dict: 同 build_time_context 的副本
+    """
+    current_time = current_time or datetime.now()
+    return dict(_time_context_for_minute(current_time.strftime("%Y-%m-%d %H:%M")))
@@ -0,0 +1,61 @@
+from typing import Dict, List, Literal, Optional, Type
+from pydantic import BaseModel, Field
+
+
+class TaskItem(BaseModel):
+    """提取出的任务 (字段与滴答清单 API 一致)"""
+
+    projectId: Optional[str] = Field(
+        None, description="所属项目，只能从项目列表中选择一个，完整引用"
+    )
+    title: str = Field(..., description="任务标题")
+    isAllDay: Optional[bool] = Field(
+        None, description="只有日期没有具体时间时为 true；未说明时间时省略"
+    )
+    content: Optional[str] = Field(None, description="任务详情")
+    dueDate: Optional[str] = Field(
+        None,
+        description="截止时间，格式 yyyy-MM-dd'T'HH:mm:ssZ，如 2023-06-15T14:30:00+0800；未说明时间时省略",
+    )
+    priority: int = Field(0, description="优先级: 0 无, 1 低, 3 中, 5 高")
+    reminders: Optional[List[str]] = Field(
+        None,
+        description='提醒规则，如 ["TRIGGER:P0DT1H0M0S", "TRIGGER:PT0S"]；未说明时间时省略',
+    )
+
+
+class NoteResult(BaseModel):
+    """格式化后的笔记"""
+
+    content_type: Literal["Diary", "Thought", "Note", "Favorite"] = Field(
+        ..., description="内容类型"
+    )
+    title: str = Field(..., description="标题")
+    summary: str = Field(..., description="摘要")
+    format_content: str = Field(..., description="格式化后的内容")
+    tags: List[str] = Field(default_factory=list, description="3-5 个标签")
+
+
+class TaskExtraction(BaseModel):
+    """任务提取结果"""
+
+    tasks: List[TaskItem] = Field(
+        default_factory=list, description="置信分数大于 6 的任务，没有任务时为空列表"
+    )
+
+
+class ContentAnalysis(NoteResult):
+    """合并分析结果: 格式化后的笔记和任务"""
+
+    tasks: List[TaskItem] = Field(
+        default_factory=list, description="置信分数大于 6 的任务，没有任务时为空列表"
+    )
+
+
+# 提示词名称 -> 结构化输出的工具定义
+STRUCTURED_SCHEMAS: Dict[str, Type[BaseModel]] = {
+    "format_content": NoteResult,
+    "extract_tasks": TaskExtraction,
+    "analyze_content": ContentAnalysis,
+    "analyze_content_no_tasks": NoteResult,
+}
@@ -0,0 +1,137 @@
+import json
+import re
+from typing import Dict, List, Optional
+from .structured_output import repair_json
+
+
+class StreamingResultParser:
+    """流式输出增量解析器
+
+    在模型输出尚未完成时，从已收到的文本中提取已经完整的字段:
+    <json> 中的 title、content_type、summary、tags，以及 <tasks> 中已完成的任务标题。
+    每次 feed 后如果解析结果有变化则返回新的快照，用于逐步展示处理进度。
+    """
+
+    STRING_FIELD_PATTERNS = {
+        field: re.compile(rf'"{field}"\s*:\s*"((?:[^"\\]|\\.)*)"')
+        for field in ("title", "content_type", "summary")
+    }
+    TAGS_PATTERN = re.compile(r'"tags"\s*:\s*(\[[^\]]*\])')
+    TASK_TITLE_PATTERN = re.compile(r'"title"\s*:\s*"((?:[^"\\]|\\.)*)"')
+
+    # 只有收到这些字符时字段才可能变得完整
+    TRIGGER_CHARS = frozenset('"]}>')
+
+    def __init__(self):
+        self._buffer: List[str] = []
+        self._text = ""
+        self._snapshot: Dict = {}
+
+    @property
+    def text(self) -> str:
+        """已收到的全部文本"""
+        if self._buffer:
+            self._text += "".join(self._buffer)
+            self._buffer = []
+        return self._text
+
+    @staticmethod
+    def _decode(value: str) -> str:
+        """解码 JSON 字符串转义"""
+        try:
+            return json.loads(f'"{value}"')
+        except json.JSONDecodeError:
+            return value
+
+    def _parse(self, text: str) -> Dict:
+        """解析当前文本中已完整的字段"""
+        snapshot: Dict = {}
+
+        json_start = text.find("<json>")
+        if json_start != -1:
+            json_end = text.find("</json>", json_start)
+            section = text[json_start : json_end if json_end != -1 else None]
+            for field, pattern in self.STRING_FIELD_PATTERNS.items():
+                match = pattern.search(section)
+                if match:
+                    snapshot[field] = self._decode(match.group(1))
+            match = self.TAGS_PATTERN.search(section)
+            if match:
+                try:
+                    snapshot["tags"] = json.loads(match.group(1))
+                except json.JSONDecodeError:
+                    pass
+
+        tasks_start = text.rfind("<tasks>")
+        if tasks_start != -1:
+            section = text[tasks_start:]
+            snapshot["tasks"] = [
+                self._decode(value) for value in self.TASK_TITLE_PATTERN.findall(section)
+            ]
+
+        return snapshot
+
+    def feed(self, chunk: str) -> Optional[Dict]:
+        """追加一段输出
+
+        Args:
+            chunk: 新收到的文本
+
+        Returns:
+            Dict: 解析结果有变化时返回新的快照 (title、content_type、summary、tags、tasks 中已完整的字段)
+            None: 没有变化
+        """
+        if not chunk:
+            return None
+        self._buffer.append(chunk)
+        if not self.TRIGGER_CHARS.intersection(chunk):
+            return None
+
+        snapshot = self._parse(self.text)
+        if snapshot == self._snapshot:
+            return None
+        self._snapshot = snapshot
+        return dict(snapshot)
+
+
+class StreamingToolCallParser(StreamingResultParser):
+    """结构化输出 (工具调用参数) 的流式增量解析器
+
+    工具调用参数是逐段生成的 JSON，用 repair_json 补全后解析。
+    除最后一个字段 (可能仍在生成) 外都已完整；任务列表中除最后一个任务外都已完整。
+    快照格式与 StreamingResultParser 相同。
+    """
+
+    TRIGGER_CHARS = frozenset('",]}')
+
+    def _parse(self, text: str) -> Dict:
+        """解析当前参数文本中已完整的字段"""
+        data = repair_json(text)
+        if not isinstance(data, dict):
+            return {}
+
+        try:
+            json.loads(text)
+            complete = True
+        except json.JSONDecodeError:
+            complete = False
+        last_key = None if complete or not data else list(data)[-1]
+
+        snapshot: Dict = {}
+        for field in ("title", "content_type", "summary"):
+            if field != last_key and isinstance(data.get(field), str):
+                snapshot[field] = data[field]
+        if last_key != "tags" and isinstance(data.get("tags"), list):
+            snapshot["tags"] = data["tags"]
+
+        tasks = data.get("tasks")
+        if isinstance(tasks, list):
+            if last_key == "tasks":
+                tasks = tasks[:-1]
+            snapshot["tasks"] = [
+                task["title"]
+                for task in tasks
+                if isinstance(task, dict) and isinstance(task.get("title"), str)
+            ]
+
+        return snapshot
@@ -0,0 +1,106 @@
+import json
+import re
+from typing import Any, Dict, List, Optional, Tuple
+from langchain_core.utils.json import parse_partial_json
+from pydantic import ValidationError
+from .schemas import NoteResult, TaskItem
+
+# 结构化输出处理链的名称后缀 ("format_content" -> "format_content.structured")
+STRUCTURED_SUFFIX = ".structured"
+
+# 要求模型通过工具调用提交结果，追加在原提示词之后
+STRUCTURED_OUTPUT_INSTRUCTION = (
+    "请直接调用 {tool} 工具提交最终结果 (字段含义见工具说明)，"
+    "不需要输出 <analysis>、<json> 或 <tasks> 标签。"
+)
+
+CODE_FENCE_PATTERN = re.compile(r"```(?:json)?", re.IGNORECASE)
+TRAILING_COMMA_PATTERN = re.compile(r",\s*([}\]])")
+
+
+def repair_json(text: Optional[str]) -> Optional[Any]:
+    """解析可能不完整或不规范的 JSON
+
+    去除代码块标记、从第一个 { 或 [ 开始解析；解析失败时删除多余的逗号，
+    并补全未闭合的字符串和括号 (流式输出中途或输出被截断时)。
+
+    Args:
+        text: 模型输出的文本
+
+    Returns:
+        Any: 解析结果
+        None: 无法解析
+    """
+    if not text:
+        return None
+
+    text = CODE_FENCE_PATTERN.sub("", text)
+    starts = [i for i in (text.find("{"), text.find("[")) if i != -1]
+    if not starts:
+        return None
+    text = text[min(starts) :].strip()
+
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError:
+        pass
+
+    try:
+        return parse_partial_json(TRAILING_COMMA_PATTERN.sub(r"\1", text))
+    except (json.JSONDecodeError, ValueError):
+        return None
+
+
+def message_text(message: Any) -> str:
+    """模型消息的输出文本: 有工具调用时为调用参数 JSON，否则为正文"""
+    for call in getattr(message, "tool_calls", None) or []:
+        return json.dumps(call.get("args") or {}, ensure_ascii=False)
+    # 参数不是合法 JSON 的工具调用，原样返回交给 repair_json
+    for call in getattr(message, "invalid_tool_calls", None) or []:
+        if call.get("args"):
+            return call["args"]
+    content = getattr(message, "content", message)
+    return content if isinstance(content, str) else str(content)
+
+
+def chunk_text(chunk: Any) -> str:
+    """流式输出片段的文本: 工具调用参数片段或正文片段"""
+    calls = getattr(chunk, "tool_call_chunks", None)
+    if calls:
+        # 只取第一个工具调用
+        return "".join(
+            call.get("args") or "" for call in calls if call.get("index") in (None, 0)
+        )
+    content = getattr(chunk, "content", chunk)
+    return content if isinstance(content, str) else str(content)
+
+
+def parse_note(data: Dict) -> Dict:
+    """校验笔记字段
+
+    校验失败但有标题时保留已有字段，避免因个别字段不规范整条消息处理失败。
+
+    Raises:
+        ValueError: 缺少标题
+    """
+    try:
+        return NoteResult(**data).model_dump()
+    except ValidationError as e:
+        if not isinstance(data.get("title"), str) or not data["title"]:
+            raise ValueError(f"模型输出缺少必要字段: {e}")
+        return {key: data[key] for key in NoteResult.model_fields if key in data}
+
+
+def parse_task_items(items: List) -> Tuple[List[Dict], int]:
+    """逐个校验任务，跳过格式不正确的任务
+
+    Returns:
+        Tuple[List[Dict], int]: (任务列表，不含空字段; 跳过的数量)
+    """
+    tasks = []
+    for item in items:
+        try:
+            tasks.append(TaskItem(**item).model_dump(exclude_none=True))
+        except (ValidationError, TypeError):
+            continue
+    return tasks, len(items) - len(tasks)
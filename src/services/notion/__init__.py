@@ -1,6 +1,13 @@
 """Notion 服务模块"""
 
-from .notion_api import NotionAPI
+from .notion_api import NotionAPI, NotionAPIError
 from .notion_service import NotionService
+from .sync_engine import NotionChange, NotionSyncEngine
 
-__all__ = ['NotionAPI', 'NotionService']
+__all__ = [
+    'NotionAPI',
+    'NotionAPIError',
+    'NotionService',
+    'NotionChange',
+    'NotionSyncEngine',
+]
@@ -1,9 +1,12 @@
-from typing import Dict, List, Optional, Any
+from typing import AsyncIterator, Dict, List, Optional, Any
 from datetime import datetime
-import asyncio
+import time
 from ...utils.logger import Logger
 from ...utils.config_manager import ConfigManager
+from ...utils.cache import LRUCache
 from .notion_api import NotionAPI
+from .notes_index import NotesIndex
+from .sync_engine import NotionChange, NotionSyncEngine
 
 
 class DailyNotes:
@@ -14,13 +17,31 @@ class DailyNotes:
     2. 文件上传
     3. 标签管理
     4. 内容格式化
+    5. 本地索引查询
     """
 
+    # 进程级 API 客户端池: api_key -> NotionAPI (最多保留256个，空闲1小时后淘汰)
+    _clients = LRUCache(maxsize=256, ttl=3600.0)
+
     def __init__(self):
         """初始化日常笔记服务"""
         self.logger = Logger("services.notion.daily_notes")
         self.config = ConfigManager()
         self.api = None  # 延迟初始化，只在需要时创建
+        self.index = NotesIndex()
+        self.sync_engine = NotionSyncEngine()
+        self.sync_engine.subscribe(self.index.apply_change)
+
+    # 上次按需同步的时间: database_id -> monotonic 时间
+    _synced_at: Dict[str, float] = {}
+
+    def _get_client(self, api_key: str) -> NotionAPI:
+        """从客户端池获取 API 实例，不存在时创建"""
+        api = self._clients.get(api_key)
+        if api is None:
+            api = NotionAPI(api_key=api_key)
+            self._clients.set(api_key, api)
+        return api
 
     async def _ensure_api(self, user_id: str) -> NotionAPI:
         """确保 API 实例可用
@@ -44,10 +65,10 @@ class DailyNotes:
             if not database_id:
                 raise ValueError("请先配置 Notion Database ID")
 
-            # 创建API实例
-            api = NotionAPI(api_key=api_key)
+            # 从客户端池获取API实例
+            api = self._get_client(api_key)
 
-            # 初始化数据库属性
+            # 初始化数据库属性 (属性结构已缓存时不会请求 Notion)
             await api.init_database(database_id)
 
             return api
@@ -173,6 +194,13 @@ class DailyNotes:
             )
 
             self.logger.info(f"创建笔记成功: {title}")
+
+            # 写入本地索引 (失败不影响笔记保存，下次同步时会补上)
+            try:
+                self.index.upsert_page(user_id, database_id, page)
+            except Exception as e:
+                self.logger.warning(f"写入笔记索引失败: {str(e)}")
+
             return page
 
         except Exception as e:
@@ -227,6 +255,105 @@ class DailyNotes:
             self.logger.error(f"上传文件失败: {str(e)}")
             return None
 
+    def _build_note_filter(
+        self,
+        content_type: Optional[str] = None,
+        source: Optional[str] = None,
+        tags: Optional[List[str]] = None,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+    ) -> Optional[Dict]:
+        """构建笔记查询的过滤条件"""
+        filter_conditions = []
+
+        if content_type:
+            filter_conditions.append(
+                {"property": "Type", "select": {"equals": content_type}}
+            )
+
+        if source:
+            filter_conditions.append({"property": "Source", "select": {"equals": source}})
+
+        if tags:
+            filter_conditions.append(
+                {
+                    "property": "Tags",
+                    "multi_select": {"contains": tags[0]},  # Notion API限制
+                }
+            )
+
+        if start_date:
+            filter_conditions.append(
+                {
+                    "property": "Created",
+                    "date": {"on_or_after": start_date.isoformat()},
+                }
+            )
+
+        if end_date:
+            filter_conditions.append(
+                {
+                    "property": "Created",
+                    "date": {"on_or_before": end_date.isoformat()},
+                }
+            )
+
+        return {"and": filter_conditions} if filter_conditions else None
+
+    async def iter_notes(
+        self,
+        user_id: str,
+        content_type: Optional[str] = None,
+        source: Optional[str] = None,
+        tags: Optional[List[str]] = None,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        properties: Optional[List[str]] = None,
+        start_cursor: Optional[str] = None,
+    ) -> AsyncIterator[Dict]:
+        """流式获取笔记
+
+        逐页从 Notion 读取，适合导出和统计等需要遍历全部笔记的场景。
+
+        Args:
+            user_id: 用户ID
+            content_type: 内容类型过滤
+            source: 来源过滤
+            tags: 标签过滤
+            start_date: 开始日期
+            end_date: 结束日期
+            properties: 只返回这些属性 (属性名列表)，None 表示全部
+            start_cursor: 从该分页游标继续读取
+
+        Yields:
+            Dict: 笔记页面
+        """
+        # 获取API实例
+        api = await self._ensure_api(user_id)
+
+        # 获取数据库ID
+        database_id = self.config.get_user_value(user_id, "notion.database_id")
+        if not database_id:
+            raise ValueError("请先配置 Notion Database ID")
+
+        # 属性名转换为属性ID (Notion 只接受ID)
+        filter_properties = None
+        if properties:
+            schema = await api.get_database_properties(database_id)
+            filter_properties = [
+                schema[name]["id"] for name in properties if name in schema
+            ]
+
+        async for page in api.iter_database(
+            database_id,
+            filter_conditions=self._build_note_filter(
+                content_type, source, tags, start_date, end_date
+            ),
+            start_cursor=start_cursor,
+            filter_properties=filter_properties,
+        ):
+            yield page
+
     async def get_notes(
         self,
         user_id: str,
@@ -235,7 +362,7 @@ class DailyNotes:
         tags: Optional[List[str]] = None,
         start_date: Optional[datetime] = None,
         end_date: Optional[datetime] = None,
-        limit: int = 100,
+        limit: Optional[int] = 100,
     ) -> List[Dict]:
         """获取笔记列表
 
@@ -246,63 +373,24 @@ class DailyNotes:
             tags: 标签过滤
             start_date: 开始日期
             end_date: 结束日期
-            limit: 返回数量限制
+            limit: 返回数量限制，None 表示返回全部
 
         Returns:
             List[Dict]: 笔记列表
         """
         try:
-            # 获取API实例
-            api = await self._ensure_api(user_id)
-
-            # 获取数据库ID
-            database_id = self.config.get_user_value(user_id, "notion.database_id")
-            if not database_id:
-                raise ValueError("请先配置 Notion Database ID")
-
-            # 构建过滤条件
-            filter_conditions = []
-
-            if content_type:
-                filter_conditions.append(
-                    {"property": "Type", "select": {"equals": content_type}}
-                )
-
-            if source:
-                filter_conditions.append(
-                    {"property": "Source", "select": {"equals": source}}
-                )
-
-            if tags:
-                filter_conditions.append(
-                    {
-                        "property": "Tags",
-                        "multi_select": {"contains": tags[0]},  # Notion API限制
-                    }
-                )
-
-            if start_date:
-                filter_conditions.append(
-                    {
-                        "property": "Created",
-                        "date": {"on_or_after": start_date.isoformat()},
-                    }
-                )
-
-            if end_date:
-                filter_conditions.append(
-                    {
-                        "property": "Created",
-                        "date": {"on_or_before": end_date.isoformat()},
-                    }
-                )
-
-            # 查询数据库
-            results = await api.query_database(
-                database_id=database_id,
-                filter={"and": filter_conditions} if filter_conditions else None,
-                page_size=limit,
-            )
+            results = []
+            async for page in self.iter_notes(
+                user_id,
+                content_type=content_type,
+                source=source,
+                tags=tags,
+                start_date=start_date,
+                end_date=end_date,
+            ):
+                results.append(page)
+                if limit is not None and len(results) >= limit:
+                    break
 
             return results
 
@@ -325,8 +413,98 @@ class DailyNotes:
             api = await self._ensure_api(user_id)
 
             await api.archive_page(page_id)
+
+            # Notion 查询不返回已归档页面，由本地发布归档事件
+            database_id = self.config.get_user_value(user_id, "notion.database_id")
+            await self.sync_engine.publish(
+                NotionChange(
+                    type=NotionChange.ARCHIVED,
+                    user_id=str(user_id),
+                    database_id=database_id,
+                    page={"id": page_id},
+                )
+            )
             self.logger.info(f"删除笔记成功: {page_id}")
             return True
         except Exception as e:
             self.logger.error(f"删除笔记失败: {str(e)}")
             return False
+
+    async def sync_index(self, user_id: str, force: bool = False) -> int:
+        """增量同步用户的笔记数据库 (变更经同步引擎发布到本地索引)
+
+        距上次同步不足 notion.index_sync_interval 秒时跳过 (force=True 除外)。
+
+        Args:
+            user_id: 用户ID
+            force: 是否忽略同步间隔
+
+        Returns:
+            int: 本次同步的页面数量
+        """
+        api = await self._ensure_api(user_id)
+        database_id = self.config.get_user_value(user_id, "notion.database_id")
+
+        interval = self.config.get("notion", "index_sync_interval", default=60)
+        synced_at = self._synced_at.get(database_id)
+        if not force and synced_at is not None and time.monotonic() - synced_at < interval:
+            return 0
+
+        count = await self.sync_engine.sync(user_id, database_id, api)
+        self._synced_at[database_id] = time.monotonic()
+        return count
+
+    async def search_notes(
+        self,
+        user_id: str,
+        query: Optional[str] = None,
+        tags: Optional[List[str]] = None,
+        tag_mode: str = "and",
+        content_type: Optional[str] = None,
+        source: Optional[str] = None,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        limit: int = 50,
+        offset: int = 0,
+    ) -> List[Dict]:
+        """从本地索引搜索笔记
+
+        查询前按需增量同步；同步失败时使用现有索引数据。
+
+        Args:
+            user_id: 用户ID
+            query: 全文搜索关键词
+            tags: 标签过滤
+            tag_mode: "and" 需包含全部标签，"or" 包含任一标签即可
+            content_type: 内容类型过滤
+            source: 来源过滤
+            start_date: 开始日期
+            end_date: 结束日期
+            limit: 返回数量限制
+            offset: 跳过的数量
+
+        Returns:
+            List[Dict]: 笔记列表，按创建时间倒序
+        """
+        database_id = self.config.get_user_value(user_id, "notion.database_id")
+        if not database_id:
+            raise ValueError("请先配置 Notion Database ID")
+
+        try:
+            await self.sync_index(user_id)
+        except Exception as e:
+            self.logger.warning(f"同步笔记索引失败，使用本地数据: {str(e)}")
+
+        return self.index.search(
+            user_id,
+            query=query,
+            tags=tags,
+            tag_mode=tag_mode,
+            content_type=content_type,
+            source=source,
+            start_date=start_date,
+            end_date=end_date,
+            database_id=database_id,
+            limit=limit,
+            offset=offset,
+        )
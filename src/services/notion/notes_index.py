@@ -0,0 +1,365 @@
+from typing import Any, Dict, Iterable, List, Optional
+from datetime import datetime, timezone
+from pathlib import Path
+import json
+import sqlite3
+import threading
+from ...utils.logger import Logger
+from ...utils.singleton import Singleton
+from ...utils.config_manager import ConfigManager
+
+
+class NotesIndex(Singleton):
+    """笔记本地索引 (Notion 笔记数据库的 SQLite 镜像)
+
+    职责:
+    1. 保存笔记的标题、类型、来源、标签、内容等属性
+    2. FTS5 全文索引，支持标签/日期/类型组合查询
+    3. 订阅 NotionSyncEngine 的变更事件保持数据最新
+
+    进程内共享一个实例，多个用户的笔记保存在同一个数据库中。
+    """
+
+    def __init__(self):
+        """初始化本地索引"""
+        if self._initialized:
+            return
+
+        self.logger = Logger("notes_index")
+        config = ConfigManager()
+        self.db_path = Path(
+            config.get("notion", "index_path", default="data/notion/notes_index.db")
+        )
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+
+        self._conn = sqlite3.connect(
+            str(self.db_path), check_same_thread=False, isolation_level=None
+        )
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._create_tables()
+
+        self._initialized = True
+
+    def _create_tables(self) -> None:
+        """创建表和索引"""
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS notes (
+                page_id TEXT PRIMARY KEY,
+                user_id TEXT NOT NULL,
+                database_id TEXT NOT NULL,
+                title TEXT NOT NULL DEFAULT '',
+                type TEXT,
+                source TEXT,
+                content TEXT NOT NULL DEFAULT '',
+                summary TEXT NOT NULL DEFAULT '',
+                url TEXT,
+                created_time TEXT NOT NULL,
+                last_edited_time TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_notes_user_created
+                ON notes (user_id, created_time);
+            CREATE INDEX IF NOT EXISTS idx_notes_user_type
+                ON notes (user_id, type);
+            CREATE INDEX IF NOT EXISTS idx_notes_user_source
+                ON notes (user_id, source);
+
+            CREATE TABLE IF NOT EXISTS note_tags (
+                page_id TEXT NOT NULL,
+                tag TEXT NOT NULL,
+                PRIMARY KEY (page_id, tag)
+            );
+            CREATE INDEX IF NOT EXISTS idx_note_tags_tag ON note_tags (tag, page_id);
+            """
+        )
+
+        # trigram 分词支持中文子串匹配 (SQLite 3.34+)，不可用时退回默认分词
+        try:
+            self._conn.execute(
+                """
+                CREATE VIRTUAL TABLE IF NOT EXISTS notes_fts USING fts5(
+                    page_id UNINDEXED, title, content, summary, tokenize='trigram'
+                )
+                """
+            )
+            self.fts_tokenizer = "trigram"
+        except sqlite3.OperationalError:
+            self._conn.execute(
+                """
+                CREATE VIRTUAL TABLE IF NOT EXISTS notes_fts USING fts5(
+                    page_id UNINDEXED, title, content, summary
+                )
+                """
+            )
+            self.fts_tokenizer = "unicode61"
+
+    @staticmethod
+    def _plain_text(prop: Optional[Dict]) -> str:
+        """提取 title/rich_text 属性的纯文本"""
+        if not prop:
+            return ""
+        items = prop.get("title") or prop.get("rich_text") or []
+        return "".join(
+            item.get("plain_text") or item.get("text", {}).get("content", "")
+            for item in items
+        )
+
+    @staticmethod
+    def _select_name(prop: Optional[Dict]) -> Optional[str]:
+        """提取 select 属性的值"""
+        select = (prop or {}).get("select")
+        return select.get("name") if select else None
+
+    def _parse_page(self, page: Dict) -> Dict:
+        """将 Notion 页面转换为索引记录"""
+        properties = page.get("properties", {})
+        return {
+            "page_id": page["id"],
+            "title": self._plain_text(properties.get("Title")),
+            "type": self._select_name(properties.get("Type")),
+            "source": self._select_name(properties.get("Source")),
+            "content": self._plain_text(properties.get("Content")),
+            "summary": self._plain_text(properties.get("Summary")),
+            "url": page.get("url"),
+            "created_time": page.get("created_time", ""),
+            "last_edited_time": page.get("last_edited_time", ""),
+            "tags": [
+                tag["name"]
+                for tag in (properties.get("Tags") or {}).get("multi_select", [])
+            ],
+        }
+
+    def _delete_rows(self, page_id: str) -> None:
+        """删除笔记相关的所有行 (调用方负责加锁和事务)"""
+        self._conn.execute("DELETE FROM notes WHERE page_id = ?", (page_id,))
+        self._conn.execute("DELETE FROM note_tags WHERE page_id = ?", (page_id,))
+        self._conn.execute("DELETE FROM notes_fts WHERE page_id = ?", (page_id,))
+
+    def _write_page(self, user_id: str, database_id: str, page: Dict) -> None:
+        """写入单个页面 (调用方负责加锁和事务)"""
+        if page.get("archived") or page.get("in_trash"):
+            self._delete_rows(page["id"])
+            return
+
+        note = self._parse_page(page)
+        self._delete_rows(note["page_id"])
+        self._conn.execute(
+            """
+            INSERT INTO notes (
+                page_id, user_id, database_id, title, type, source,
+                content, summary, url, created_time, last_edited_time
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            (
+                note["page_id"],
+                str(user_id),
+                database_id,
+                note["title"],
+                note["type"],
+                note["source"],
+                note["content"],
+                note["summary"],
+                note["url"],
+                note["created_time"],
+                note["last_edited_time"],
+            ),
+        )
+        self._conn.executemany(
+            "INSERT OR IGNORE INTO note_tags (page_id, tag) VALUES (?, ?)",
+            [(note["page_id"], tag) for tag in note["tags"]],
+        )
+        self._conn.execute(
+            "INSERT INTO notes_fts (page_id, title, content, summary) VALUES (?, ?, ?, ?)",
+            (note["page_id"], note["title"], note["content"], note["summary"]),
+        )
+
+    def upsert_pages(
+        self, user_id: str, database_id: str, pages: Iterable[Dict]
+    ) -> int:
+        """批量写入页面 (单个事务)，已归档的页面会从索引中移除
+
+        Args:
+            user_id: 用户ID
+            database_id: 数据库ID
+            pages: Notion 页面对象列表
+
+        Returns:
+            int: 处理的页面数量
+        """
+        count = 0
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                for page in pages:
+                    self._write_page(user_id, database_id, page)
+                    count += 1
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return count
+
+    def upsert_page(self, user_id: str, database_id: str, page: Dict) -> None:
+        """写入单个页面"""
+        self.upsert_pages(user_id, database_id, [page])
+
+    def remove_page(self, page_id: str) -> None:
+        """从索引中移除页面"""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._delete_rows(page_id)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def apply_change(self, change: Any) -> None:
+        """处理同步引擎的页面变更事件
+
+        Args:
+            change: NotionChange 事件
+        """
+        if change.type == "archived":
+            self.remove_page(change.page_id)
+        else:
+            self.upsert_page(change.user_id, change.database_id, change.page)
+
+    def _match_expression(self, query: str) -> Optional[str]:
+        """将用户输入转换为 FTS5 查询表达式
+
+        每个关键词作为短语匹配，多个关键词之间为 AND。
+        trigram 分词无法匹配少于 3 个字符的关键词，返回 None 由调用方改用 LIKE。
+        """
+        terms = query.split()
+        if not terms:
+            return None
+        if self.fts_tokenizer == "trigram" and any(len(term) < 3 for term in terms):
+            return None
+        return " ".join('"' + term.replace('"', '""') + '"' for term in terms)
+
+    @staticmethod
+    def _escape_like(term: str) -> str:
+        """转义 LIKE 通配符，使 % 和 _ 按字面匹配 (配合 ESCAPE '\\')"""
+        return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+    @staticmethod
+    def _to_utc(value: datetime) -> str:
+        """将查询时间转换为与 Notion created_time 相同的 UTC 格式 (便于按字符串比较)
+
+        Notion 返回的时间形如 2024-01-01T08:00:00.000Z，未带时区的时间按本地时间处理。
+        """
+        return value.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%f")[:-3] + "Z"
+
+    def search(
+        self,
+        user_id: str,
+        query: Optional[str] = None,
+        tags: Optional[List[str]] = None,
+        tag_mode: str = "and",
+        content_type: Optional[str] = None,
+        source: Optional[str] = None,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        database_id: Optional[str] = None,
+        limit: int = 50,
+        offset: int = 0,
+    ) -> List[Dict]:
+        """查询本地笔记索引
+
+        Args:
+            user_id: 用户ID
+            query: 全文搜索关键词 (空格分隔，全部匹配)
+            tags: 标签过滤
+            tag_mode: "and" 需包含全部标签，"or" 包含任一标签即可
+            content_type: 内容类型过滤
+            source: 来源过滤
+            start_date: 开始日期
+            end_date: 结束日期
+            database_id: 数据库ID过滤
+            limit: 返回数量限制
+            offset: 跳过的数量
+
+        Returns:
+            List[Dict]: 笔记列表，按创建时间倒序
+        """
+        conditions = ["n.user_id = ?"]
+        params: List[Any] = [str(user_id)]
+
+        if database_id:
+            conditions.append("n.database_id = ?")
+            params.append(database_id)
+
+        if content_type:
+            conditions.append("n.type = ?")
+            params.append(content_type)
+
+        if source:
+            conditions.append("n.source = ? COLLATE NOCASE")
+            params.append(source)
+
+        if start_date:
+            conditions.append("n.created_time >= ?")
+            params.append(self._to_utc(start_date))
+
+        if end_date:
+            conditions.append("n.created_time <= ?")
+            params.append(self._to_utc(end_date))
+
+        if tags:
+            tags = list(dict.fromkeys(tags))
+            placeholders = ", ".join("?" for _ in tags)
+            if tag_mode == "or":
+                conditions.append(
+                    f"n.page_id IN (SELECT page_id FROM note_tags WHERE tag IN ({placeholders}))"
+                )
+            else:
+                conditions.append(
+                    f"""n.page_id IN (
+                        SELECT page_id FROM note_tags WHERE tag IN ({placeholders})
+                        GROUP BY page_id HAVING COUNT(*) = ?
+                    )"""
+                )
+            params.extend(tags)
+            if tag_mode != "or":
+                params.append(len(tags))
+
+        if query and query.strip():
+            match = self._match_expression(query)
+            if match:
+                conditions.append(
+                    "n.page_id IN (SELECT page_id FROM notes_fts WHERE notes_fts MATCH ?)"
+                )
+                params.append(match)
+            else:
+                for term in query.split():
+                    pattern = f"%{self._escape_like(term)}%"
+                    conditions.append(
+                        "(n.title LIKE ? ESCAPE '\\' OR n.content LIKE ? ESCAPE '\\'"
+                        " OR n.summary LIKE ? ESCAPE '\\')"
+                    )
+                    params.extend([pattern, pattern, pattern])
+
+        sql = f"""
+            SELECT n.*, (
+                SELECT json_group_array(tag) FROM note_tags t WHERE t.page_id = n.page_id
+            ) AS tags
+            FROM notes n
+            WHERE {" AND ".join(conditions)}
+            ORDER BY n.created_time DESC
+            LIMIT ? OFFSET ?
+        """
+        params.extend([limit, offset])
+
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+
+        results = []
+        for row in rows:
+            note = dict(row)
+            note["tags"] = json.loads(note["tags"] or "[]")
+            results.append(note)
+        return results
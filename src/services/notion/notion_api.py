@@ -1,11 +1,35 @@
-from typing import Dict, List, Optional, Any
+from typing import AsyncIterator, Dict, List, Optional, Any
 from datetime import datetime
+import asyncio
 import os
-import requests
-from notion_client import Client
+import httpx
 from ...utils.logger import Logger
 from ...utils.config_manager import ConfigManager
 from ...utils.exceptions import ServiceError
+from ...utils.cache import LRUCache
+from .notion_scheduler import NotionScheduler
+
+
+class NotionAPIError(ServiceError):
+    """Notion API 请求错误
+
+    Attributes:
+        status: HTTP 状态码 (网络错误时为 None)
+        code: Notion 错误码，例如 rate_limited、unauthorized
+        retry_after: 服务端要求的重试等待时间(秒)
+    """
+
+    def __init__(
+        self,
+        message: str,
+        status: Optional[int] = None,
+        code: Optional[str] = None,
+        retry_after: Optional[float] = None,
+    ):
+        super().__init__(message)
+        self.status = status
+        self.code = code
+        self.retry_after = retry_after
 
 
 class NotionAPI:
@@ -15,21 +39,177 @@ class NotionAPI:
     1. API 调用的基础封装
     2. 错误处理和转换
     3. 数据格式转换
+
+    所有实例共享一个异步 HTTP 连接池 (httpx.AsyncClient)，
+    请求不会阻塞事件循环，连接在不同用户之间复用。
+    同一 API Key 的请求经由 NotionScheduler 限流、重试和合并。
     """
 
-    def __init__(self, api_key: str):
+    BASE_URL = "https://api.notion.com/v1/"
+    NOTION_VERSION = "2022-06-28"
+
+    # 默认超时: 连接10秒，读写30秒
+    DEFAULT_TIMEOUT = httpx.Timeout(30.0, connect=10.0)
+
+    # 进程级共享连接池
+    _http_client: Optional[httpx.AsyncClient] = None
+
+    # 数据库属性结构缓存: database_id -> properties (默认10分钟过期)
+    SCHEMA_CACHE_TTL = 600.0
+    _schema_cache = LRUCache(maxsize=1024, ttl=SCHEMA_CACHE_TTL)
+
+    # init_database 要求数据库具备的属性
+    REQUIRED_PROPERTIES = ["Title", "Type", "Source", "Tags", "Created", "Content"]
+
+    def __init__(self, api_key: str, timeout: Optional[httpx.Timeout] = None):
         """初始化 Notion API 客户端
 
         Args:
             api_key: Notion API Key
+            timeout: 请求超时配置，默认使用 DEFAULT_TIMEOUT
         """
         self.logger = Logger("notion.api")
-        self.client = Client(auth=api_key)
+        self.api_key = api_key
+        self.timeout = timeout or self.DEFAULT_TIMEOUT
+        self._headers = {
+            "Authorization": f"Bearer {api_key}",
+            "Notion-Version": self.NOTION_VERSION,
+        }
+        self.scheduler = NotionScheduler.for_token(api_key)
+
+    @classmethod
+    def _get_http_client(cls) -> httpx.AsyncClient:
+        """获取共享的 HTTP 客户端 (懒加载)"""
+        if cls._http_client is None or cls._http_client.is_closed:
+            cls._http_client = httpx.AsyncClient(
+                base_url=cls.BASE_URL,
+                timeout=cls.DEFAULT_TIMEOUT,
+                limits=httpx.Limits(
+                    max_connections=100,
+                    max_keepalive_connections=20,
+                    keepalive_expiry=60.0,
+                ),
+            )
+        return cls._http_client
+
+    @classmethod
+    async def aclose(cls) -> None:
+        """关闭共享连接池"""
+        if cls._http_client is not None and not cls._http_client.is_closed:
+            await cls._http_client.aclose()
+        cls._http_client = None
+
+    async def _request(
+        self,
+        method: str,
+        path: str,
+        body: Optional[Dict] = None,
+        params: Optional[Any] = None,
+        timeout: Optional[httpx.Timeout] = None,
+    ) -> Dict:
+        """经调度器限流后发送 API 请求 (参数同 _send)
+
+        只有 GET 和查询/搜索类 POST 视为幂等请求，遇到网关错误时重试。
+        """
+        idempotent = method == "GET" or (
+            method == "POST" and (path == "search" or path.endswith("/query"))
+        )
+        return await self.scheduler.execute(
+            lambda: self._send(method, path, body, params, timeout),
+            idempotent=idempotent,
+        )
+
+    async def _send(
+        self,
+        method: str,
+        path: str,
+        body: Optional[Dict] = None,
+        params: Optional[Any] = None,
+        timeout: Optional[httpx.Timeout] = None,
+    ) -> Dict:
+        """发送 API 请求
+
+        Args:
+            method: HTTP 方法
+            path: 相对路径，例如 "databases/{id}/query"
+            body: JSON 请求体
+            params: 查询参数
+            timeout: 本次请求的超时配置
+
+        Returns:
+            Dict: 响应 JSON
+
+        Raises:
+            NotionAPIError: 请求失败
+        """
+        client = self._get_http_client()
+        try:
+            response = await client.request(
+                method,
+                path,
+                json=body,
+                params=params,
+                headers=self._headers,
+                timeout=timeout or self.timeout,
+            )
+        except httpx.TimeoutException as e:
+            raise NotionAPIError("Notion API 请求超时") from e
+        except httpx.HTTPError as e:
+            raise NotionAPIError(f"Notion API 网络错误: {str(e)}") from e
+
+        if response.is_error:
+            try:
+                data = response.json()
+            except ValueError:
+                data = {}
+            code = data.get("code")
+            message = data.get("message") or response.text[:200]
+            retry_after = response.headers.get("Retry-After")
+            raise NotionAPIError(
+                f"{code or response.status_code}: {message}",
+                status=response.status_code,
+                code=code,
+                retry_after=float(retry_after) if retry_after else None,
+            )
+
+        return response.json()
+
+    @classmethod
+    def invalidate_schema(cls, database_id: Optional[str] = None) -> None:
+        """使数据库属性结构缓存失效
+
+        Args:
+            database_id: 数据库ID，为 None 时清空全部缓存
+        """
+        if database_id is None:
+            cls._schema_cache.clear()
+        else:
+            cls._schema_cache.pop(database_id)
+
+    async def get_database_properties(
+        self, database_id: str, refresh: bool = False
+    ) -> Dict:
+        """获取数据库属性结构 (优先使用缓存)
+
+        Args:
+            database_id: 数据库ID
+            refresh: 是否忽略缓存重新获取
+
+        Returns:
+            Dict: 数据库属性
+        """
+        if not refresh:
+            properties = self._schema_cache.get(database_id)
+            if properties is not None:
+                return properties
+
+        database = await self.get_database(database_id)
+        return database.get("properties", {})
 
     def _format_error(self, error: Exception) -> str:
         """格式化错误消息，去除冗余信息"""
         error_str = str(error)
-        if "Request to Notion API" in error_str:
+        if "Request to Notion API" in error_str or "请求超时" in error_str:
             return "Notion API 请求超时"
 
         # 移除错误消息链中的重复部分
@@ -51,7 +231,9 @@ class NotionAPI:
             ServiceError: API调用失败
         """
         try:
-            return self.client.databases.retrieve(database_id=database_id)
+            database = await self._request("GET", f"databases/{database_id}")
+            self._schema_cache.set(database_id, database.get("properties", {}))
+            return database
         except Exception as e:
             error_msg = self._format_error(e)
             self.logger.error(f"获取数据库失败: {error_msg}")
@@ -71,10 +253,13 @@ class NotionAPI:
             ServiceError: API调用失败
         """
         try:
-            return self.client.databases.update(
-                database_id=database_id, properties=properties
+            database = await self._request(
+                "PATCH", f"databases/{database_id}", body={"properties": properties}
             )
+            self._schema_cache.set(database_id, database.get("properties", {}))
+            return database
         except Exception as e:
+            self.invalidate_schema(database_id)
             self.logger.error(f"更新数据库失败: {str(e)}")
             raise ServiceError(f"更新数据库失败: {str(e)}")
 
@@ -85,7 +270,7 @@ class NotionAPI:
         sorts: Optional[List] = None,
         page_size: int = 100,
     ) -> List[Dict]:
-        """查询数据库
+        """查询数据库 (仅返回第一页结果，完整结果请使用 iter_database)
 
         Args:
             database_id: 数据库ID
@@ -96,6 +281,40 @@ class NotionAPI:
         Returns:
             List[Dict]: 查询结果
 
+        Raises:
+            ServiceError: API调用失败
+        """
+        response = await self.query_database_page(
+            database_id,
+            filter_conditions=filter_conditions,
+            sorts=sorts,
+            page_size=page_size,
+        )
+        self.logger.info(f"查询到 {len(response.get('results', []))} 条记录")
+        return response.get("results", [])
+
+    async def query_database_page(
+        self,
+        database_id: str,
+        filter_conditions: Optional[Dict] = None,
+        sorts: Optional[List] = None,
+        page_size: int = 100,
+        start_cursor: Optional[str] = None,
+        filter_properties: Optional[List[str]] = None,
+    ) -> Dict:
+        """查询数据库的一页结果
+
+        Args:
+            database_id: 数据库ID
+            filter_conditions: 过滤条件
+            sorts: 排序条件
+            page_size: 每页数量 (最大100)
+            start_cursor: 分页游标，从上一页的 next_cursor 继续
+            filter_properties: 只返回这些属性 (属性ID列表)
+
+        Returns:
+            Dict: API响应，包含 results、has_more、next_cursor
+
         Raises:
             ServiceError: API调用失败
         """
@@ -106,20 +325,92 @@ class NotionAPI:
             if sorts:
                 self.logger.debug(f"排序条件: {sorts}")
 
-            query = {"database_id": database_id, "page_size": page_size}
+            query = {"page_size": min(page_size, 100)}
             if filter_conditions:
                 query["filter"] = filter_conditions
             if sorts:
                 query["sorts"] = sorts
+            if start_cursor:
+                query["start_cursor"] = start_cursor
+
+            params = None
+            if filter_properties:
+                params = [("filter_properties", prop) for prop in filter_properties]
 
-            response = self.client.databases.query(**query)
-            self.logger.info(f"查询到 {len(response.get('results', []))} 条记录")
-            return response.get("results", [])
+            return await self._request(
+                "POST", f"databases/{database_id}/query", body=query, params=params
+            )
 
         except Exception as e:
             self.logger.error(f"查询数据库失败: {str(e)}", exc_info=True)
             raise ServiceError(f"查询数据库失败: {str(e)}")
 
+    async def iter_database_batches(
+        self,
+        database_id: str,
+        filter_conditions: Optional[Dict] = None,
+        sorts: Optional[List] = None,
+        page_size: int = 100,
+        start_cursor: Optional[str] = None,
+        filter_properties: Optional[List[str]] = None,
+    ) -> AsyncIterator[Dict]:
+        """逐页查询数据库
+
+        每次产出一页的 API 响应，调用方可以记录其中的 next_cursor，
+        中断后通过 start_cursor 从该位置继续。
+
+        Args:
+            参数同 query_database_page
+
+        Yields:
+            Dict: 每一页的API响应
+        """
+        cursor = start_cursor
+        while True:
+            response = await self.query_database_page(
+                database_id,
+                filter_conditions=filter_conditions,
+                sorts=sorts,
+                page_size=page_size,
+                start_cursor=cursor,
+                filter_properties=filter_properties,
+            )
+            yield response
+
+            cursor = response.get("next_cursor")
+            if not response.get("has_more") or not cursor:
+                break
+
+    async def iter_database(
+        self,
+        database_id: str,
+        filter_conditions: Optional[Dict] = None,
+        sorts: Optional[List] = None,
+        page_size: int = 100,
+        start_cursor: Optional[str] = None,
+        filter_properties: Optional[List[str]] = None,
+    ) -> AsyncIterator[Dict]:
+        """流式查询数据库的全部结果
+
+        按需逐页请求，内存中最多只保留一页结果。
+
+        Args:
+            参数同 query_database_page
+
+        Yields:
+            Dict: 页面对象
+        """
+        async for response in self.iter_database_batches(
+            database_id,
+            filter_conditions=filter_conditions,
+            sorts=sorts,
+            page_size=page_size,
+            start_cursor=start_cursor,
+            filter_properties=filter_properties,
+        ):
+            for page in response.get("results", []):
+                yield page
+
     async def create_page(
         self, database_id: str, properties: Dict, children: Optional[List] = None
     ) -> Dict:
@@ -130,10 +421,6 @@ class NotionAPI:
             if children:
                 self.logger.debug(f"页面内容块数量: {len(children)}")
 
-            # 获取数据库信息
-            database = await self.get_database(database_id)
-            database_properties = database.get("properties", {})
-
             # 确保 Content 字段存在且包含原始内容
             if "content" in properties:
                 properties["Content"] = {
@@ -141,10 +428,14 @@ class NotionAPI:
                 }
 
             # 创建页面
-            page = self.client.pages.create(
-                parent={"database_id": database_id},
-                properties=properties,
-                children=children if children else [],
+            page = await self._request(
+                "POST",
+                "pages",
+                body={
+                    "parent": {"database_id": database_id},
+                    "properties": properties,
+                    "children": children if children else [],
+                },
             )
 
             self.logger.info(f"页面创建成功: {page.get('id')}")
@@ -168,7 +459,9 @@ class NotionAPI:
             ServiceError: API调用失败
         """
         try:
-            return self.client.pages.update(page_id=page_id, properties=properties)
+            return await self._request(
+                "PATCH", f"pages/{page_id}", body={"properties": properties}
+            )
         except Exception as e:
             self.logger.error(f"更新页面失败: {str(e)}")
             raise ServiceError(f"更新页面失败: {str(e)}")
@@ -176,6 +469,8 @@ class NotionAPI:
     async def append_blocks(self, page_id: str, blocks: List[Dict]) -> Dict:
         """添加内容块
 
+        超过100个块时自动拆分；与同一页面排队中的其他调用合并发送。
+
         Args:
             page_id: 页面ID
             blocks: 内容块列表
@@ -187,11 +482,32 @@ class NotionAPI:
             ServiceError: API调用失败
         """
         try:
-            return self.client.blocks.children.append(block_id=page_id, children=blocks)
+            size = NotionScheduler.MAX_BLOCKS_PER_REQUEST
+            chunks = [blocks[i : i + size] for i in range(0, len(blocks), size)]
+            responses = await asyncio.gather(
+                *(
+                    self.scheduler.append_blocks(page_id, chunk, self._send_blocks)
+                    for chunk in chunks
+                )
+            )
+            if len(responses) == 1:
+                return responses[0]
+
+            # 拆分发送时合并结果
+            results = []
+            for response in responses:
+                results.extend(response.get("results", []))
+            return {**responses[-1], "results": results}
         except Exception as e:
             self.logger.error(f"添加内容块失败: {str(e)}")
             raise ServiceError(f"添加内容块失败: {str(e)}")
 
+    async def _send_blocks(self, page_id: str, blocks: List[Dict]) -> Dict:
+        """直接发送一次 append_blocks 请求 (由调度器调用，已限流)"""
+        return await self._send(
+            "PATCH", f"blocks/{page_id}/children", body={"children": blocks}
+        )
+
     async def upload_file(self, page_id: str, file_info: Dict) -> Dict:
         """上传文件
 
@@ -223,7 +539,7 @@ class NotionAPI:
         """
         try:
             # 尝试获取当前用户信息
-            response = self.client.users.me()
+            response = await self._request("GET", "users/me")
 
             # 检查响应是否包含必要的字段
             if not response or 'id' not in response or 'type' not in response:
@@ -252,7 +568,7 @@ class NotionAPI:
         """
         try:
             self.logger.debug(f"获取页面信息: {page_id}")
-            return self.client.pages.retrieve(page_id=page_id)
+            return await self._request("GET", f"pages/{page_id}")
         except Exception as e:
             self.logger.error(f"获取页面失败: {str(e)}")
             raise ServiceError(f"获取页面失败: {str(e)}")
@@ -271,7 +587,7 @@ class NotionAPI:
         """
         try:
             # 获取页面下的所有块
-            blocks = self.client.blocks.children.list(block_id=page_id)
+            blocks = await self._request("GET", f"blocks/{page_id}/children")
 
             # 过滤出数据库类型的块
             databases = []
@@ -312,12 +628,16 @@ class NotionAPI:
         """
         try:
             # 创建数据库
-            database = self.client.databases.create(
-                parent={"type": "page_id", "page_id": page_id},
-                title=[{"type": "text", "text": {"content": title}}],
-                properties={
-                    "Title": {"title": {}},  # 标题属性
-                    "Description": {"rich_text": {}},  # 描述属性
+            database = await self._request(
+                "POST",
+                "databases",
+                body={
+                    "parent": {"type": "page_id", "page_id": page_id},
+                    "title": [{"type": "text", "text": {"content": title}}],
+                    "properties": {
+                        "Title": {"title": {}},  # 标题属性
+                        "Description": {"rich_text": {}},  # 描述属性
+                    },
                 },
             )
 
@@ -335,7 +655,7 @@ class NotionAPI:
         """
         try:
             self.logger.debug(f"开始归档页面: {page_id}")
-            self.client.pages.update(page_id=page_id, archived=True)
+            await self._request("PATCH", f"pages/{page_id}", body={"archived": True})
             self.logger.info(f"页面归档成功: {page_id}")
 
         except Exception as e:
@@ -369,15 +689,19 @@ class NotionAPI:
         try:
             self.logger.info("开始初始化数据库属性")
 
-            # 获取现有数据库属性
-            database = await self.get_database(database_id)
-            current_properties = database.get("properties", {})
+            # 获取现有数据库属性 (缓存命中时不发起请求)
+            current_properties = await self.get_database_properties(database_id)
 
             # 如果已经有基本属性，说明已经初始化过
-            if all(
-                prop in current_properties
-                for prop in ["Title", "Type", "Source", "Tags", "Created", "Content"]
-            ):
+            if all(prop in current_properties for prop in self.REQUIRED_PROPERTIES):
+                self.logger.debug("数据库已初始化，跳过")
+                return
+
+            # 缓存可能已过期，重新获取确认
+            current_properties = dict(
+                await self.get_database_properties(database_id, refresh=True)
+            )
+            if all(prop in current_properties for prop in self.REQUIRED_PROPERTIES):
                 self.logger.info("数据库已初始化，跳过")
                 return
 
@@ -414,6 +738,7 @@ class NotionAPI:
                     }
                 },
                 "Content": {"rich_text": {}},  # 原始内容
+                "Created": {"created_time": {}},  # 创建时间
                 "Summary": {"rich_text": {}},  # 内容摘要
                 "HasAttachment": {"checkbox": {}},  # 是否包含附件
             }
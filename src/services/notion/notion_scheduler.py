@@ -0,0 +1,321 @@
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+import asyncio
+import time
+from ...utils.logger import Logger
+from ...utils.config_manager import ConfigManager
+
+
+class TokenBucket:
+    """令牌桶限流器
+
+    按固定速率补充令牌，请求按到达顺序排队获取令牌。
+    收到 429 时可暂停整个桶，直到 Retry-After 到期。
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        """初始化令牌桶
+
+        Args:
+            rate: 每秒补充的令牌数
+            capacity: 桶容量 (允许的突发请求数)
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated_at = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        """按流逝时间补充令牌"""
+        now = time.monotonic()
+        self._tokens = min(
+            self.capacity, self._tokens + (now - self._updated_at) * self.rate
+        )
+        self._updated_at = now
+
+    def pause(self, seconds: float) -> None:
+        """暂停发放令牌
+
+        Args:
+            seconds: 暂停时长(秒)
+        """
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+        self._tokens = 0.0
+
+    async def acquire(self) -> float:
+        """获取一个令牌
+
+        Returns:
+            float: 等待时长(秒)
+        """
+        started_at = time.monotonic()
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    await asyncio.sleep(self._paused_until - now)
+                    continue
+
+                self._refill()
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return time.monotonic() - started_at
+
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class NotionScheduler:
+    """Notion 请求调度器 (每个集成 Token 一个实例)
+
+    负责:
+    1. 令牌桶限流 (Notion 限制约 3 次/秒/集成)
+    2. 429 时按 Retry-After 或指数退避重试；冲突/网关错误只对幂等请求重试
+    3. 合并同一页面的连续 append_blocks 调用 (每次最多 100 个块)
+    4. 统计队列深度和等待时间，有请求时按 notion.metrics_log_interval 定期写入日志
+    """
+
+    # 单次 append_blocks 请求允许的最大块数
+    MAX_BLOCKS_PER_REQUEST = 100
+
+    # 幂等请求 (GET、查询) 可以重试的状态码
+    RETRY_STATUSES = {409, 429, 502, 503, 504}
+
+    # 非幂等请求 (创建页面、追加内容块) 只在确定未被处理时重试；
+    # 网关错误时 Notion 可能已经提交，重试会产生重复页面或内容块
+    NON_IDEMPOTENT_RETRY_STATUSES = {429}
+
+    _schedulers: Dict[str, "NotionScheduler"] = {}
+
+    def __init__(
+        self,
+        name: str,
+        rate: float = 3.0,
+        burst: float = 3.0,
+        max_retries: int = 5,
+        backoff: float = 1.0,
+        metrics_log_interval: float = 300.0,
+    ):
+        """初始化调度器
+
+        Args:
+            name: 调度器名称 (用于日志和统计，不包含完整 Token)
+            rate: 每秒请求数
+            burst: 允许的突发请求数
+            max_retries: 最大重试次数
+            backoff: 无 Retry-After 时的初始退避时间(秒)
+            metrics_log_interval: 统计信息写入日志的最小间隔(秒)，0 表示不记录
+        """
+        self.logger = Logger("notion.scheduler")
+        self.name = name
+        self.bucket = TokenBucket(rate, burst)
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.metrics_log_interval = metrics_log_interval
+        self._metrics_logged_at = time.monotonic()
+
+        # 待合并的 append_blocks 调用: page_id -> [(blocks, future)]
+        self._pending_blocks: Dict[str, List[Tuple[List[Dict], asyncio.Future]]] = {}
+        self._flushers: Dict[str, asyncio.Task] = {}
+
+        # 统计信息
+        self._waiting = 0
+        self._metrics = {
+            "requests": 0,
+            "retries": 0,
+            "rate_limited": 0,
+            "coalesced_calls": 0,
+            "total_wait": 0.0,
+            "max_wait": 0.0,
+        }
+
+    @classmethod
+    def for_token(cls, api_key: str) -> "NotionScheduler":
+        """获取某个集成 Token 的调度器 (进程内共享)"""
+        scheduler = cls._schedulers.get(api_key)
+        if scheduler is None:
+            config = ConfigManager()
+            scheduler = cls(
+                name=f"{api_key[:8]}...",
+                rate=config.get("notion", "rate_limit", default=3.0),
+                burst=config.get("notion", "rate_burst", default=3.0),
+                metrics_log_interval=config.get(
+                    "notion", "metrics_log_interval", default=300
+                ),
+            )
+            cls._schedulers[api_key] = scheduler
+        return scheduler
+
+    async def _acquire(self) -> None:
+        """排队获取令牌并记录等待时间"""
+        self._waiting += 1
+        try:
+            waited = await self.bucket.acquire()
+        finally:
+            self._waiting -= 1
+
+        self._metrics["total_wait"] += waited
+        self._metrics["max_wait"] = max(self._metrics["max_wait"], waited)
+        self._log_metrics()
+
+    def _log_metrics(self) -> None:
+        """距上次记录超过 metrics_log_interval 时把统计信息写入日志"""
+        if not self.metrics_log_interval:
+            return
+        now = time.monotonic()
+        if now - self._metrics_logged_at < self.metrics_log_interval:
+            return
+        self._metrics_logged_at = now
+
+        metrics = self.get_metrics()
+        self.logger.info(
+            f"[{self.name}] 队列深度 {metrics['queue_depth']}, "
+            f"请求 {metrics['requests']}, 重试 {metrics['retries']} "
+            f"(限流 {metrics['rate_limited']}), 合并 {metrics['coalesced_calls']}, "
+            f"平均等待 {metrics['avg_wait']:.2f}s, 最大等待 {metrics['max_wait']:.2f}s"
+        )
+
+    async def execute(
+        self,
+        request: Callable[[], Awaitable[Any]],
+        acquired: bool = False,
+        idempotent: bool = True,
+    ) -> Any:
+        """限流执行请求，必要时重试
+
+        Args:
+            request: 发送请求的协程工厂 (每次重试都会重新调用)
+            acquired: 调用方是否已获取第一次请求的令牌
+            idempotent: 请求是否幂等，非幂等请求只在 429 时重试
+
+        Returns:
+            Any: 请求结果
+        """
+        retry_statuses = (
+            self.RETRY_STATUSES if idempotent else self.NON_IDEMPOTENT_RETRY_STATUSES
+        )
+        attempt = 0
+        while True:
+            if not acquired:
+                await self._acquire()
+            acquired = False
+            self._metrics["requests"] += 1
+
+            try:
+                return await request()
+            except Exception as e:
+                status = getattr(e, "status", None)
+                if status not in retry_statuses or attempt >= self.max_retries:
+                    raise
+
+                retry_after = getattr(e, "retry_after", None)
+                delay = retry_after or self.backoff * (2**attempt)
+                attempt += 1
+
+                self._metrics["retries"] += 1
+                if status == 429:
+                    self._metrics["rate_limited"] += 1
+                    # 被限流时暂停整个令牌桶，避免其他请求继续触发 429
+                    self.bucket.pause(delay)
+                    self.logger.warning(
+                        f"[{self.name}] 触发 Notion 限流，{delay:.1f}秒后重试 "
+                        f"(第{attempt}次)"
+                    )
+                else:
+                    self.logger.warning(
+                        f"[{self.name}] 请求失败 (HTTP {status})，{delay:.1f}秒后重试 "
+                        f"(第{attempt}次)"
+                    )
+                    await asyncio.sleep(delay)
+
+    async def append_blocks(
+        self,
+        page_id: str,
+        blocks: List[Dict],
+        send: Callable[[str, List[Dict]], Awaitable[Dict]],
+    ) -> Dict:
+        """追加内容块，与同一页面排队中的调用合并发送
+
+        Args:
+            page_id: 页面ID
+            blocks: 内容块列表 (不超过 MAX_BLOCKS_PER_REQUEST)
+            send: 实际发送请求的函数，参数为 (page_id, blocks)
+
+        Returns:
+            Dict: 合并请求的 API 响应
+        """
+        future = asyncio.get_running_loop().create_future()
+        self._pending_blocks.setdefault(page_id, []).append((blocks, future))
+
+        flusher = self._flushers.get(page_id)
+        if flusher is None or flusher.done():
+            self._flushers[page_id] = asyncio.create_task(
+                self._flush_blocks(page_id, send)
+            )
+
+        return await future
+
+    async def _flush_blocks(
+        self, page_id: str, send: Callable[[str, List[Dict]], Awaitable[Dict]]
+    ) -> None:
+        """按顺序发送某页面排队的内容块，每批最多 MAX_BLOCKS_PER_REQUEST 个"""
+        try:
+            while self._pending_blocks.get(page_id):
+                # 先等待令牌，等待期间到达的调用可以合并到同一批
+                await self._acquire()
+
+                queue = self._pending_blocks[page_id]
+                batch: List[Dict] = []
+                waiters: List[asyncio.Future] = []
+                while queue and (
+                    not batch
+                    or len(batch) + len(queue[0][0]) <= self.MAX_BLOCKS_PER_REQUEST
+                ):
+                    blocks, future = queue.pop(0)
+                    batch.extend(blocks)
+                    waiters.append(future)
+
+                self._metrics["coalesced_calls"] += len(waiters) - 1
+
+                try:
+                    result = await self.execute(
+                        lambda: send(page_id, batch), acquired=True, idempotent=False
+                    )
+                except Exception as e:
+                    for future in waiters:
+                        if not future.done():
+                            future.set_exception(e)
+                else:
+                    for future in waiters:
+                        if not future.done():
+                            future.set_result(result)
+        finally:
+            # 异常退出时，让剩余的调用方收到错误而不是一直等待
+            for _, future in self._pending_blocks.pop(page_id, []):
+                if not future.done():
+                    future.set_exception(RuntimeError("内容块发送任务已终止"))
+            self._flushers.pop(page_id, None)
+
+    def get_metrics(self) -> Dict:
+        """获取调度统计信息
+
+        Returns:
+            Dict: 包含队列深度、请求数、重试数、平均/最大等待时间等
+        """
+        requests = self._metrics["requests"]
+        return {
+            "name": self.name,
+            "queue_depth": self._waiting
+            + sum(len(queue) for queue in self._pending_blocks.values()),
+            "requests": requests,
+            "retries": self._metrics["retries"],
+            "rate_limited": self._metrics["rate_limited"],
+            "coalesced_calls": self._metrics["coalesced_calls"],
+            "avg_wait": self._metrics["total_wait"] / requests if requests else 0.0,
+            "max_wait": self._metrics["max_wait"],
+        }
+
+    @classmethod
+    def get_all_metrics(cls) -> List[Dict]:
+        """获取所有调度器的统计信息"""
+        return [scheduler.get_metrics() for scheduler in cls._schedulers.values()]
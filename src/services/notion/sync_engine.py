@@ -0,0 +1,287 @@
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+from dataclasses import dataclass
+from pathlib import Path
+import asyncio
+import inspect
+import json
+import os
+from ...utils.logger import Logger
+from ...utils.singleton import Singleton
+from ...utils.config_manager import ConfigManager
+from .notion_api import NotionAPI
+
+
+@dataclass
+class NotionChange:
+    """Notion 页面变更事件
+
+    Attributes:
+        type: 变更类型 created / updated / archived
+        user_id: 用户ID
+        database_id: 数据库ID
+        page: 页面对象 (archived 事件可能只包含 id)
+    """
+
+    CREATED = "created"
+    UPDATED = "updated"
+    ARCHIVED = "archived"
+
+    type: str
+    user_id: str
+    database_id: str
+    page: Dict
+
+    @property
+    def page_id(self) -> str:
+        return self.page["id"]
+
+
+class NotionSyncEngine(Singleton):
+    """Notion 增量同步引擎
+
+    负责:
+    1. 按 last_edited_time 高水位增量拉取每个数据库的变更页面
+    2. 向订阅者 (本地索引、缓存等) 发布 created/updated/archived 事件
+    3. 持久化同步进度，重启后从上次位置继续
+    4. 后台定时轮询所有已配置 Notion 的用户
+
+    每次同步的开销只与变更数量有关，与数据库大小无关。
+    Notion 的数据库查询不返回已归档页面，归档事件来自本进程内的删除操作
+    (publish) 或带有 archived 标记的页面。
+    """
+
+    def __init__(self):
+        """初始化同步引擎"""
+        if self._initialized:
+            return
+
+        self.logger = Logger("notion.sync")
+        self.config = ConfigManager()
+        self.state_file = Path(
+            self.config.get(
+                "notion", "sync_state_path", default="data/notion/sync_state.json"
+            )
+        )
+
+        self._subscribers: List[Callable] = []
+        self._locks: Dict[Tuple[str, str], asyncio.Lock] = {}
+        self._task: Optional[asyncio.Task] = None
+
+        # (user_id, database_id) -> 高水位 last_edited_time
+        self._marks: Dict[Tuple[str, str], str] = self._load_state()
+        # 高水位时刻已发布过的页面，避免同一分钟内的页面被重复发布
+        self._seen_at_mark: Dict[Tuple[str, str], Set[str]] = {}
+
+        self._initialized = True
+
+    def _load_state(self) -> Dict[Tuple[str, str], str]:
+        """加载同步进度"""
+        if not self.state_file.exists():
+            return {}
+        try:
+            with open(self.state_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            return {
+                (item["user_id"], item["database_id"]): item["last_edited_time"]
+                for item in data
+            }
+        except Exception as e:
+            self.logger.error(f"加载同步进度失败，将重新全量同步: {str(e)}")
+            return {}
+
+    def _save_state(self) -> None:
+        """保存同步进度 (先写临时文件再替换)"""
+        self.state_file.parent.mkdir(parents=True, exist_ok=True)
+        data = [
+            {"user_id": user_id, "database_id": database_id, "last_edited_time": mark}
+            for (user_id, database_id), mark in self._marks.items()
+        ]
+        tmp_file = self.state_file.with_suffix(f".json.{os.getpid()}.tmp")
+        try:
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_file, self.state_file)
+        finally:
+            if tmp_file.exists():
+                tmp_file.unlink()
+
+    def subscribe(self, callback: Callable) -> None:
+        """订阅页面变更事件
+
+        Args:
+            callback: 回调函数 (同步或异步)，参数为 NotionChange
+        """
+        if callback not in self._subscribers:
+            self._subscribers.append(callback)
+
+    def unsubscribe(self, callback: Callable) -> None:
+        """取消订阅页面变更事件"""
+        self._subscribers = [cb for cb in self._subscribers if cb != callback]
+
+    async def publish(self, change: NotionChange) -> None:
+        """向所有订阅者发布变更事件
+
+        Args:
+            change: 变更事件
+        """
+        for callback in list(self._subscribers):
+            try:
+                result = callback(change)
+                if inspect.isawaitable(result):
+                    await result
+            except Exception as e:
+                self.logger.error(f"处理页面变更事件失败: {str(e)}", exc_info=True)
+
+    def get_mark(self, user_id: str, database_id: str) -> Optional[str]:
+        """获取数据库已同步到的 last_edited_time"""
+        return self._marks.get((str(user_id), database_id))
+
+    def reset(self, user_id: str, database_id: str) -> None:
+        """清除同步进度，下次同步时全量拉取"""
+        key = (str(user_id), database_id)
+        self._marks.pop(key, None)
+        self._seen_at_mark.pop(key, None)
+        self._save_state()
+
+    @staticmethod
+    def _classify(page: Dict, mark: Optional[str]) -> str:
+        """判断页面变更类型"""
+        if page.get("archived") or page.get("in_trash"):
+            return NotionChange.ARCHIVED
+        if mark is None or page.get("created_time", "") >= mark:
+            return NotionChange.CREATED
+        return NotionChange.UPDATED
+
+    async def sync(
+        self, user_id: str, database_id: str, api: Optional[NotionAPI] = None
+    ) -> int:
+        """增量同步一个数据库
+
+        只拉取 last_edited_time 不早于高水位的页面，按编辑时间升序处理，
+        每处理完一页结果就推进并保存高水位，中断后可以继续。
+        没有同步记录时全量拉取，页面均作为 created 事件发布。
+
+        Args:
+            user_id: 用户ID
+            database_id: 数据库ID
+            api: NotionAPI 实例，默认按用户配置创建
+
+        Returns:
+            int: 发布的事件数量
+        """
+        user_id = str(user_id)
+        key = (user_id, database_id)
+        lock = self._locks.setdefault(key, asyncio.Lock())
+
+        async with lock:
+            if api is None:
+                api_key = self.config.get_user_value(user_id, "notion.api_key")
+                if not api_key:
+                    raise ValueError("请先配置 Notion API Key")
+                api = NotionAPI(api_key=api_key)
+
+            # since 为本次同步的起点，用于判断页面是否为新建
+            since = mark = self._marks.get(key)
+            seen = self._seen_at_mark.get(key, set())
+
+            filter_conditions = None
+            if since:
+                # Notion 的 last_edited_time 精确到分钟，用 on_or_after 避免漏掉同一分钟内的修改
+                filter_conditions = {
+                    "timestamp": "last_edited_time",
+                    "last_edited_time": {"on_or_after": since},
+                }
+
+            count = 0
+            async for response in api.iter_database_batches(
+                database_id,
+                filter_conditions=filter_conditions,
+                sorts=[{"timestamp": "last_edited_time", "direction": "ascending"}],
+            ):
+                for page in response.get("results", []):
+                    edited = page.get("last_edited_time", "")
+                    if mark and edited == mark and page["id"] in seen:
+                        continue
+
+                    await self.publish(
+                        NotionChange(
+                            type=self._classify(page, since),
+                            user_id=user_id,
+                            database_id=database_id,
+                            page=page,
+                        )
+                    )
+                    count += 1
+
+                    if not mark or edited > mark:
+                        mark = edited
+                        seen = set()
+                    seen.add(page["id"])
+
+                if mark:
+                    self._marks[key] = mark
+                    self._seen_at_mark[key] = seen
+                    self._save_state()
+
+            if count:
+                self.logger.info(
+                    f"同步完成: user={user_id}, database={database_id[:8]}..., "
+                    f"{count} 个变更"
+                )
+            return count
+
+    async def sync_all(self) -> int:
+        """同步所有已配置 Notion 的用户
+
+        Returns:
+            int: 发布的事件总数
+        """
+        total = 0
+        for user_id, user_config in self.config.get_all_user_configs().items():
+            notion_config = user_config.get("notion") or {}
+            api_key = notion_config.get("api_key")
+            database_id = notion_config.get("database_id")
+            if not api_key or not database_id:
+                continue
+
+            try:
+                total += await self.sync(
+                    user_id, database_id, NotionAPI(api_key=api_key)
+                )
+            except Exception as e:
+                self.logger.error(f"同步用户 {user_id} 的笔记失败: {str(e)}")
+        return total
+
+    async def run(self, interval: Optional[float] = None) -> None:
+        """后台定时同步
+
+        Args:
+            interval: 同步间隔(秒)，默认读取 notion.sync_interval，未配置时为300秒
+        """
+        interval = interval or self.config.get("notion", "sync_interval", default=300)
+        self.logger.info(f"开始后台同步 Notion (间隔 {interval} 秒)")
+        while True:
+            try:
+                await self.sync_all()
+                await asyncio.sleep(interval)
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                self.logger.error(f"后台同步失败: {str(e)}")
+                await asyncio.sleep(interval)
+
+    def start(self, interval: Optional[float] = None) -> asyncio.Task:
+        """在当前事件循环中启动后台同步任务 (重复调用返回同一任务)"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self.run(interval), name="notion_sync")
+        return self._task
+
+    async def stop(self) -> None:
+        """停止后台同步任务"""
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
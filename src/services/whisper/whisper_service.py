@@ -1,4 +1,5 @@
-from typing import Optional
+from typing import Dict, Optional
+import asyncio
 import torch
 import whisper
 from ...utils.logger import Logger
@@ -19,27 +20,56 @@ class WhisperService:
         self.logger = Logger("services.whisper")
         self.config = ConfigManager()
 
-        # 获取配置
-        self.model_name = self.config.get("whisper", "model", default="base")
-        self.device = self.config.get("whisper", "device", default="cpu")
+        # 获取配置并加载模型
+        self.model_name, self.device = self._get_model_config()
+        self.model = self._load_model(self.model_name, self.device)
+
+        # 模型配置变更时重新加载
+        self.config.subscribe(self._on_config_changed, sections=["whisper"])
+
+    def _get_model_config(self) -> tuple:
+        """读取模型名称和设备配置"""
+        model_name = self.config.get("whisper", "model", default="base")
+        device = self.config.get("whisper", "device", default="cpu")
 
         # 检查 CUDA 可用性
-        if self.device == "cuda" and not torch.cuda.is_available():
+        if device == "cuda" and not torch.cuda.is_available():
             self.logger.warning("CUDA不可用，切换到CPU")
-            self.device = "cpu"
+            device = "cpu"
+
+        return model_name, device
 
-        self.logger.info(f"使用设备: {self.device}")
-        self.logger.info(f"使用模型: {self.model_name}")
+    def _load_model(self, model_name: str, device: str):
+        """加载 Whisper 模型"""
+        self.logger.info(f"使用设备: {device}")
+        self.logger.info(f"使用模型: {model_name}")
 
-        # 加载模型
         try:
-            self.model = whisper.load_model(self.model_name)
-            self.model = self.model.to(self.device)
+            model = whisper.load_model(model_name)
+            model = model.to(device)
             self.logger.info("Whisper模型加载成功")
+            return model
         except Exception as e:
             self.logger.error(f"加载Whisper模型失败: {e}")
             raise
 
+    async def _on_config_changed(self, changed: set, config: Dict) -> None:
+        """系统配置变更回调: 在线程中加载新模型后替换"""
+        model_name, device = self._get_model_config()
+        if (model_name, device) == (self.model_name, self.device):
+            return
+
+        try:
+            model = await asyncio.to_thread(self._load_model, model_name, device)
+        except Exception:
+            self.logger.error("新模型加载失败，继续使用当前模型")
+            return
+
+        old_device = self.device
+        self.model, self.model_name, self.device = model, model_name, device
+        if old_device == "cuda":
+            torch.cuda.empty_cache()
+
     async def transcribe(self, audio_path: str, language: Optional[str] = "zh") -> str:
         """转录音频文件
 
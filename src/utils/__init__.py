@@ -1,6 +1,7 @@
 """工具包"""
 
 from .logger import Logger
+from .singleton import Singleton
 from .config_manager import ConfigManager
 from .storage import Storage
 from .exceptions import AppError, ConfigError, StorageError, PlatformError, MessageError
@@ -9,6 +10,7 @@ from .decorators import retry_async, validate_params, log_async
 
 __all__ = [
     'Logger',
+    'Singleton',
     'ConfigManager',
     'Storage',
     'AppError',
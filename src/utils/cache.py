@@ -0,0 +1,118 @@
+from typing import Any, Callable, Hashable, Iterator, Optional, Tuple
+from collections import OrderedDict
+import threading
+import time
+
+
+class LRUCache:
+    """带可选过期时间的 LRU 缓存
+
+    负责:
+    1. 按最近使用顺序淘汰超出容量的条目
+    2. 条目超过 ttl 秒后视为失效
+    3. 淘汰时可回调 on_evict (例如关闭连接)
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 128,
+        ttl: Optional[float] = None,
+        on_evict: Optional[Callable[[Hashable, Any], None]] = None,
+    ):
+        """初始化缓存
+
+        Args:
+            maxsize: 最大条目数
+            ttl: 过期时间(秒)，None 表示不过期
+            on_evict: 条目被淘汰或过期时的回调，参数为 (key, value)
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.on_evict = on_evict
+        self._data: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.RLock()
+
+    def _is_expired(self, stored_at: float) -> bool:
+        """检查条目是否过期"""
+        return self.ttl is not None and time.monotonic() - stored_at > self.ttl
+
+    def _evict(self, key: Hashable, value: Any) -> None:
+        """执行淘汰回调"""
+        if self.on_evict:
+            try:
+                self.on_evict(key, value)
+            except Exception:
+                pass
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """获取条目并标记为最近使用"""
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return default
+
+            stored_at, value = item
+            if self._is_expired(stored_at):
+                del self._data[key]
+                self._evict(key, value)
+                return default
+
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """写入条目，超出容量时淘汰最久未使用的条目"""
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+            self._data[key] = (time.monotonic(), value)
+
+            while len(self._data) > self.maxsize:
+                old_key, (_, old_value) = self._data.popitem(last=False)
+                self._evict(old_key, old_value)
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        """移除条目 (不触发淘汰回调)"""
+        with self._lock:
+            item = self._data.pop(key, None)
+            return item[1] if item else default
+
+    def clear(self) -> None:
+        """清空缓存 (不触发淘汰回调)"""
+        with self._lock:
+            self._data.clear()
+
+    def expire(self) -> int:
+        """清理所有过期条目
+
+        Returns:
+            int: 清理的条目数量
+        """
+        with self._lock:
+            expired = [
+                (key, value)
+                for key, (stored_at, value) in self._data.items()
+                if self._is_expired(stored_at)
+            ]
+            for key, value in expired:
+                del self._data[key]
+                self._evict(key, value)
+            return len(expired)
+
+    def items(self) -> Iterator[Tuple[Hashable, Any]]:
+        """遍历未过期的条目 (返回快照，不影响使用顺序)"""
+        with self._lock:
+            snapshot = [
+                (key, value)
+                for key, (stored_at, value) in self._data.items()
+                if not self._is_expired(stored_at)
+            ]
+        return iter(snapshot)
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            item = self._data.get(key)
+            return item is not None and not self._is_expired(item[0])
+
+    def __len__(self) -> int:
+        return len(self._data)
@@ -1,21 +1,42 @@
-from typing import Any, Dict, Optional
+from typing import Any, Callable, Dict, Hashable, List, Optional, Set, Tuple
+import asyncio
+import copy
+import inspect
+import threading
 import yaml
 from pathlib import Path
 import os
 from .logger import Logger
+from .singleton import Singleton
+from .config_store import UserConfigStore, YamlUserConfigStore, SqliteUserConfigStore
 
 
-class ConfigManager:
+class ConfigManager(Singleton):
     """配置管理器
 
     职责:
     1. 系统配置管理 (data/config/system_config.yml)
-    2. 用户配置管理 (data/config/user_config_{platform}-{id}.yml)
+    2. 用户配置管理 (可选后端: YAML 文件 / SQLite)
     3. 配置文件的读写和验证
+    4. 用户配置的进程级缓存 (按存储版本失效, 写操作直接回写缓存)
+    5. 系统配置热加载，并通知订阅者
+
+    进程内单例: 任意位置调用 ConfigManager() 都返回同一个实例，
+    系统配置只在首次创建时解析一次。
     """
 
+    # 进程级用户配置缓存: (platform, user_id) -> (存储版本, 已解析的配置)
+    _user_config_cache: Dict[Tuple[str, str], Tuple[Hashable, Dict]] = {}
+    _cache_lock = threading.Lock()
+
+    # 进程级存储后端实例: (后端类型, 路径) -> 存储后端
+    _stores: Dict[Tuple[str, str], UserConfigStore] = {}
+
     def __init__(self):
-        """初始化配置管理器"""
+        """初始化配置管理器 (仅首次创建时执行)"""
+        if self._initialized:
+            return
+
         self.logger = Logger("config")
         self.config_dir = Path("data/config")
         self.system_config_file = self.config_dir / "system_config.yml"
@@ -26,8 +47,29 @@ class ConfigManager:
         self.users_dir.mkdir(exist_ok=True)
 
         # 加载系统配置
+        self._system_config_version = self._get_system_config_version()
         self.system_config = self._load_system_config()
 
+        # 系统配置变更订阅者: (回调, 关注的配置段)
+        self._subscribers: List[Tuple[Callable, Optional[Set[str]]]] = []
+        self._watch_task: Optional[asyncio.Task] = None
+
+        # 共享的服务实例: 服务名称 -> 服务实例
+        self._services: Dict[str, Any] = {}
+
+        # 初始化用户配置存储后端
+        self.user_store = self._create_user_store()
+
+        self._initialized = True
+
+    def _get_system_config_version(self) -> Optional[Tuple[int, int]]:
+        """获取系统配置文件版本 (mtime_ns, size)"""
+        try:
+            stat = self.system_config_file.stat()
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
     def _load_system_config(self) -> Dict:
         """加载系统配置"""
         try:
@@ -46,35 +88,239 @@ class ConfigManager:
             self.logger.error(f"加载系统配置失败: {str(e)}")
             return {}
 
-    def _get_user_config_file(self, user_id: str, platform: str = "tg") -> Path:
-        """获取用户配置文件路径"""
-        return self.users_dir / f"user_config_{platform}_{user_id}.yml"
+    def subscribe(
+        self, callback: Callable, sections: Optional[List[str]] = None
+    ) -> None:
+        """订阅系统配置变更
+
+        Args:
+            callback: 回调函数 (同步或异步)，参数为 (变更的配置段集合, 新的系统配置)
+            sections: 关注的配置段，例如 ["openai"]；为 None 时关注所有配置段
+        """
+        self._subscribers.append((callback, set(sections) if sections else None))
 
-    def _load_user_config(self, user_id: str, platform: str = "tg") -> Dict:
-        """加载用户配置"""
-        config_file = self._get_user_config_file(user_id, platform)
-        if not config_file.exists():
+    def unsubscribe(self, callback: Callable) -> None:
+        """取消订阅系统配置变更"""
+        self._subscribers = [
+            (cb, sections) for cb, sections in self._subscribers if cb != callback
+        ]
+
+    async def reload_system_config(self) -> Set[str]:
+        """检查并重新加载系统配置
+
+        文件未变化时不会解析；新配置无效时保留旧配置。
+
+        Returns:
+            Set[str]: 发生变化的配置段
+        """
+        version = self._get_system_config_version()
+        if version is None or version == self._system_config_version:
+            return set()
+        self._system_config_version = version
+
+        new_config = self._load_system_config()
+        if not new_config:
+            self.logger.warning("新的系统配置无效，保留当前配置")
+            return set()
+
+        old_config = self.system_config
+        changed = {
+            section
+            for section in set(old_config) | set(new_config)
+            if old_config.get(section) != new_config.get(section)
+        }
+        if not changed:
+            return set()
+
+        self.system_config = new_config
+        self.logger.info(f"系统配置已重新加载，变更: {sorted(changed)}")
+
+        for callback, sections in list(self._subscribers):
+            if sections is not None and not (sections & changed):
+                continue
+            try:
+                result = callback(changed, new_config)
+                if inspect.isawaitable(result):
+                    await result
+            except Exception as e:
+                self.logger.error(f"通知配置变更失败: {str(e)}", exc_info=True)
+
+        return changed
+
+    async def watch_system_config(self, interval: Optional[float] = None) -> None:
+        """轮询系统配置文件，变化时热加载
+
+        Args:
+            interval: 轮询间隔(秒)，默认读取 system.reload_interval，未配置时为5秒
+        """
+        interval = interval or self.get("system", "reload_interval", default=5.0)
+        self.logger.info(f"开始监听系统配置变更 (间隔 {interval} 秒)")
+        while True:
+            try:
+                await asyncio.sleep(interval)
+                await self.reload_system_config()
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                self.logger.error(f"热加载系统配置失败: {str(e)}")
+
+    def start_watching(self, interval: Optional[float] = None) -> asyncio.Task:
+        """在当前事件循环中启动系统配置监听任务 (重复调用返回同一任务)"""
+        if self._watch_task is None or self._watch_task.done():
+            self._watch_task = asyncio.create_task(
+                self.watch_system_config(interval), name="config_watcher"
+            )
+        return self._watch_task
+
+    def _create_user_store(self) -> UserConfigStore:
+        """根据系统配置创建用户配置存储后端
+
+        storage.user_config_backend: yaml (默认) 或 sqlite
+        storage.sqlite_path: SQLite 数据库路径 (默认 data/config/user_config.db)
+        """
+        storage_config = self.system_config.get("storage", {}) or {}
+        backend = storage_config.get("user_config_backend", "yaml")
+
+        if backend == "sqlite":
+            db_path = storage_config.get(
+                "sqlite_path", str(self.config_dir / "user_config.db")
+            )
+            store_key = ("sqlite", str(db_path))
+        else:
+            if backend != "yaml":
+                self.logger.warning(f"未知的用户配置存储后端: {backend}，使用 yaml")
+            store_key = ("yaml", str(self.users_dir))
+
+        with self._cache_lock:
+            store = self._stores.get(store_key)
+            if store:
+                return store
+
+            if store_key[0] == "sqlite":
+                store = SqliteUserConfigStore(Path(store_key[1]))
+                # 首次启用 SQLite 时从 YAML 文件迁移
+                store.migrate_from_yaml(self.users_dir)
+            else:
+                store = YamlUserConfigStore(self.users_dir)
+
+            self._stores[store_key] = store
+            self.logger.info(f"用户配置存储后端: {store_key[0]}")
+            return store
+
+    def _get_cached_user_config(self, user_id: str, platform: str = "tg") -> Dict:
+        """获取缓存的用户配置
+
+        存储版本未变化时直接返回缓存，不会重新解析配置。
+        返回的字典与缓存共享，调用方不能修改。
+        """
+        cache_key = (platform, str(user_id))
+        try:
+            version = self.user_store.get_version(user_id, platform)
+        except Exception as e:
+            self.logger.error(f"获取用户配置版本失败: {str(e)}")
             return {}
 
+        with self._cache_lock:
+            if version is None:
+                self._user_config_cache.pop(cache_key, None)
+                return {}
+
+            cached = self._user_config_cache.get(cache_key)
+            if cached and cached[0] == version:
+                return cached[1]
+
         try:
-            with open(config_file, 'r', encoding='utf-8') as f:
-                return yaml.safe_load(f) or {}
+            config = self.user_store.load(user_id, platform)
         except Exception as e:
             self.logger.error(f"加载用户配置失败: {str(e)}")
             return {}
 
+        with self._cache_lock:
+            self._user_config_cache[cache_key] = (version, config)
+        return config
+
+    def _load_user_config(self, user_id: str, platform: str = "tg") -> Dict:
+        """加载用户配置 (返回可修改的副本)"""
+        return copy.deepcopy(self._get_cached_user_config(user_id, platform))
+
+    def _update_cache(self, user_id: str, config: Dict, platform: str = "tg") -> None:
+        """写操作完成后回写缓存"""
+        cache_key = (platform, str(user_id))
+        try:
+            version = self.user_store.get_version(user_id, platform)
+        except Exception:
+            version = None
+
+        with self._cache_lock:
+            if version is None:
+                self._user_config_cache.pop(cache_key, None)
+            else:
+                self._user_config_cache[cache_key] = (version, copy.deepcopy(config))
+
     def _save_user_config(
         self, user_id: str, config: Dict, platform: str = "tg"
     ) -> None:
-        """保存用户配置"""
-        config_file = self._get_user_config_file(user_id, platform)
+        """保存用户配置，并回写缓存"""
         try:
-            with open(config_file, 'w', encoding='utf-8') as f:
-                yaml.safe_dump(config, f, allow_unicode=True)
+            self.user_store.save(user_id, config, platform)
         except Exception as e:
             self.logger.error(f"保存用户配置失败: {str(e)}")
+            self.invalidate_user_cache(user_id, platform)
             raise
 
+        self._update_cache(user_id, config, platform)
+
+    def invalidate_user_cache(
+        self, user_id: Optional[str] = None, platform: str = "tg"
+    ) -> None:
+        """使用户配置缓存失效
+
+        Args:
+            user_id: 用户ID，为 None 时清空全部缓存
+            platform: 平台标识
+        """
+        with self._cache_lock:
+            if user_id is None:
+                self._user_config_cache.clear()
+            else:
+                self._user_config_cache.pop((platform, str(user_id)), None)
+
+    def get_all_user_configs(self, platform: str = "tg") -> Dict[str, Dict]:
+        """批量获取某平台下所有用户的配置
+
+        复用单个用户配置的缓存: 只读取各用户的版本号，版本变化的配置才重新加载。
+        后台任务定期调用时不会每次重新解析所有配置文件。
+
+        Args:
+            platform: 平台标识(tg, wx等)
+
+        Returns:
+            Dict[str, Dict]: 用户ID -> 配置 (可修改的副本)
+        """
+        try:
+            versions = self.user_store.get_versions(platform)
+        except Exception as e:
+            self.logger.error(f"批量获取用户配置失败: {str(e)}")
+            return {}
+
+        configs = {}
+        for user_id, version in versions.items():
+            cache_key = (platform, str(user_id))
+            with self._cache_lock:
+                cached = self._user_config_cache.get(cache_key)
+            if cached and cached[0] == version:
+                config = cached[1]
+            else:
+                try:
+                    config = self.user_store.load(user_id, platform)
+                except Exception as e:
+                    self.logger.error(f"加载用户配置失败: {user_id}: {str(e)}")
+                    continue
+                with self._cache_lock:
+                    self._user_config_cache[cache_key] = (version, config)
+            configs[user_id] = copy.deepcopy(config)
+        return configs
+
     def get(self, section: str, key: str, default: Any = None) -> Optional[Any]:
         """获取系统配置值
 
@@ -117,11 +363,13 @@ class ConfigManager:
             None: 如果配置不存在且未提供默认值
         """
         try:
-            config = self._load_user_config(user_id, platform)
-            value = config
+            value = self._get_cached_user_config(user_id, platform)
             for key in path.split('.'):
                 value = value.get(key, {})
-            return value if value != {} else default
+            if value == {}:
+                return default
+            # 返回副本，避免调用方修改缓存
+            return copy.deepcopy(value) if isinstance(value, (dict, list)) else value
         except Exception as e:
             self.logger.error(f"获取用户配置失败: {str(e)}")
             return default
@@ -131,50 +379,24 @@ class ConfigManager:
     ) -> None:
         """设置用户配置值"""
         try:
-            config = self._load_user_config(user_id, platform)
-
-            # 解析路径
-            keys = path.split('.')
-            current = config
-
-            # 创建嵌套结构
-            for key in keys[:-1]:
-                current = current.setdefault(key, {})
-
-            # 设置值
-            current[keys[-1]] = value
-
-            # 保存配置
-            self._save_user_config(user_id, config, platform)
+            config = self.user_store.set_value(user_id, path, value, platform)
+            self._update_cache(user_id, config, platform)
 
         except Exception as e:
             self.logger.error(f"设置用户配置失败: {str(e)}")
+            self.invalidate_user_cache(user_id, platform)
             raise
 
     def delete_user_config(self, user_id: str, path: str, platform: str = "tg") -> None:
         """删除用户配置"""
         try:
-            config = self._load_user_config(user_id, platform)
-
-            # 解析路径
-            keys = path.split('.')
-            current = config
-
-            # 遍历到最后一个键的父级
-            for key in keys[:-1]:
-                if key not in current:
-                    return
-                current = current[key]
-
-            # 删除最后一个键
-            if keys[-1] in current:
-                del current[keys[-1]]
-
-            # 保存配置
-            self._save_user_config(user_id, config, platform)
+            config = self.user_store.delete_value(user_id, path, platform)
+            if config is not None:
+                self._update_cache(user_id, config, platform)
 
         except Exception as e:
             self.logger.error(f"删除用户配置失败: {str(e)}")
+            self.invalidate_user_cache(user_id, platform)
             raise
 
     def get_service(self, service_name: str, user_id: str) -> Any:
@@ -203,11 +425,14 @@ class ConfigManager:
                     self.logger.error(f"滴答清单token无效: {token_info}")
                     return None
 
-                # 创建服务实例
-                from ..services.dida365.dida_service import DidaService
+                # 所有消息共享同一个服务实例 (其中的客户端池按用户复用)
+                service = self._services.get(service_name)
+                if service is None:
+                    from ..services.dida365.dida_service import DidaService
 
-                service = DidaService()
-                self.logger.info(f"已创建滴答清单服务实例: user_id={user_id}")
+                    service = DidaService()
+                    self._services[service_name] = service
+                    self.logger.info("已创建滴答清单服务实例")
                 return service
 
             self.logger.warning(f"未知的服务类型: {service_name}")
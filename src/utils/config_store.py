@@ -0,0 +1,371 @@
+from typing import Any, Dict, Hashable, List, Optional
+from abc import ABC, abstractmethod
+from pathlib import Path
+import json
+import os
+import sqlite3
+import threading
+import yaml
+from .logger import Logger
+
+
+class UserConfigStore(ABC):
+    """用户配置存储后端基类
+
+    职责:
+    1. 用户配置文档的读写
+    2. 按路径更新/删除单个配置项
+    3. 提供版本号，用于 ConfigManager 判断缓存是否失效
+    """
+
+    @abstractmethod
+    def get_version(self, user_id: str, platform: str = "tg") -> Optional[Hashable]:
+        """获取用户配置版本
+
+        Returns:
+            Hashable: 版本标识，内容变化时必须变化
+            None: 配置不存在
+        """
+
+    @abstractmethod
+    def load(self, user_id: str, platform: str = "tg") -> Dict:
+        """加载用户配置"""
+
+    @abstractmethod
+    def save(self, user_id: str, config: Dict, platform: str = "tg") -> None:
+        """保存整个用户配置"""
+
+    @abstractmethod
+    def set_value(
+        self, user_id: str, path: str, value: Any, platform: str = "tg"
+    ) -> Dict:
+        """设置配置项
+
+        Args:
+            user_id: 用户ID
+            path: 配置路径 (例如: "notion.api_key")
+            value: 配置值
+            platform: 平台标识
+
+        Returns:
+            Dict: 更新后的完整配置
+        """
+
+    @abstractmethod
+    def delete_value(
+        self, user_id: str, path: str, platform: str = "tg"
+    ) -> Optional[Dict]:
+        """删除配置项
+
+        Returns:
+            Dict: 更新后的完整配置
+            None: 配置项不存在，未做修改
+        """
+
+    @abstractmethod
+    def load_all(self, platform: str = "tg") -> Dict[str, Dict]:
+        """批量加载某平台下所有用户的配置
+
+        Returns:
+            Dict[str, Dict]: 用户ID -> 配置
+        """
+
+    @abstractmethod
+    def get_versions(self, platform: str = "tg") -> Dict[str, Hashable]:
+        """批量获取某平台下所有用户的配置版本 (不读取配置内容)
+
+        Returns:
+            Dict[str, Hashable]: 用户ID -> 版本标识
+        """
+
+
+class YamlUserConfigStore(UserConfigStore):
+    """YAML 文件存储后端
+
+    每个用户一个文件: {config_dir}/user_config_{platform}_{id}.yml
+    """
+
+    FILE_PREFIX = "user_config_"
+
+    def __init__(self, config_dir: Path):
+        self.logger = Logger("config_store.yaml")
+        self.config_dir = Path(config_dir)
+        self.config_dir.mkdir(parents=True, exist_ok=True)
+
+    def _get_file(self, user_id: str, platform: str = "tg") -> Path:
+        """获取用户配置文件路径"""
+        return self.config_dir / f"{self.FILE_PREFIX}{platform}_{user_id}.yml"
+
+    def get_version(self, user_id: str, platform: str = "tg") -> Optional[Hashable]:
+        """以 (mtime_ns, size) 作为版本号"""
+        try:
+            stat = self._get_file(user_id, platform).stat()
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def load(self, user_id: str, platform: str = "tg") -> Dict:
+        """加载用户配置"""
+        config_file = self._get_file(user_id, platform)
+        if not config_file.exists():
+            return {}
+
+        with open(config_file, 'r', encoding='utf-8') as f:
+            return yaml.safe_load(f) or {}
+
+    def save(self, user_id: str, config: Dict, platform: str = "tg") -> None:
+        """保存用户配置 (先写临时文件再替换，避免写入一半的文件)"""
+        config_file = self._get_file(user_id, platform)
+        tmp_file = config_file.with_suffix(f".yml.{os.getpid()}.tmp")
+        try:
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                yaml.safe_dump(config, f, allow_unicode=True)
+            os.replace(tmp_file, config_file)
+        finally:
+            if tmp_file.exists():
+                tmp_file.unlink()
+
+    def set_value(
+        self, user_id: str, path: str, value: Any, platform: str = "tg"
+    ) -> Dict:
+        """设置配置项"""
+        config = self.load(user_id, platform)
+
+        # 创建嵌套结构
+        keys = path.split('.')
+        current = config
+        for key in keys[:-1]:
+            current = current.setdefault(key, {})
+        current[keys[-1]] = value
+
+        self.save(user_id, config, platform)
+        return config
+
+    def delete_value(
+        self, user_id: str, path: str, platform: str = "tg"
+    ) -> Optional[Dict]:
+        """删除配置项"""
+        config = self.load(user_id, platform)
+
+        # 遍历到最后一个键的父级
+        keys = path.split('.')
+        current = config
+        for key in keys[:-1]:
+            if key not in current:
+                return None
+            current = current[key]
+
+        if keys[-1] in current:
+            del current[keys[-1]]
+
+        self.save(user_id, config, platform)
+        return config
+
+    def load_all(self, platform: str = "tg") -> Dict[str, Dict]:
+        """批量加载所有用户配置"""
+        prefix = f"{self.FILE_PREFIX}{platform}_"
+        configs = {}
+        for config_file in self.config_dir.glob(f"{prefix}*.yml"):
+            user_id = config_file.stem[len(prefix) :]
+            try:
+                configs[user_id] = self.load(user_id, platform)
+            except Exception as e:
+                self.logger.error(f"加载用户配置失败: {config_file.name}: {str(e)}")
+        return configs
+
+    def get_versions(self, platform: str = "tg") -> Dict[str, Hashable]:
+        """批量获取所有用户配置文件的 (mtime_ns, size)"""
+        prefix = f"{self.FILE_PREFIX}{platform}_"
+        versions = {}
+        for config_file in self.config_dir.glob(f"{prefix}*.yml"):
+            try:
+                stat = config_file.stat()
+            except FileNotFoundError:
+                continue
+            versions[config_file.stem[len(prefix) :]] = (stat.st_mtime_ns, stat.st_size)
+        return versions
+
+
+class SqliteUserConfigStore(UserConfigStore):
+    """SQLite 存储后端
+
+    所有用户配置保存在一张表中，每个用户一行 JSON 文档。
+    使用 WAL 模式，单项更新通过 json_set/json_remove 在一条语句内原子完成。
+    """
+
+    def __init__(self, db_path: Path):
+        self.logger = Logger("config_store.sqlite")
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+
+        self._conn = sqlite3.connect(
+            str(self.db_path), check_same_thread=False, isolation_level=None
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS user_configs (
+                platform TEXT NOT NULL,
+                user_id TEXT NOT NULL,
+                config TEXT NOT NULL DEFAULT '{}',
+                revision INTEGER NOT NULL DEFAULT 1,
+                updated_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (platform, user_id)
+            );
+            CREATE TABLE IF NOT EXISTS meta (
+                key TEXT PRIMARY KEY,
+                value TEXT
+            );
+            """
+        )
+
+    @staticmethod
+    def _json_path(path: str) -> str:
+        """将 "a.b.c" 转换为 SQLite JSON 路径 '$."a"."b"."c"'"""
+        return "$" + "".join(f'."{key}"' for key in path.split('.'))
+
+    def get_version(self, user_id: str, platform: str = "tg") -> Optional[Hashable]:
+        """以行修订号作为版本号"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT revision FROM user_configs WHERE platform = ? AND user_id = ?",
+                (platform, str(user_id)),
+            ).fetchone()
+        return row[0] if row else None
+
+    def load(self, user_id: str, platform: str = "tg") -> Dict:
+        """加载用户配置"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT config FROM user_configs WHERE platform = ? AND user_id = ?",
+                (platform, str(user_id)),
+            ).fetchone()
+        return json.loads(row[0]) if row else {}
+
+    def save(self, user_id: str, config: Dict, platform: str = "tg") -> None:
+        """保存整个用户配置"""
+        with self._lock:
+            self._conn.execute(
+                """
+                INSERT INTO user_configs (platform, user_id, config)
+                VALUES (?, ?, ?)
+                ON CONFLICT (platform, user_id) DO UPDATE SET
+                    config = excluded.config,
+                    revision = revision + 1,
+                    updated_at = CURRENT_TIMESTAMP
+                """,
+                (platform, str(user_id), json.dumps(config, ensure_ascii=False)),
+            )
+
+    def set_value(
+        self, user_id: str, path: str, value: Any, platform: str = "tg"
+    ) -> Dict:
+        """设置配置项 (单条语句原子更新)"""
+        json_path = self._json_path(path)
+        value_json = json.dumps(value, ensure_ascii=False)
+        with self._lock:
+            row = self._conn.execute(
+                """
+                INSERT INTO user_configs (platform, user_id, config)
+                VALUES (?, ?, json_set('{}', ?, json(?)))
+                ON CONFLICT (platform, user_id) DO UPDATE SET
+                    config = json_set(config, ?, json(?)),
+                    revision = revision + 1,
+                    updated_at = CURRENT_TIMESTAMP
+                RETURNING config
+                """,
+                (platform, str(user_id), json_path, value_json, json_path, value_json),
+            ).fetchone()
+        return json.loads(row[0])
+
+    def delete_value(
+        self, user_id: str, path: str, platform: str = "tg"
+    ) -> Optional[Dict]:
+        """删除配置项 (单条语句原子更新)"""
+        with self._lock:
+            row = self._conn.execute(
+                """
+                UPDATE user_configs SET
+                    config = json_remove(config, ?),
+                    revision = revision + 1,
+                    updated_at = CURRENT_TIMESTAMP
+                WHERE platform = ? AND user_id = ?
+                RETURNING config
+                """,
+                (self._json_path(path), platform, str(user_id)),
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def load_all(self, platform: str = "tg") -> Dict[str, Dict]:
+        """批量加载所有用户配置 (单次查询)"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT user_id, config FROM user_configs WHERE platform = ?",
+                (platform,),
+            ).fetchall()
+        return {user_id: json.loads(config) for user_id, config in rows}
+
+    def get_versions(self, platform: str = "tg") -> Dict[str, Hashable]:
+        """批量获取所有用户配置的行修订号 (单次查询)"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT user_id, revision FROM user_configs WHERE platform = ?",
+                (platform,),
+            ).fetchall()
+        return {user_id: revision for user_id, revision in rows}
+
+    def migrate_from_yaml(self, config_dir: Path) -> int:
+        """从 YAML 文件一次性迁移用户配置
+
+        已迁移过（meta 表中有标记）时直接跳过；已存在于数据库中的用户不会被覆盖。
+
+        Args:
+            config_dir: YAML 配置文件目录
+
+        Returns:
+            int: 迁移的用户数量
+        """
+        with self._lock:
+            migrated = self._conn.execute(
+                "SELECT value FROM meta WHERE key = 'yaml_migrated'"
+            ).fetchone()
+        if migrated:
+            return 0
+
+        yaml_store = YamlUserConfigStore(config_dir)
+        rows: List[tuple] = []
+        for config_file in Path(config_dir).glob(
+            f"{YamlUserConfigStore.FILE_PREFIX}*_*.yml"
+        ):
+            name = config_file.stem[len(YamlUserConfigStore.FILE_PREFIX) :]
+            platform, _, user_id = name.partition("_")
+            try:
+                config = yaml_store.load(user_id, platform)
+            except Exception as e:
+                self.logger.error(f"迁移用户配置失败: {config_file.name}: {str(e)}")
+                continue
+            rows.append((platform, user_id, json.dumps(config, ensure_ascii=False)))
+
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.executemany(
+                    """
+                    INSERT OR IGNORE INTO user_configs (platform, user_id, config)
+                    VALUES (?, ?, ?)
+                    """,
+                    rows,
+                )
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO meta (key, value) VALUES ('yaml_migrated', ?)",
+                    (str(len(rows)),),
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+        self.logger.info(f"已从 YAML 迁移 {len(rows)} 个用户配置")
+        return len(rows)
@@ -0,0 +1,33 @@
+import threading
+
+
+class Singleton:
+    """进程内单例基类
+
+    子类在任意位置调用 Cls() 都返回同一个实例 (每个子类各自一个实例和一把锁)。
+    __init__ 每次调用都会执行，子类需检查 self._initialized，
+    只在首次创建时初始化，并在初始化完成后置为 True:
+
+        def __init__(self):
+            if self._initialized:
+                return
+            ...
+            self._initialized = True
+    """
+
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._instance = None
+        cls._instance_lock = threading.Lock()
+
+    def __new__(cls):
+        if cls._instance is None:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    instance = super().__new__(cls)
+                    instance._initialized = False
+                    cls._instance = instance
+        return cls._instance
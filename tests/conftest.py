@@ -0,0 +1,31 @@
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+
+def pytest_configure(config):
+    """日志、系统配置等默认读写当前目录下的 data/，测试期间切换到临时目录"""
+    os.chdir(tempfile.mkdtemp(prefix="hiben-tests-"))
+
+
+@pytest.fixture
+def system_config(monkeypatch):
+    """替换 ConfigManager 的系统配置，测试结束后恢复
+
+    用法: system_config({"dida": {"ledger_path": "..."}})
+    """
+    from src.utils.config_manager import ConfigManager
+
+    manager = ConfigManager()
+
+    def apply(config):
+        monkeypatch.setattr(manager, "system_config", config)
+        return manager
+
+    return apply
@@ -0,0 +1,67 @@
+import yaml
+
+from src.utils.config_store import SqliteUserConfigStore, YamlUserConfigStore
+
+
+def write_yaml(config_dir, platform, user_id, config):
+    path = config_dir / f"{YamlUserConfigStore.FILE_PREFIX}{platform}_{user_id}.yml"
+    path.write_text(yaml.safe_dump(config, allow_unicode=True), encoding="utf-8")
+
+
+def test_migrate_from_yaml(tmp_path):
+    config_dir = tmp_path / "config"
+    config_dir.mkdir()
+    write_yaml(config_dir, "tg", "1001", {"dida": {"token": {"access_token": "a"}}})
+    write_yaml(config_dir, "wx", "wxid_abc", {"notion": {"api_key": "秘钥"}})
+
+    store = SqliteUserConfigStore(tmp_path / "user_config.db")
+    assert store.migrate_from_yaml(config_dir) == 2
+
+    assert store.load("1001", "tg") == {"dida": {"token": {"access_token": "a"}}}
+    # 用户ID中的下划线属于ID本身，只按第一个下划线拆分平台
+    assert store.load("wxid_abc", "wx") == {"notion": {"api_key": "秘钥"}}
+    assert store.get_versions("tg") == {"1001": 1}
+
+
+def test_migrate_from_yaml_runs_once(tmp_path):
+    config_dir = tmp_path / "config"
+    config_dir.mkdir()
+    write_yaml(config_dir, "tg", "1001", {"a": 1})
+
+    store = SqliteUserConfigStore(tmp_path / "user_config.db")
+    assert store.migrate_from_yaml(config_dir) == 1
+
+    # 迁移之后的修改不会被 YAML 文件覆盖
+    store.set_value("1001", "a", 2)
+    write_yaml(config_dir, "tg", "1002", {"a": 3})
+    assert store.migrate_from_yaml(config_dir) == 0
+    assert store.load("1001") == {"a": 2}
+    assert store.load("1002") == {}
+
+
+def test_migrate_from_yaml_keeps_existing_rows(tmp_path):
+    config_dir = tmp_path / "config"
+    config_dir.mkdir()
+    write_yaml(config_dir, "tg", "1001", {"source": "yaml"})
+
+    store = SqliteUserConfigStore(tmp_path / "user_config.db")
+    store.save("1001", {"source": "sqlite"})
+    store.migrate_from_yaml(config_dir)
+
+    assert store.load("1001") == {"source": "sqlite"}
+
+
+def test_set_and_delete_nested_value(tmp_path):
+    store = SqliteUserConfigStore(tmp_path / "user_config.db")
+
+    assert store.set_value("1001", "dida.token.access_token", "a") == {
+        "dida": {"token": {"access_token": "a"}}
+    }
+    store.set_value("1001", "dida.default_tag", "收集")
+    assert store.load("1001") == {
+        "dida": {"token": {"access_token": "a"}, "default_tag": "收集"}
+    }
+    assert store.get_version("1001") == 2
+
+    assert store.delete_value("1001", "dida.token") == {"dida": {"default_tag": "收集"}}
+    assert store.delete_value("missing", "dida.token") is None
@@ -0,0 +1,55 @@
+import pytest
+
+from src.services.llm.model_router import ModelRouter
+
+
+@pytest.fixture
+def router(system_config):
+    system_config({"openai": {"routing_max_chars": 100, "routing_max_lines": 5}})
+    return ModelRouter()
+
+
+def test_fixed_policy(router):
+    assert router.choose("url_text_analyzer", "很长的内容" * 100)[0] == "small"
+    assert router.choose("analyze_content", "短")[0] == "large"
+
+
+def test_auto_short_text_uses_small_model(router):
+    assert router.choose("format_content", "明天下午开会") == ("small", "短文本")
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "字" * 101,
+        "\n".join(["行"] * 6),
+        "```\nprint(1)\n```",
+        "| a | b |",
+    ],
+)
+def test_auto_long_or_structured_text_uses_large_model(router, text):
+    assert router.choose("format_content", text)[0] == "large"
+
+
+def test_many_time_expressions_use_large_model_for_tasks(router):
+    text = "今天 明天 后天 下周一 周三 上午 下午"
+    assert router.choose("extract_tasks", text)[0] == "large"
+    assert router.choose("format_content", text)[0] == "small"
+
+
+def test_routing_config_overrides_default(system_config):
+    system_config({"openai": {"routing": {"format_content": "large"}}})
+    assert ModelRouter().choose("format_content", "短")[0] == "large"
+
+
+def test_record_estimates_cost(system_config):
+    system_config({"openai": {"model_prices": {"m": {"input": 1, "output": 2}}}})
+    router = ModelRouter()
+    router.record(
+        "format_content", "small", "m", "短文本", 0.5,
+        {"input_tokens": 1000, "output_tokens": 500},
+    )
+    stats = router.get_stats()["format_content"]["small"]
+    assert stats["calls"] == 1
+    assert stats["cost"] == pytest.approx(0.002)
+    assert stats["avg_latency"] == 0.5
@@ -0,0 +1,62 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from src.services.notion.notes_index import NotesIndex
+
+
+def make_page(page_id, title, content="", created_time="2024-06-15T08:00:00.000Z"):
+    return {
+        "id": page_id,
+        "created_time": created_time,
+        "last_edited_time": created_time,
+        "properties": {
+            "Title": {"title": [{"plain_text": title}]},
+            "Content": {"rich_text": [{"plain_text": content}]},
+            "Tags": {"multi_select": []},
+        },
+    }
+
+
+@pytest.fixture
+def index(tmp_path, monkeypatch, system_config):
+    system_config({"notion": {"index_path": str(tmp_path / "notes_index.db")}})
+    monkeypatch.setattr(NotesIndex, "_instance", None)
+    index = NotesIndex()
+    # 少于 3 个字符的关键词走 LIKE 查询
+    index.fts_tokenizer = "trigram"
+    return index
+
+
+def titles(notes):
+    return sorted(note["title"] for note in notes)
+
+
+def test_like_fallback_escapes_percent(index):
+    index.upsert_pages(
+        "1",
+        "db",
+        [make_page("p1", "折扣", "全场 5% 优惠"), make_page("p2", "排名", "第5名")],
+    )
+    assert titles(index.search("1", query="5%")) == ["折扣"]
+
+
+def test_like_fallback_escapes_underscore(index):
+    index.upsert_pages(
+        "1", "db", [make_page("p1", "变量", "a_b"), make_page("p2", "其他", "axb")]
+    )
+    assert titles(index.search("1", query="a_")) == ["变量"]
+
+
+def test_date_filter_compares_in_utc(index):
+    index.upsert_pages(
+        "1",
+        "db",
+        [
+            make_page("p1", "早上", created_time="2024-06-15T00:30:00.000Z"),
+            make_page("p2", "前一天", created_time="2024-06-14T15:30:00.000Z"),
+        ],
+    )
+    # 北京时间 6 月 15 日 0 点 = UTC 6 月 14 日 16 点
+    start = datetime(2024, 6, 15, tzinfo=timezone(timedelta(hours=8)))
+    assert titles(index.search("1", start_date=start)) == ["早上"]
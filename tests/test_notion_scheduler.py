@@ -0,0 +1,72 @@
+import asyncio
+import time
+
+import pytest
+
+from src.services.notion.notion_scheduler import NotionScheduler, TokenBucket
+
+
+class FakeHTTPError(Exception):
+    def __init__(self, status, retry_after=None):
+        super().__init__(f"HTTP {status}")
+        self.status = status
+        self.retry_after = retry_after
+
+
+def make_request(errors, result="ok"):
+    """前几次调用依次抛出 errors 中的异常，之后返回 result"""
+    calls = []
+
+    async def request():
+        calls.append(time.monotonic())
+        if len(calls) <= len(errors):
+            raise errors[len(calls) - 1]
+        return result
+
+    return request, calls
+
+
+def test_token_bucket_limits_rate():
+    async def run():
+        bucket = TokenBucket(rate=20, capacity=2)
+        started = time.monotonic()
+        for _ in range(4):
+            await bucket.acquire()
+        return time.monotonic() - started
+
+    # 前 2 个为突发请求，之后每 0.05 秒一个
+    assert asyncio.run(run()) >= 0.09
+
+
+def test_retry_after_pauses_bucket():
+    scheduler = NotionScheduler("test", rate=100, burst=1, metrics_log_interval=0)
+    request, calls = make_request([FakeHTTPError(429, retry_after=0.1)])
+
+    assert asyncio.run(scheduler.execute(request)) == "ok"
+    assert len(calls) == 2
+    assert calls[1] - calls[0] >= 0.1
+    assert scheduler.get_metrics()["rate_limited"] == 1
+
+
+def test_gateway_error_retried_only_when_idempotent():
+    scheduler = NotionScheduler(
+        "test", rate=100, burst=5, backoff=0.01, metrics_log_interval=0
+    )
+
+    request, calls = make_request([FakeHTTPError(502)])
+    assert asyncio.run(scheduler.execute(request)) == "ok"
+    assert len(calls) == 2
+
+    request, calls = make_request([FakeHTTPError(502)])
+    with pytest.raises(FakeHTTPError):
+        asyncio.run(scheduler.execute(request, idempotent=False))
+    assert len(calls) == 1
+
+
+def test_non_retryable_status_raises():
+    scheduler = NotionScheduler("test", rate=100, burst=5, metrics_log_interval=0)
+    request, calls = make_request([FakeHTTPError(400)])
+
+    with pytest.raises(FakeHTTPError):
+        asyncio.run(scheduler.execute(request))
+    assert len(calls) == 1
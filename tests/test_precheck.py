@@ -0,0 +1,57 @@
+import pytest
+
+from src.services.llm.precheck import ContentPrecheck
+
+
+@pytest.fixture
+def precheck():
+    return ContentPrecheck()
+
+
+def test_bare_domain(precheck):
+    result, ambiguous = precheck.analyze("看看 example.com/docs 这篇")
+    assert result == {
+        "contains_url": True,
+        "contains_text": True,
+        "urls": ["example.com/docs"],
+    }
+    assert not ambiguous
+
+
+def test_uncommon_tld_is_ambiguous(precheck):
+    result, ambiguous = precheck.analyze("foo.museum")
+    assert result["urls"] == ["foo.museum"]
+    assert not result["contains_text"]
+    assert ambiguous
+
+
+def test_file_extension_is_not_url(precheck):
+    result, ambiguous = precheck.analyze("修改 main.py 和 README.md")
+    assert result == {"contains_url": False, "contains_text": True}
+    assert not ambiguous
+
+
+@pytest.mark.parametrize(
+    "text, url",
+    [
+        ("https://zh.wikipedia.org/wiki/北京市，很好", "https://zh.wikipedia.org/wiki/北京市"),
+        ("https://a.com/s?q=中文#节 后面", "https://a.com/s?q=中文#节"),
+        ("链接https://example.com。结束", "https://example.com"),
+        ("见（www.example.com/路径）", "www.example.com/路径"),
+        ("https://example.com这是说明", "https://example.com"),
+    ],
+)
+def test_strong_url_with_cjk_path(precheck, text, url):
+    result, ambiguous = precheck.analyze(text)
+    assert result["urls"] == [url]
+    assert result["contains_text"]
+    assert not ambiguous
+
+
+def test_url_only(precheck):
+    result, _ = precheck.analyze("https://example.com/a/b?c=1.")
+    assert result == {
+        "contains_url": True,
+        "contains_text": False,
+        "urls": ["https://example.com/a/b?c=1"],
+    }
@@ -0,0 +1,47 @@
+import pytest
+
+from src.services.llm.structured_output import parse_note, parse_task_items, repair_json
+
+
+def test_repair_json_complete():
+    assert repair_json('{"title": "周会", "tags": ["会议"]}') == {
+        "title": "周会",
+        "tags": ["会议"],
+    }
+
+
+def test_repair_json_truncated_tool_call_arguments():
+    # 流式输出中途或输出被截断: 未闭合的字符串和括号
+    assert repair_json('{"title": "周会纪要", "tags": ["会议", "周') == {
+        "title": "周会纪要",
+        "tags": ["会议", "周"],
+    }
+    assert repair_json('{"tasks": [{"title": "写周报", "priority": 3}, {"tit') == {
+        "tasks": [{"title": "写周报", "priority": 3}, {}]
+    }
+
+
+def test_repair_json_code_fence_and_trailing_comma():
+    text = '好的:\n```json\n{"title": "周会", "tags": ["会议",],}\n```'
+    assert repair_json(text) == {"title": "周会", "tags": ["会议"]}
+
+
+@pytest.mark.parametrize("text", [None, "", "没有 JSON"])
+def test_repair_json_without_json(text):
+    assert repair_json(text) is None
+
+
+def test_parse_note_keeps_fields_when_validation_fails():
+    data = {"title": "周会", "content_type": "Unknown", "tags": ["会议"], "extra": 1}
+    assert parse_note(data) == {"title": "周会", "content_type": "Unknown", "tags": ["会议"]}
+
+    with pytest.raises(ValueError):
+        parse_note({"content_type": "Note"})
+
+
+def test_parse_task_items_skips_invalid():
+    tasks, skipped = parse_task_items(
+        [{"title": "写周报", "priority": 3}, {"priority": 1}, "写日报"]
+    )
+    assert tasks == [{"title": "写周报", "priority": 3}]
+    assert skipped == 2
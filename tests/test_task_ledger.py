@@ -0,0 +1,46 @@
+import time
+from datetime import datetime
+
+import pytest
+
+from src.services.dida365.task_ledger import TaskLedger
+
+
+@pytest.fixture
+def ledger(tmp_path, monkeypatch, system_config):
+    system_config(
+        {"dida": {"ledger_path": str(tmp_path / "ledger.db"), "dedupe_window": 60}}
+    )
+    monkeypatch.setattr(TaskLedger, "_instance", None)
+    return TaskLedger()
+
+
+def test_make_key_normalizes_title():
+    due = datetime(2024, 6, 15, 14, 30)
+    assert TaskLedger.make_key("1", "写  周报", due, "m1") == TaskLedger.make_key(
+        "1", "写 周报", due, "m1"
+    )
+    assert TaskLedger.make_key("1", "ＡＢＣ", None, "m1") == TaskLedger.make_key(
+        "1", "abc", None, "m1"
+    )
+    assert TaskLedger.make_key("1", "写周报", None, "m1") != TaskLedger.make_key(
+        "1", "写周报", None, "m2"
+    )
+
+
+def test_lookup_within_window(ledger):
+    key = TaskLedger.make_key("1", "写周报", None, "m1")
+    assert ledger.lookup(key) is None
+
+    ledger.record(key, user_id="1", title="写周报", task_id="t1", project_id="p1")
+    assert ledger.lookup(key) == {"task_id": "t1", "project_id": "p1", "title": "写周报"}
+
+
+def test_lookup_after_window_expires(ledger, monkeypatch):
+    key = TaskLedger.make_key("1", "写周报", None, "m1")
+    ledger.record(key, user_id="1", title="写周报", task_id="t1")
+
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + 61)
+    assert ledger.lookup(key) is None
+    assert ledger.prune() == 1